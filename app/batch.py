@@ -0,0 +1,95 @@
+# app/batch.py
+"""Set-based create/update/delete for the ``:batch`` endpoints.
+
+A whole batch is one transaction and a handful of statements: one existence
+check, one multi-row INSERT (with RETURNING where the backend supports it),
+one executemany UPDATE by primary key, one DELETE ... IN and one SELECT to
+return the touched rows, instead of a commit + refresh per row.
+"""
+from typing import Any, Dict, List, Sequence
+
+from fastapi import HTTPException
+from sqlalchemy import delete, insert, select, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from . import events, rollup, suggest, tombstones
+
+
+def run_batch(
+    db: Session,
+    model,
+    creates: Sequence[Dict[str, Any]],
+    updates: Sequence[Dict[str, Any]],
+    deletes: Sequence[int],
+) -> List[Dict[str, Any]]:
+    """Apply the batch and return one result dict per requested item.
+
+    ``updates`` carry their row ``id`` plus only the fields to change.
+    Unknown ids are reported as 404 items rather than failing the batch;
+    constraint violations roll back the whole batch (409).
+    """
+    results: List[Dict[str, Any]] = []
+    wanted = {u["id"] for u in updates} | set(deletes)
+    existing = set(db.execute(select(model.id).where(model.id.in_(wanted))).scalars()) if wanted else set()
+    track = rollup.maintains(model)
+    before = rollup.snapshot(db, model, existing) if track else []
+
+    try:
+        with rollup.suspended(db):  # bulk statements: deltas applied below
+            created_ids: List[int] = []
+            if creates:
+                if db.get_bind().dialect.insert_executemany_returning:
+                    # Multi-row INSERT ... RETURNING. Ids are handed out in VALUES
+                    # order, so sorting them restores request order without
+                    # sort_by_parameter_order (which degrades to row-at-a-time
+                    # on SQLite).
+                    stmt = insert(model).returning(model.id)
+                    created_ids = sorted(db.execute(stmt, list(creates)).scalars())
+                else:  # e.g. MySQL: no RETURNING, the unit of work reads lastrowid per row
+                    objs = [model(**values) for values in creates]
+                    db.add_all(objs)
+                    db.flush()
+                    created_ids = [obj.id for obj in objs]
+            events.record(db, model, "create", created_ids)
+            suggest.record(db, model, created_ids)
+            for index, row_id in enumerate(created_ids):
+                results.append({"op": "create", "index": index, "id": row_id, "status": 201})
+
+            patches = [u for u in updates if u["id"] in existing and len(u) > 1]
+            if patches:
+                db.execute(update(model), patches)
+                events.record(db, model, "update", [u["id"] for u in patches])
+                suggest.record(db, model, [u["id"] for u in patches])
+            for index, values in enumerate(updates):
+                found = values["id"] in existing
+                results.append({"op": "update", "index": index, "id": values["id"],
+                                "status": 200 if found else 404,
+                                "detail": None if found else "Not found"})
+
+            doomed = [row_id for row_id in deletes if row_id in existing]
+            if doomed:
+                events.record(db, model, "delete", doomed)  # read before the rows go
+                db.execute(delete(model).where(model.id.in_(doomed)))
+                tombstones.record(db.connection(), model.__tablename__, doomed)
+                suggest.record(db, model, doomed, deleted=True)
+            for index, row_id in enumerate(deletes):
+                found = row_id in existing
+                results.append({"op": "delete", "index": index, "id": row_id,
+                                "status": 204 if found else 404,
+                                "detail": None if found else "Not found"})
+            db.flush()
+    except IntegrityError as exc:
+        raise HTTPException(status_code=409, detail=f"Batch rejected: {exc.orig}")
+
+    # One read for everything that still exists, with server-side defaults.
+    touched = {r["id"] for r in results if r["status"] in (200, 201)} - set(doomed)
+    if track:
+        rollup.apply(db, before, rollup.snapshot(db, model, touched))
+    rows = {}
+    if touched:
+        stmt = select(model).where(model.id.in_(touched)).execution_options(populate_existing=True)
+        rows = {obj.id: obj for obj in db.execute(stmt).scalars()}
+    for result in results:
+        result["item"] = rows.get(result["id"]) if result["status"] in (200, 201) else None
+    return results
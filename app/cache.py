@@ -0,0 +1,206 @@
+# app/cache.py
+"""In-process LRU + TTL cache of serialized GET responses.
+
+Opt in per route with ``@cached(<tables>)`` on a handler of a router created
+with ``APIRouter(route_class=CachedRoute)``. Entries are keyed on the request
+path and its normalized query string and hold the final response bytes and
+headers, so a hit skips dependency resolution, the database and
+serialization entirely.
+
+Each entry is tagged with the tables it was built from. Commits that touch a
+tracked table (see ``changes.on_commit``) and spec reloads drop the matching
+entries. Writes made by another process (a second worker, the CSV loader)
+are only picked up when the entry's TTL runs out.
+
+Settings: ``RESPONSE_CACHE_SIZE`` (entries, 0 disables),
+``RESPONSE_CACHE_TTL`` (seconds), ``RESPONSE_CACHE_MAX_BYTES`` (largest
+body worth caching).
+"""
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, Dict, FrozenSet, Iterable, List, NamedTuple, Optional, Tuple
+
+from fastapi import Request
+from fastapi.responses import Response
+from fastapi.routing import APIRoute
+
+from . import changes, metrics, replica
+from .conditional import SPECS, client_is_current, http_date
+from .spec_registry import registry
+from .streaming import negotiate
+
+CACHE_SIZE = int(os.getenv("RESPONSE_CACHE_SIZE", "512"))
+CACHE_TTL = float(os.getenv("RESPONSE_CACHE_TTL", "60"))
+CACHE_MAX_BYTES = int(os.getenv("RESPONSE_CACHE_MAX_BYTES", str(1024 * 1024)))
+CACHE_HEADER = "X-Cache"
+# Recomputed for every response; never replayed from the cache
+_SKIP_HEADERS = frozenset({"content-length", "server-timing", "x-query-count"})
+
+
+class _Entry(NamedTuple):
+    body: bytes
+    headers: Tuple[Tuple[str, str], ...]
+    media_type: Optional[str]
+    tables: FrozenSet[str]
+    expires: float
+
+
+class ResponseCache:
+    def __init__(self, max_entries: int = CACHE_SIZE, ttl: float = CACHE_TTL):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries: "OrderedDict[str, _Entry]" = OrderedDict()
+        self._generations: Dict[str, int] = {}
+        self._lock = threading.Lock()
+        self.hits: Dict[str, int] = {}
+        self.misses: Dict[str, int] = {}
+        self.evictions = 0
+        self.invalidations = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def generation(self, tables: Iterable[str]) -> Tuple[int, ...]:
+        return tuple(self._generations.get(t, 0) for t in tables)
+
+    def get(self, key: str, route: str) -> Optional[_Entry]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry.expires < time.monotonic():
+                del self._entries[key]
+                entry = None
+            if entry is None:
+                self.misses[route] = self.misses.get(route, 0) + 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits[route] = self.hits.get(route, 0) + 1
+            return entry
+
+    def put(self, key: str, entry: _Entry, generation: Tuple[int, ...]) -> None:
+        with self._lock:
+            # A write committed while the response was being built: it may be stale
+            if self.generation(sorted(entry.tables)) != generation:
+                return
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def invalidate(self, tables: Iterable[str]) -> int:
+        tables = set(tables)
+        with self._lock:
+            for t in tables:
+                self._generations[t] = self._generations.get(t, 0) + 1
+            stale = [k for k, e in self._entries.items() if e.tables & tables]
+            for k in stale:
+                del self._entries[k]
+            self.invalidations += len(stale)
+            return len(stale)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> dict:
+        return {
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "ttl_seconds": self.ttl,
+            "hits": sum(self.hits.values()),
+            "misses": sum(self.misses.values()),
+            "evictions": self.evictions,
+            "invalidations": self.invalidations,
+        }
+
+
+response_cache = ResponseCache()
+changes.on_commit(response_cache.invalidate)
+registry.on_reload(lambda: response_cache.invalidate([SPECS]))
+
+
+def cache_key(request: Request) -> str:
+    """Path plus query params sorted by name, blank values dropped."""
+    params = sorted((k, v) for k, v in request.query_params.multi_items() if v != "")
+    query = "&".join(f"{k}={v}" for k, v in params)
+    return f"{request.url.path}?{query}"
+
+
+def cached(*tables: str, ttl: Optional[float] = None) -> Callable:
+    """Mark a GET handler as cacheable; ``tables`` are the tags that invalidate it."""
+    def decorate(endpoint: Callable) -> Callable:
+        endpoint.__response_cache__ = (tuple(sorted(tables)), ttl)
+        return endpoint
+    return decorate
+
+
+class CachedRoute(APIRoute):
+    """APIRoute that serves ``@cached`` handlers from ``response_cache``."""
+
+    def get_route_handler(self) -> Callable:
+        handler = super().get_route_handler()
+        policy = getattr(self.endpoint, "__response_cache__", None)
+        if policy is None or response_cache.max_entries <= 0:
+            return handler
+        tables, ttl = policy
+        route = self.path
+
+        async def cached_handler(request: Request) -> Response:
+            if request.method != "GET" or negotiate(request):  # streamed bodies are not cached
+                return await handler(request)
+            key = cache_key(request)
+            entry = response_cache.get(key, route)
+            if entry is not None:
+                headers = dict(entry.headers)
+                if client_is_current(request, headers.get("etag"), http_date(headers.get("last-modified"))):
+                    return Response(status_code=304, headers=headers)
+                response = Response(entry.body, media_type=entry.media_type, headers=headers)
+                response.headers[CACHE_HEADER] = "HIT"
+                return response
+
+            generation = response_cache.generation(tables)
+            response = await handler(request)
+            body = getattr(response, "body", None)
+            # A replica read is only cached once the replica has caught up with our writes
+            if (response.status_code == 200 and body is not None and len(body) <= CACHE_MAX_BYTES
+                    and replica.cacheable(request)):
+                headers = tuple(
+                    (k, v) for k, v in response.headers.items() if k not in _SKIP_HEADERS
+                )
+                expires = time.monotonic() + (response_cache.ttl if ttl is None else ttl)
+                response_cache.put(
+                    key, _Entry(body, headers, response.media_type, frozenset(tables), expires), generation
+                )
+            response.headers[CACHE_HEADER] = "MISS"
+            return response
+
+        return cached_handler
+
+
+# ---- /v1/metrics ----
+def _render_metrics() -> List[str]:
+    lines = []
+    for name, help_text, series in (
+        ("response_cache_hits_total", "Responses served from the cache", response_cache.hits),
+        ("response_cache_misses_total", "Cacheable requests that missed", response_cache.misses),
+    ):
+        lines += [f"# HELP {name} {help_text}", f"# TYPE {name} counter"]
+        lines += [f'{name}{{route="{route}"}} {count}' for route, count in sorted(series.items())]
+    stats = response_cache.stats()
+    lines += [
+        "# HELP response_cache_evictions_total Entries evicted by the LRU bound",
+        "# TYPE response_cache_evictions_total counter",
+        f"response_cache_evictions_total {stats['evictions']}",
+        "# HELP response_cache_invalidations_total Entries dropped by writes or spec reloads",
+        "# TYPE response_cache_invalidations_total counter",
+        f"response_cache_invalidations_total {stats['invalidations']}",
+        "# HELP response_cache_entries Entries currently cached",
+        "# TYPE response_cache_entries gauge",
+        f"response_cache_entries {stats['entries']}",
+    ]
+    return lines
+
+
+metrics.register_collector(_render_metrics)
@@ -0,0 +1,161 @@
+# app/changes.py
+"""Per-table change versions.
+
+Every write to a tracker table bumps that table's row in ``table_versions``,
+whichever path made it: ORM unit-of-work flushes, ORM-enabled
+``insert()/update()/delete()`` (the ``:batch`` endpoints) and the CSV loader
+(which calls ``bump_versions`` itself). Readers get a cheap version stamp per
+table without scanning it, which is what conditional GETs are built on.
+
+The bump runs once the write has committed, in a short transaction of its
+own on the connection the session just released. Bumping inside the write
+transaction held the version row's lock until commit, which on InnoDB
+serialized every writer of a table behind the slowest one. A reader can
+therefore see the new rows under the old version for the moment between
+the two commits (its ETag changes one bump later), never the reverse. If
+the bump fails the write stands and the next write to the table bumps it.
+
+Code that must react once a write is durable and versioned (caches,
+notifications) registers with ``on_commit``; callbacks receive the set of
+table names.
+"""
+import logging
+from datetime import datetime, timezone
+from typing import Callable, Dict, Iterable, List, Optional, Set, Tuple
+
+from sqlalchemy import event, insert, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from .models import TableVersion
+
+log = logging.getLogger(__name__)
+
+# Tables whose writes are versioned (spec sheets use their load stamp instead).
+TRACKED_TABLES = frozenset({"deliverables", "personnel", "program_qc", "qc_comments", "toc_items"})
+
+_INFO_KEY = "changed_tables"
+_callbacks: List[Callable[[Set[str]], None]] = []
+
+
+def on_commit(callback: Callable[[Set[str]], None]) -> None:
+    """Call ``callback(tables)`` after every commit that changed tracked tables
+    (once their versions have been bumped)."""
+    _callbacks.append(callback)
+
+
+def record(session: Session, *tables: str) -> None:
+    """Mark ``tables`` as changed in ``session``'s current transaction."""
+    changed = session.info.setdefault(_INFO_KEY, set())
+    changed.update(t for t in tables if t in TRACKED_TABLES)
+
+
+def bump_versions(conn, tables: Iterable[str]) -> None:
+    """Increment the version of each table (Session or Connection)."""
+    names = sorted(set(tables) & TRACKED_TABLES)
+    if not names:
+        return
+    result = conn.execute(
+        update(TableVersion)
+        .where(TableVersion.table_name.in_(names))
+        .values(version=TableVersion.version + 1, updated_at=datetime.now(timezone.utc))
+    )
+    if result.rowcount != len(names):  # first write since the table was created
+        seed_versions(conn, names)
+
+
+def seed_versions(conn, tables: Iterable[str] = TRACKED_TABLES) -> None:
+    """Insert missing ``table_versions`` rows."""
+    names = set(tables)
+    existing = set(conn.execute(
+        select(TableVersion.table_name).where(TableVersion.table_name.in_(names))
+    ).scalars())
+    missing = sorted(names - existing)
+    if missing:
+        now = datetime.now(timezone.utc)
+        conn.execute(insert(TableVersion), [
+            {"table_name": name, "version": 1, "updated_at": now} for name in missing
+        ])
+
+
+def versions(db: Session, tables: Iterable[str]) -> Dict[str, Tuple[int, Optional[datetime]]]:
+    """table name -> (version, updated_at); unseeded tables read as (0, None)."""
+    names = sorted(set(tables))
+    return _by_name(names, db.execute(_versions_query(names)).all())
+
+
+async def aversions(db: AsyncSession, tables: Iterable[str]) -> Dict[str, Tuple[int, Optional[datetime]]]:
+    """``versions`` on an AsyncSession (async handlers, ``DB_ASYNC=1``)."""
+    names = sorted(set(tables))
+    return _by_name(names, (await db.execute(_versions_query(names))).all())
+
+
+def _versions_query(names: List[str]):
+    return (
+        select(TableVersion.table_name, TableVersion.version, TableVersion.updated_at)
+        .where(TableVersion.table_name.in_(names))
+    )
+
+
+def _by_name(names: List[str], rows) -> Dict[str, Tuple[int, Optional[datetime]]]:
+    found = {name: (version, updated_at) for name, version, updated_at in rows}
+    return {name: found.get(name, (0, None)) for name in names}
+
+
+# ---- session hooks (registered on every Session; an AsyncSession runs them on its sync Session) ----
+@event.listens_for(Session, "after_flush")
+def _after_flush(session, flush_context):
+    tables = {
+        obj.__table__.name
+        for obj in (*session.new, *session.dirty, *session.deleted)
+        if hasattr(obj, "__table__")
+    }
+    record(session, *tables)
+
+
+@event.listens_for(Session, "do_orm_execute")
+def _do_orm_execute(orm_execute_state):
+    if orm_execute_state.is_insert or orm_execute_state.is_update or orm_execute_state.is_delete:
+        table = getattr(orm_execute_state.statement, "table", None)
+        if table is not None and getattr(table, "name", None) in TRACKED_TABLES:
+            record(orm_execute_state.session, table.name)
+
+
+@event.listens_for(Session, "before_commit")
+def _before_commit(session):
+    # Pending objects are otherwise flushed after this hook runs
+    session.flush()
+
+
+@event.listens_for(Session, "after_commit")
+def _after_commit(session):
+    changed = session.info.pop(_INFO_KEY, None)
+    if changed:
+        session.info["committed_tables"] = changed
+
+
+@event.listens_for(Session, "after_transaction_end")
+def _after_transaction_end(session, transaction):
+    # Runs after after_commit, once the session has given its connection back
+    # to the pool: the bump reuses it rather than waiting for a second one.
+    if transaction.parent is not None:
+        return
+    tables = session.info.pop("committed_tables", None)
+    if not tables:
+        return
+    try:
+        with session.get_bind().begin() as conn:
+            bump_versions(conn, tables)
+    except Exception:
+        log.exception("Version bump after commit failed for %s", ", ".join(sorted(tables)))
+    for callback in _callbacks:
+        try:
+            callback(tables)
+        except Exception:  # a failing listener must not fail the request
+            log.exception("on_commit callback %r failed", callback)
+
+
+@event.listens_for(Session, "after_rollback")
+def _after_rollback(session):
+    session.info.pop(_INFO_KEY, None)
+    session.info.pop("committed_tables", None)
@@ -0,0 +1,141 @@
+# app/conditional.py
+"""Conditional GET: ``ETag`` / ``Last-Modified`` / ``304 Not Modified``.
+
+Read handlers call ``check_not_modified`` (async handlers
+``acheck_not_modified``) before their main query. The ETag
+hashes the request (path, query string, negotiated media type) with the
+version stamp of every table the response depends on: the ``table_versions``
+counters for tracker tables, the spec registry's load stamp for spec sheets
+(``SPECS``). A matching ``If-None-Match`` (or, without one, an
+``If-Modified-Since`` no older than the stamp) raises ``NotModified``, which
+``main`` turns into an empty 304, so the main query never runs.
+"""
+import hashlib
+from datetime import datetime, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+from typing import Dict, Optional, Sequence
+
+from fastapi import Request, Response
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from .changes import aversions, versions
+from .spec_registry import registry
+
+# Pseudo table name: everything loaded by the spec loader.
+SPECS = "specs"
+
+
+class NotModified(Exception):
+    def __init__(self, headers: Dict[str, str]):
+        self.headers = headers
+
+
+def _as_utc(value) -> Optional[datetime]:
+    if value is None:
+        return None
+    if isinstance(value, str):  # spec_tables.last_loaded_utc is stored as text
+        try:
+            value = datetime.fromisoformat(value)
+        except ValueError:
+            return None
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return value.astimezone(timezone.utc).replace(microsecond=0)
+
+
+def _stamp(db: Session, tables: Sequence[str]):
+    tracked = [t for t in tables if t != SPECS]
+    current = versions(db, tracked) if tracked else {}
+    if SPECS in tables:
+        registry.refresh(db)
+    return _combine(current, SPECS in tables)
+
+
+async def _astamp(db: AsyncSession, tables: Sequence[str]):
+    tracked = [t for t in tables if t != SPECS]
+    current = await aversions(db, tracked) if tracked else {}
+    if SPECS in tables:
+        await registry.arefresh(db)
+    return _combine(current, SPECS in tables)
+
+
+def _combine(current: dict, specs: bool):
+    parts = []
+    modified = None
+    for name, (version, updated_at) in current.items():
+        parts.append(f"{name}:{version}")
+        updated_at = _as_utc(updated_at)
+        if updated_at and (modified is None or updated_at > modified):
+            modified = updated_at
+    if specs:
+        parts.append(f"{SPECS}:{registry.stamp}")
+        loaded = _as_utc(registry.stamp[0] if registry.stamp else None)
+        if loaded and (modified is None or loaded > modified):
+            modified = loaded
+    return "|".join(parts), modified
+
+
+def _etag(request: Request, stamp: str) -> str:
+    query = "&".join(sorted(f"{k}={v}" for k, v in request.query_params.multi_items()))
+    accept = request.headers.get("accept", "")
+    digest = hashlib.sha1(f"{request.url.path}?{query}|{accept}|{stamp}".encode()).hexdigest()
+    return f'W/"{digest[:32]}"'
+
+
+def etag_matches(header: str, etag: str) -> bool:
+    if header.strip() == "*":
+        return True
+    # Weak comparison: W/"x" and "x" are the same validator
+    wanted = etag[2:] if etag.startswith("W/") else etag
+    for tag in header.split(","):
+        tag = tag.strip()
+        if (tag[2:] if tag.startswith("W/") else tag) == wanted:
+            return True
+    return False
+
+
+def check_not_modified(request: Request, response: Response, db: Session, *tables: str) -> Dict[str, str]:
+    """Set validators on ``response``; raise NotModified if the client is current.
+
+    Returns the validator headers for handlers that build their own Response
+    (streaming), whose headers FastAPI does not merge from ``response``.
+    """
+    return _validate(request, response, *_stamp(db, tables))
+
+
+async def acheck_not_modified(request: Request, response: Response, db: AsyncSession, *tables: str) -> Dict[str, str]:
+    """``check_not_modified`` on an AsyncSession (async handlers, ``DB_ASYNC=1``)."""
+    return _validate(request, response, *await _astamp(db, tables))
+
+
+def _validate(request: Request, response: Response, stamp: str, modified: Optional[datetime]) -> Dict[str, str]:
+    headers = {"ETag": _etag(request, stamp), "Cache-Control": "no-cache", "Vary": "Accept"}
+    if modified is not None:
+        headers["Last-Modified"] = format_datetime(modified, usegmt=True)
+
+    if client_is_current(request, headers["ETag"], modified):
+        raise NotModified(headers)
+
+    response.headers.update(headers)
+    return headers
+
+
+def client_is_current(request: Request, etag: Optional[str], modified: Optional[datetime]) -> bool:
+    """``If-None-Match`` matches ``etag``, or, without one, ``If-Modified-Since``
+    is no older than ``modified``."""
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        return etag is not None and etag_matches(if_none_match, etag)
+    if modified is None or not request.headers.get("if-modified-since"):
+        return False
+    since = http_date(request.headers["if-modified-since"])
+    return since is not None and modified <= since
+
+
+def http_date(value: Optional[str]) -> Optional[datetime]:
+    try:
+        parsed = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    return parsed if parsed.tzinfo is not None else None
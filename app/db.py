@@ -19,17 +19,34 @@ def get_db():
         db.close()
         '''
 # app/db.py
+import logging
 import os
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, inspect, literal_column
+from sqlalchemy.engine import URL, make_url
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.orm import sessionmaker, declarative_base, Session
 from dotenv import load_dotenv
 
+from .engine_profile import engine_options, install as install_profile
+from .metrics import instrument_engine, metered_poolclass
+from .profiling import instrument as instrument_statements
+
 load_dotenv()
+log = logging.getLogger(__name__)
 
 DB_URL = os.getenv("DB_URL", "sqlite:///./app.db")
-connect_args = {"check_same_thread": False} if DB_URL.startswith("sqlite") else {}
 
-engine = create_engine(DB_URL, echo=False, future=True, connect_args=connect_args)
+poolclass = metered_poolclass(make_url(DB_URL))  # times pool checkouts for /v1/metrics
+
+# Pool sizing, timeouts and SQLite pragmas come from the environment
+engine = create_engine(
+    DB_URL, echo=False, future=True,
+    **engine_options(make_url(DB_URL), pooled=poolclass is not None),
+    **({"poolclass": poolclass} if poolclass else {}),
+)
+install_profile(engine, make_url(DB_URL))
+instrument_engine(engine)
+instrument_statements(engine)  # per-request SQL totals, slow-query log
 SessionLocal = sessionmaker(bind=engine, autoflush=False, autocommit=False, future=True)
 Base = declarative_base()
 
@@ -44,8 +61,170 @@ def get_db():
     finally:
         db.close()
 
+# ---- Read replica (DB_READ_URL) ----
+# GET handlers take their session from ``replica.get_read_db``, which picks
+# this engine or the primary per request. Without DB_READ_URL both names
+# point at the primary.
+DB_READ_URL = os.getenv("DB_READ_URL") or None
+read_engine = engine
+ReadSessionLocal = SessionLocal
+if DB_READ_URL:
+    read_poolclass = metered_poolclass(make_url(DB_READ_URL), "replica")
+    read_engine = create_engine(
+        DB_READ_URL, echo=False, future=True,
+        **engine_options(make_url(DB_READ_URL), pooled=read_poolclass is not None),
+        **({"poolclass": read_poolclass} if read_poolclass else {}),
+    )
+    install_profile(read_engine, make_url(DB_READ_URL))
+    instrument_engine(read_engine, "replica")
+    instrument_statements(read_engine)
+    ReadSessionLocal = sessionmaker(bind=read_engine, autoflush=False, autocommit=False, future=True)
+
+
+# ---- Async mode (DB_ASYNC=1) ----
+# main then serves every router's ``async_router``: ``async def`` handlers
+# whose AsyncSession runs its statements through an async driver on the
+# event loop, so a request waiting on the database holds no threadpool
+# worker. The driver is derived from DB_URL / DB_READ_URL (aiosqlite,
+# aiomysql); DB_ASYNC_URL / DB_ASYNC_READ_URL override the derived URLs. The
+# sync engines above stay in use for startup, the loader and the background
+# threads.
+DB_ASYNC = os.getenv("DB_ASYNC", "0").lower() in ("1", "true", "yes")
+ASYNC_DRIVERS = {"sqlite": "aiosqlite", "mysql": "aiomysql", "mariadb": "aiomysql"}
+
+
+def async_url(url: str) -> URL:
+    """``url`` with its backend's async driver."""
+    parsed = make_url(url)
+    backend = parsed.get_backend_name()
+    if backend not in ASYNC_DRIVERS:
+        raise ValueError(f"DB_ASYNC: no async driver for {backend}; set DB_ASYNC_URL")
+    return parsed.set(drivername=f"{backend}+{ASYNC_DRIVERS[backend]}")
+
+
+def create_async(url: URL, name: str) -> AsyncEngine:
+    """Async engine with the sync engines' tuning and instrumentation."""
+    async_poolclass = metered_poolclass(url, name)
+    async_engine = create_async_engine(
+        url, echo=False,
+        **engine_options(url, pooled=async_poolclass is not None),
+        **({"poolclass": async_poolclass} if async_poolclass else {}),
+    )
+    install_profile(async_engine, url)
+    instrument_engine(async_engine, name)
+    instrument_statements(async_engine)
+    return async_engine
+
+
+def async_sessions(async_engine: AsyncEngine) -> async_sessionmaker:
+    # expire_on_commit=False: handlers return ORM objects after the commit,
+    # and an expired attribute cannot lazy-load outside the session's greenlet
+    return async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
+
+
+async_engine = async_read_engine = None
+AsyncSessionLocal = AsyncReadSessionLocal = None
+if DB_ASYNC:
+    async_engine = create_async(make_url(os.getenv("DB_ASYNC_URL") or async_url(DB_URL)), "primary_async")
+    AsyncSessionLocal = async_sessions(async_engine)
+    async_read_engine, AsyncReadSessionLocal = async_engine, AsyncSessionLocal
+    if DB_READ_URL:
+        async_read_engine = create_async(
+            make_url(os.getenv("DB_ASYNC_READ_URL") or async_url(DB_READ_URL)), "replica_async"
+        )
+        AsyncReadSessionLocal = async_sessions(async_read_engine)
+
+
+async def get_async_db():
+    db: AsyncSession = AsyncSessionLocal()
+    try:
+        yield db
+        await db.commit()
+    except:
+        await db.rollback()
+        raise
+    finally:
+        await db.close()
+
+
 def create_tables():
     # Import models before create_all so SQLAlchemy sees the mappings
     from . import models  # noqa: F401
+    from .changes import seed_versions
     Base.metadata.create_all(bind=engine)
+    # create_all skips tables that already exist; add columns and indexes declared since
+    add_missing_columns(engine)
+    for table in Base.metadata.sorted_tables:
+        for index in table.indexes:
+            index.create(bind=engine, checkfirst=True)
+    with engine.begin() as conn:
+        seed_versions(conn)
+
+
+def add_missing_columns(bind) -> None:
+    """ALTER TABLE ... ADD COLUMN for nullable model columns a table lacks.
+
+    Columns are added without a DDL default (SQLite only accepts constant
+    ones) and existing rows are backfilled with the ``server_default``.
+    """
+    existing_tables = set(inspect(bind).get_table_names())
+    for table in Base.metadata.sorted_tables:
+        if table.name not in existing_tables:
+            continue
+        have = {c["name"] for c in inspect(bind).get_columns(table.name)}
+        for column in table.columns:
+            if column.name in have or not column.nullable:
+                continue
+            preparer = bind.dialect.identifier_preparer
+            ddl = (f"ALTER TABLE {preparer.format_table(table)} ADD COLUMN "
+                   f"{preparer.format_column(column)} {column.type.compile(bind.dialect)}")
+            with bind.begin() as conn:
+                conn.exec_driver_sql(ddl)
+                default = getattr(column.server_default, "arg", None)
+                if default is not None:
+                    value = literal_column(default) if isinstance(default, str) else default
+                    conn.execute(table.update().values({column.name: value}))
+            log.info("Added column %s.%s", table.name, column.name)
+
+
+def upsert(table, dialect_name: str, update_cols=None, increment_cols=()):
+    """INSERT that updates ``update_cols`` on primary-key conflict.
+
+    ``increment_cols`` are added to instead of replaced (``col = col + new``),
+    for counters maintained by deltas. Falls back to a plain INSERT on
+    backends without an upsert clause or for tables without a primary key.
+    Works with executemany parameter lists. Columns with a SQL ``onupdate``
+    (``updated_at``) are refreshed on conflict like an ORM update would.
+    """
+    pk = [c.name for c in table.primary_key.columns]
+    if update_cols is None:
+        update_cols = [c.name for c in table.columns if c.name not in pk and c.name not in increment_cols]
+    if not pk:
+        return table.insert()
+    if dialect_name == "sqlite":
+        from sqlalchemy.dialects.sqlite import insert
+        stmt = insert(table)
+        if not update_cols and not increment_cols:
+            return stmt.on_conflict_do_nothing(index_elements=pk)
+        set_ = {c: stmt.excluded[c] for c in update_cols}
+        set_.update({c: table.c[c] + stmt.excluded[c] for c in increment_cols})
+        set_.update(_onupdate(table, set_))
+        return stmt.on_conflict_do_update(index_elements=pk, set_=set_)
+    if dialect_name in ("mysql", "mariadb"):
+        from sqlalchemy.dialects.mysql import insert
+        stmt = insert(table)
+        set_ = {c: stmt.inserted[c] for c in (update_cols or ([] if increment_cols else pk[:1]))}
+        set_.update({c: table.c[c] + stmt.inserted[c] for c in increment_cols})
+        set_.update(_onupdate(table, set_))
+        return stmt.on_duplicate_key_update(set_)
+    return table.insert()
+
 
+def _onupdate(table, set_) -> dict:
+    """SQL ``onupdate`` expressions, which ON CONFLICT / ON DUPLICATE KEY skip."""
+    if not set_:
+        return {}
+    return {
+        c.name: c.onupdate.arg for c in table.columns
+        if c.name not in set_ and c.onupdate is not None and c.onupdate.is_clause_element
+    }
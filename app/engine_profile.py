@@ -0,0 +1,124 @@
+# app/engine_profile.py
+"""Engine tuning from the environment (see .env.example).
+
+SQLite connections get their pragmas in a ``connect`` event, so every
+pooled connection (sync or aiosqlite) is set up the same way. The defaults
+favour concurrent reads and writes:
+
+* ``journal_mode=WAL``: readers no longer block on a writer, and vice versa;
+* ``synchronous=NORMAL``: safe with WAL, and one fsync per checkpoint
+  instead of one per commit;
+* ``busy_timeout``: a second writer waits for the lock instead of failing
+  with ``database is locked``;
+* ``mmap_size`` / ``cache_size``: fewer read syscalls on spec sheet scans.
+
+Server backends (MySQL) get pool sizing, ``pool_recycle`` (below the
+server's ``wait_timeout``), ``pool_pre_ping`` and connect/read timeouts.
+"""
+import os
+from typing import Any, Dict
+
+from sqlalchemy import event
+from sqlalchemy.engine import URL, Engine
+
+
+JOURNAL_MODES = {"WAL", "DELETE", "TRUNCATE", "PERSIST", "MEMORY", "OFF"}
+SYNCHRONOUS = {"OFF", "NORMAL", "FULL", "EXTRA"}
+
+
+def _env_int(name: str, default: int) -> int:
+    value = os.getenv(name)
+    return default if value in (None, "") else int(value)
+
+
+def _env_bool(name: str, default: bool) -> bool:
+    value = os.getenv(name)
+    return default if value in (None, "") else value.lower() in ("1", "true", "yes")
+
+
+def _env_choice(name: str, default: str, choices: set) -> str:
+    value = (os.getenv(name) or default).upper()
+    if value not in choices:
+        raise ValueError(f"{name}={value!r}; expected one of {', '.join(sorted(choices))}")
+    return value
+
+
+def sqlite_pragmas() -> Dict[str, Any]:
+    return {
+        "journal_mode": _env_choice("SQLITE_JOURNAL_MODE", "WAL", JOURNAL_MODES),
+        "synchronous": _env_choice("SQLITE_SYNCHRONOUS", "NORMAL", SYNCHRONOUS),
+        "busy_timeout": _env_int("SQLITE_BUSY_TIMEOUT_MS", 5000),
+        "mmap_size": _env_int("SQLITE_MMAP_SIZE", 256 * 1024 * 1024),
+        "cache_size": _env_int("SQLITE_CACHE_SIZE", -64000),  # negative = KiB
+    }
+
+
+def pool_options(url: URL) -> Dict[str, Any]:
+    """Keyword arguments for ``create_engine`` when it gets a QueuePool."""
+    server = url.get_backend_name() != "sqlite"
+    return {
+        "pool_size": _env_int("DB_POOL_SIZE", 10 if server else 5),
+        "max_overflow": _env_int("DB_MAX_OVERFLOW", 20 if server else 10),
+        "pool_timeout": _env_int("DB_POOL_TIMEOUT", 30),
+        "pool_recycle": _env_int("DB_POOL_RECYCLE", 1800 if server else -1),
+        "pool_pre_ping": _env_bool("DB_POOL_PRE_PING", server),
+    }
+
+
+def connect_args(url: URL) -> Dict[str, Any]:
+    backend = url.get_backend_name()
+    if backend == "sqlite":
+        return {"check_same_thread": False}
+    if backend in ("mysql", "mariadb"):
+        args = {"connect_timeout": _env_int("DB_CONNECT_TIMEOUT", 10)}
+        if not url.get_dialect().is_async:  # aiomysql has no read/write timeouts
+            read_timeout = _env_int("DB_READ_TIMEOUT", 0)
+            if read_timeout:
+                args["read_timeout"] = read_timeout
+                args["write_timeout"] = read_timeout
+        return args
+    return {}
+
+
+def engine_options(url: URL, pooled: bool) -> Dict[str, Any]:
+    options: Dict[str, Any] = {"connect_args": connect_args(url)}
+    if pooled:
+        options.update(pool_options(url))
+    return options
+
+
+def install(engine: Engine, url: URL) -> None:
+    """Apply the SQLite pragmas to every new connection of ``engine``."""
+    if url.get_backend_name() != "sqlite":
+        return
+    pragmas = sqlite_pragmas()
+    in_memory = url.database in (None, "", ":memory:")
+
+    def _on_connect(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        try:
+            for name, value in pragmas.items():
+                if name == "journal_mode" and in_memory:
+                    continue  # in-memory databases only support MEMORY
+                cursor.execute(f"PRAGMA {name}={value}")
+        finally:
+            cursor.close()
+
+    event.listen(getattr(engine, "sync_engine", engine), "connect", _on_connect)
+
+
+def describe(engine: Engine) -> str:
+    """One-line summary of the effective settings, for the startup log."""
+    sync_engine = getattr(engine, "sync_engine", engine)
+    url = sync_engine.url
+    pool = sync_engine.pool
+    parts = [f"{url.get_backend_name()}+{url.get_driver_name()}", type(pool).__name__]
+    if hasattr(pool, "size") and hasattr(pool, "_max_overflow"):
+        parts.append(f"pool_size={pool.size()} max_overflow={pool._max_overflow} "
+                     f"timeout={pool._timeout} recycle={pool._recycle} pre_ping={pool._pre_ping}")
+    # An async engine only connects inside a greenlet; it installs the same pragmas.
+    if url.get_backend_name() == "sqlite" and not sync_engine.dialect.is_async:
+        with sync_engine.connect() as conn:
+            actual = {name: conn.exec_driver_sql(f"PRAGMA {name}").scalar() for name in sqlite_pragmas()}
+        parts.append(" ".join(f"{k}={v}" for k, v in actual.items()))
+    return ", ".join(parts)
@@ -0,0 +1,242 @@
+# app/events.py
+"""In-process change events behind ``GET /v1/events`` (Server-Sent Events).
+
+Writes to program QC, QC comments and personnel are turned into
+``{"entity", "op", "id", "program_qc_id", "deliverable_id"}`` events inside
+the writing transaction and published only once it commits:
+
+* ORM writes (the single-row handlers) in an ``after_flush`` hook;
+* ``run_batch`` (``:batch`` endpoints), which calls ``record``.
+
+``broker`` numbers each event, keeps the last ``EVENTS_BUFFER`` of them for
+``Last-Event-ID`` resume and fans them out to subscribers. A subscriber is
+an asyncio queue of ``EVENTS_QUEUE_SIZE`` on its own event loop; one that
+falls that far behind is dropped (its stream ends) rather than slowing the
+writers or growing memory, and its client reconnects and resumes from the
+buffer. Event ids carry a per-process boot tag, so a client resuming across
+a restart (or on another worker) gets a ``reset`` event and should refetch.
+"""
+import asyncio
+import os
+import threading
+import time
+from collections import deque
+from datetime import datetime, timezone
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import event, select
+from sqlalchemy.orm import Session
+
+from . import metrics
+from .models import Personnel, ProgramQC, QCComment
+
+BUFFER_SIZE = int(os.getenv("EVENTS_BUFFER", "1000"))
+QUEUE_SIZE = int(os.getenv("EVENTS_QUEUE_SIZE", "256"))
+_INFO_KEY = "pending_events"
+
+ENTITIES = {ProgramQC: "program_qc", QCComment: "qc_comments", Personnel: "personnel"}
+Event = Dict[str, object]
+
+
+class Subscriber:
+    def __init__(self, loop: asyncio.AbstractEventLoop, match):
+        self.loop = loop
+        self.match = match
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=QUEUE_SIZE)
+        self.dropped = False
+
+    def offer(self, items: List[Tuple[str, Event]]) -> None:
+        """Runs on the subscriber's loop."""
+        if self.dropped:
+            return
+        for item in items:
+            if not self.match(item[1]):
+                continue
+            try:
+                self.queue.put_nowait(item)
+            except asyncio.QueueFull:
+                # Drop the backlog and wake the consumer, which ends the stream
+                self.dropped = True
+                broker.dropped += 1
+                while not self.queue.empty():
+                    self.queue.get_nowait()
+                self.queue.put_nowait(None)
+                return
+
+
+class EventBroker:
+    def __init__(self, buffer_size: int = BUFFER_SIZE):
+        self.boot = format(int(time.time()), "x")
+        self._seq = 0
+        self._buffer: deque = deque(maxlen=buffer_size)
+        self._subscribers: List[Subscriber] = []
+        self._lock = threading.Lock()
+        self.published = 0
+        self.dropped = 0
+
+    def publish(self, events: Iterable[Event]) -> None:
+        """Number, buffer and fan out ``events``; safe from any thread."""
+        with self._lock:
+            items = []
+            for evt in events:
+                self._seq += 1
+                items.append((f"{self.boot}-{self._seq}", evt))
+            self._buffer.extend(items)
+            subscribers = list(self._subscribers)
+            self.published += len(items)
+        for sub in subscribers:
+            try:
+                sub.loop.call_soon_threadsafe(sub.offer, items)
+            except RuntimeError:  # loop closed under a vanished subscriber
+                self.unsubscribe(sub)
+
+    def subscribe(self, match, last_event_id: Optional[str]) -> Tuple[Subscriber, Optional[List[Tuple[str, Event]]]]:
+        """Register a subscriber and return the backlog after ``last_event_id``.
+
+        The backlog is None when the id cannot be resumed from (another boot,
+        or older than the buffer): the client has to refetch.
+        """
+        sub = Subscriber(asyncio.get_running_loop(), match)
+        with self._lock:
+            self._subscribers.append(sub)
+            backlog: Optional[List[Tuple[str, Event]]] = []
+            if last_event_id:
+                backlog = self._after(last_event_id)
+        if backlog:
+            backlog = [item for item in backlog if match(item[1])]
+        return sub, backlog
+
+    def _after(self, last_event_id: str) -> Optional[List[Tuple[str, Event]]]:
+        boot, _, seq = last_event_id.partition("-")
+        if boot != self.boot or not seq.isdigit():
+            return None
+        seq = int(seq)
+        oldest = self._seq - len(self._buffer)  # seq of the last event no longer buffered
+        if seq < oldest or seq > self._seq:
+            return None
+        return list(self._buffer)[len(self._buffer) - (self._seq - seq):]
+
+    def unsubscribe(self, sub: Subscriber) -> None:
+        with self._lock:
+            if sub in self._subscribers:
+                self._subscribers.remove(sub)
+
+    @property
+    def subscribers(self) -> int:
+        return len(self._subscribers)
+
+
+broker = EventBroker()
+
+
+# ---- capture ----
+def _merge(pending: Dict[Tuple[str, int], Event], evt: Event) -> None:
+    key = (evt["entity"], evt["id"])
+    prior = pending.get(key)
+    if prior is not None and prior["op"] == "create":
+        if evt["op"] == "delete":
+            del pending[key]  # never visible outside the transaction
+            return
+        evt = {**evt, "op": "create"}
+    pending[key] = evt
+
+
+def _deliverables(session: Session, program_ids: Iterable[int]) -> Dict[int, Optional[int]]:
+    """deliverable_id of each program, preferring in-session state."""
+    found: Dict[int, Optional[int]] = {}
+    missing = []
+    for pid in set(program_ids):
+        obj = session.identity_map.get(session.identity_key(ProgramQC, pid)) if pid is not None else None
+        if obj is not None:
+            found[pid] = obj.deliverable_id
+        elif pid is not None:
+            missing.append(pid)
+    if missing:
+        stmt = select(ProgramQC.id, ProgramQC.deliverable_id).where(ProgramQC.id.in_(missing))
+        found.update(dict(session.connection().execute(stmt).all()))
+    return found
+
+
+def _events(session: Session, model, op: str, rows: List[dict]) -> List[Event]:
+    entity = ENTITIES[model]
+    if model is QCComment:
+        deliverables = _deliverables(session, [r["program_qc_id"] for r in rows])
+    out = []
+    for r in rows:
+        evt: Event = {"entity": entity, "op": op, "id": r["id"], "program_qc_id": None, "deliverable_id": None}
+        if model is ProgramQC:
+            evt["program_qc_id"] = r["id"]
+            evt["deliverable_id"] = r["deliverable_id"]
+        elif model is QCComment:
+            evt["program_qc_id"] = r["program_qc_id"]
+            evt["deliverable_id"] = deliverables.get(r["program_qc_id"])
+        out.append(evt)
+    return out
+
+
+def _columns(model) -> List[str]:
+    if model is ProgramQC:
+        return ["id", "deliverable_id"]
+    if model is QCComment:
+        return ["id", "program_qc_id"]
+    return ["id"]
+
+
+def record(session: Session, model, op: str, ids: Iterable[int]) -> None:
+    """Queue ``op`` events for rows ``ids`` of ``model`` (read as they are now)."""
+    ids = list(ids)
+    if model not in ENTITIES or not ids:
+        return
+    cols = [getattr(model, c) for c in _columns(model)]
+    rows = session.connection().execute(select(*cols).where(model.id.in_(ids))).mappings().all()
+    _queue(session, _events(session, model, op, [dict(r) for r in rows]))
+
+
+def _queue(session: Session, events: List[Event]) -> None:
+    pending = session.info.setdefault(_INFO_KEY, {})
+    for evt in events:
+        _merge(pending, evt)
+
+
+@event.listens_for(Session, "after_flush")
+def _after_flush(session, flush_context):
+    for model in ENTITIES:
+        names = _columns(model)
+        for op, objs in (
+            ("create", [o for o in session.new if isinstance(o, model)]),
+            ("update", [o for o in session.dirty if isinstance(o, model) and session.is_modified(o)]),
+            ("delete", [o for o in session.deleted if isinstance(o, model)]),
+        ):
+            if objs:
+                _queue(session, _events(session, model, op, [{n: getattr(o, n) for n in names} for o in objs]))
+
+
+@event.listens_for(Session, "after_commit")
+def _after_commit(session):
+    pending = session.info.pop(_INFO_KEY, None)
+    if pending:
+        at = datetime.now(timezone.utc).isoformat()
+        broker.publish({**evt, "at": at} for evt in pending.values())
+
+
+@event.listens_for(Session, "after_rollback")
+def _after_rollback(session):
+    session.info.pop(_INFO_KEY, None)
+
+
+# ---- /v1/metrics ----
+def _render_metrics() -> List[str]:
+    return [
+        "# HELP events_published_total Change events published to /v1/events",
+        "# TYPE events_published_total counter",
+        f"events_published_total {broker.published}",
+        "# HELP events_subscribers Open /v1/events streams",
+        "# TYPE events_subscribers gauge",
+        f"events_subscribers {broker.subscribers}",
+        "# HELP events_dropped_subscribers_total Streams closed for falling behind",
+        "# TYPE events_dropped_subscribers_total counter",
+        f"events_dropped_subscribers_total {broker.dropped}",
+    ]
+
+
+metrics.register_collector(_render_metrics)
@@ -0,0 +1,78 @@
+# app/facets.py
+"""Grouped counts ("facets") for the current filter set of a list endpoint.
+
+All requested facets come back from one statement: a ``UNION ALL`` of one
+``GROUP BY`` per field plus a total, so a status board costs one round trip
+instead of paging through every row.
+"""
+from typing import Dict, List, Optional, Sequence
+
+from fastapi import HTTPException
+from sqlalchemy import String, cast, func, literal, null, select, union_all, and_
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+from sqlalchemy.sql import ColumnElement
+
+_TOTAL = "_total"
+
+
+def parse_facets(facets: str, allowed: Dict[str, ColumnElement]) -> List[str]:
+    """Split ``status,assignee`` and check every name against ``allowed``."""
+    fields = [f.strip() for f in facets.split(",") if f.strip()]
+    unknown = [f for f in fields if f not in allowed]
+    if unknown:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Unknown facet(s): {', '.join(unknown)}; allowed: {', '.join(allowed)}",
+        )
+    return list(dict.fromkeys(fields))
+
+
+def _from_text(column: ColumnElement, value: Optional[str]):
+    if value is None:
+        return None
+    python_type = column.type.python_type
+    if python_type is bool:
+        return value.lower() in ("1", "true")
+    if python_type is int:
+        return int(value)
+    return value
+
+
+def facet_counts(db: Session, source, allowed: Dict[str, ColumnElement],
+                 fields: Sequence[str], conds: Sequence[ColumnElement]) -> dict:
+    """``{"total": n, "facets": {field: [{"value": v, "count": n}, ...]}}``."""
+    return _collect(db.execute(_statement(source, allowed, fields, conds)), allowed, fields)
+
+
+async def afacet_counts(db: AsyncSession, source, allowed: Dict[str, ColumnElement],
+                        fields: Sequence[str], conds: Sequence[ColumnElement]) -> dict:
+    """``facet_counts`` on an AsyncSession (async handlers, ``DB_ASYNC=1``)."""
+    return _collect(await db.execute(_statement(source, allowed, fields, conds)), allowed, fields)
+
+
+def _statement(source, allowed: Dict[str, ColumnElement], fields: Sequence[str], conds: Sequence[ColumnElement]):
+    where = and_(*conds) if conds else None
+
+    def branch(label: str, column: Optional[ColumnElement]):
+        value = cast(column, String) if column is not None else null()
+        stmt = select(literal(label).label("facet"), value.label("value"), func.count().label("n"))
+        stmt = stmt.select_from(source)
+        if where is not None:
+            stmt = stmt.where(where)
+        return stmt.group_by(column) if column is not None else stmt
+
+    return union_all(branch(_TOTAL, None), *[branch(f, allowed[f]) for f in fields])
+
+
+def _collect(rows, allowed: Dict[str, ColumnElement], fields: Sequence[str]) -> dict:
+    out: Dict[str, List[dict]] = {f: [] for f in fields}
+    total = 0
+    for facet, value, n in rows:
+        if facet == _TOTAL:
+            total = n
+        else:
+            out[facet].append({"value": _from_text(allowed[facet], value), "count": n})
+    for values in out.values():
+        values.sort(key=lambda v: -v["count"])
+    return {"total": total, "facets": out}
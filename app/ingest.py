@@ -0,0 +1,491 @@
+# app/ingest.py
+"""Bulk CSV loader for the tracker tables and spec sheets under ``data/``.
+
+    python -m app.ingest                      # everything under ./data
+    python -m app.ingest --replace            # idempotent re-run
+    python -m app.ingest data/specs/codelist.csv data/specs/Analysis_Datasets/ADLB.csv
+
+Each file is streamed in ``--batch-size`` chunks and written with executemany
+inside one transaction per file, so memory stays constant however large the
+sheet is.
+
+* Tracker files with an ID column (deliverables, personnel, program QC) are
+  upserted on that ID and can be re-run safely.
+* QC comments and TOC rows have no ID column. With ``--replace`` they are
+  matched on a natural key (program, author and text; type and code) with
+  the rows the file owns (its program_qc_ids / TOC types): a match keeps its
+  id and is only updated when it changed, new rows are inserted and owned
+  rows the file no longer has are deleted. Re-runs neither duplicate rows
+  nor renumber them (which would churn ids, tombstones and sync clients).
+* Spec sheets are snapshots: the table is rebuilt from the sheet on every
+  load and ``spec_tables.last_loaded_utc`` is stamped, which also tells the
+  specs registry to re-reflect it.
+"""
+import argparse
+import codecs
+import csv
+import os
+import re
+import sys
+import time
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from sqlalchemy import (
+    Column, Index, Integer, MetaData, String, Table, Text, and_, bindparam, delete, exists, func, select, update,
+)
+from sqlalchemy.engine import Connection
+
+from .changes import bump_versions
+from .db import Base, create_tables, engine, upsert
+from . import rollup, tombstones
+from .search import ensure_indexes, index_spec_table
+from .spec_columns import ROW_ID, normalize_column
+from .models import Deliverable, Personnel, ProgramQC, QCComment, SpecDataset, SpecTable, TOCItem
+
+BATCH_SIZE = int(os.getenv("INGEST_BATCH_SIZE", "1000"))
+DATA_DIR = Path("data")
+SPECS_DIR = "specs"
+DATASETS_DIR = "Analysis_Datasets"
+# Lookup keys of the spec sheets, indexed whenever a sheet has all the columns
+SPEC_INDEXES = [
+    ("data_set", "variable"),       # dataset sheets
+    ("variable",),
+    ("codelist_name",),             # dataset sheets -> codelist
+    ("id", "term"),                 # codelist (ID is the codelist name)
+    ("data_set", "variable_parameter"),  # complex_algorithms
+    ("dataset_name",),              # metadata
+]
+
+
+# ---- CSV reading ----
+def detect_encoding(path: Path) -> str:
+    """utf-8 (BOM stripped) when the whole file decodes, else cp1252 (Excel export)."""
+    decoder = codecs.getincrementaldecoder("utf-8")()
+    with open(path, "rb") as fh:
+        try:
+            for block in iter(lambda: fh.read(1 << 16), b""):
+                decoder.decode(block)
+            decoder.decode(b"", final=True)
+        except UnicodeDecodeError:
+            return "cp1252"
+    return "utf-8-sig"
+
+
+def read_rows(path: Path) -> Iterator[Dict[str, Optional[str]]]:
+    """Yield rows keyed by normalized header; blank columns and rows are dropped."""
+    with open(path, newline="", encoding=detect_encoding(path)) as fh:
+        reader = csv.reader(fh)
+        header = next(reader, [])
+        columns = []
+        seen: Dict[str, int] = {}
+        for idx, name in enumerate(header):
+            norm = normalize_column(name)
+            if not norm:
+                continue  # empty trailing columns from Excel
+            seen[norm] = seen.get(norm, 0) + 1
+            if seen[norm] > 1:
+                norm = f"{norm}_{seen[norm]}"
+            columns.append((idx, norm))
+        for raw in reader:
+            row = {}
+            for idx, norm in columns:
+                value = raw[idx].strip() if idx < len(raw) else ""
+                row[norm] = value or None
+            if any(v is not None for v in row.values()):
+                yield row
+
+
+def batched(rows: Iterable[dict], size: int) -> Iterator[List[dict]]:
+    batch: List[dict] = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def _int(value: Optional[str]) -> Optional[int]:
+    return int(value) if value else None
+
+
+# ---- Tracker files ----
+@dataclass
+class TrackerFile:
+    model: type
+    mapper: Callable[[dict], Optional[dict]]
+    scope: Optional[str] = None  # column whose values the file owns (for --replace)
+    key: Tuple[str, ...] = ()    # natural key of the rows of a file without IDs (for --replace)
+
+
+def _deliverable(row: dict) -> Optional[dict]:
+    if not row.get("delierableid"):
+        return None
+    return {"id": int(row["delierableid"]), "name": row.get("output") or row.get("title1")}
+
+
+def _personnel(row: dict) -> Optional[dict]:
+    if not row.get("memberid"):
+        return None
+    member_id = int(row["memberid"])
+    return {
+        "id": member_id,
+        "member_id": member_id,
+        "preferred_name": row.get("preferred_name"),
+        "full_name": row.get("full_name"),
+        "status": row.get("status"),
+    }
+
+
+def _program_qc(row: dict) -> Optional[dict]:
+    if not row.get("progid"):
+        return None
+    if row.get("qc_completion_date"):
+        status = "Complete"
+    elif row.get("program_ready_date"):
+        status = "Ready for QC"
+    else:
+        status = "Planned"
+    return {
+        "id": int(row["progid"]),
+        "deliverable_id": _int(row.get("deliverableid")),
+        "program_name": row.get("program_name") or row.get("output_file_name"),
+        "assignee": row.get("prod_programmer"),
+        "reviewer": row.get("qc_programmer"),
+        "status": status,
+    }
+
+
+def _qc_comment(row: dict) -> Optional[dict]:
+    if not row.get("progid") or not row.get("comment"):
+        return None
+    return {
+        "program_qc_id": int(row["progid"]),
+        "author": row.get("commenter") or "",
+        "comment_text": row["comment"].strip('"'),
+        "resolved": (row.get("status") or "").lower() == "resolved",
+    }
+
+
+TOC_PREFIXES = {"T": "table", "F": "figure", "L": "listing"}
+
+
+def _toc(kind: Optional[str]) -> Callable[[dict], Optional[dict]]:
+    def mapper(row: dict) -> Optional[dict]:
+        shell = row.get("shell_template") or ""
+        item_type = kind or TOC_PREFIXES.get(shell[:1].upper())
+        code = row.get("output_file_name_from_programming") or shell
+        if not item_type or not code:
+            return None
+        return {"type": item_type, "code": code, "title": row.get("title")}
+    return mapper
+
+
+COMMENT_KEY = ("program_qc_id", "author", "comment_text")
+TOC_KEY = ("type", "code")
+
+# Load order matters for the foreign keys.
+TRACKER_FILES: Dict[str, TrackerFile] = {
+    "Deliverables.csv": TrackerFile(Deliverable, _deliverable),
+    "Personnel.csv": TrackerFile(Personnel, _personnel),
+    "ProgramQC.csv": TrackerFile(ProgramQC, _program_qc),
+    "QCComments.csv": TrackerFile(QCComment, _qc_comment, scope="program_qc_id", key=COMMENT_KEY),
+    "TOC_Tables.csv": TrackerFile(TOCItem, _toc("table"), scope="type", key=TOC_KEY),
+    "TOC_Figures.csv": TrackerFile(TOCItem, _toc("figure"), scope="type", key=TOC_KEY),
+    "TOC_Listings.csv": TrackerFile(TOCItem, _toc("listing"), scope="type", key=TOC_KEY),
+    # Combined export of the three files above; load explicitly, not by default.
+    "TOC.csv": TrackerFile(TOCItem, _toc(None), scope="type", key=TOC_KEY),
+}
+DEFAULT_TRACKER_FILES = [name for name in TRACKER_FILES if name != "TOC.csv"]
+
+
+def load_tracker_file(conn: Connection, path: Path, spec: TrackerFile,
+                      replace: bool = False, batch_size: int = BATCH_SIZE) -> int:
+    table = spec.model.__table__
+
+    def mapped() -> Iterator[dict]:
+        return (r for r in map(spec.mapper, read_rows(path)) if r is not None)
+
+    if replace and spec.scope:
+        return _merge(conn, table, spec, mapped, batch_size)
+
+    pk = [c.name for c in table.primary_key.columns]
+    count = 0
+    stmt = None
+    for batch in batched(mapped(), batch_size):
+        if stmt is None:
+            if all(name in batch[0] for name in pk):
+                update_cols = [k for k in batch[0] if k not in pk]
+                stmt = upsert(table, conn.dialect.name, update_cols)
+            else:
+                stmt = table.insert()
+        conn.execute(stmt, batch)
+        count += len(batch)
+    return count
+
+
+def _merge(conn: Connection, table: Table, spec: TrackerFile,
+           mapped: Callable[[], Iterator[dict]], batch_size: int) -> int:
+    """``--replace`` for a file without IDs: match its rows on ``spec.key``
+    with the rows of the scope values it owns, update the matches that
+    changed, insert the rest and delete the owned rows left unmatched.
+
+    The matching runs in the database, through temporary tables, so memory
+    stays at one batch however many rows the file or the scope holds:
+
+    * ``stage``: the file's rows, numbered in file order (``seq``);
+    * ``owned``: ids of the existing rows whose scope value is in the file;
+    * ``matched``: the n-th owned row (by id) with a key paired with the n-th
+      file row with that key, so duplicates keep pairing up the same way.
+
+    MySQL cannot open a temporary table twice in one statement, hence three
+    of them rather than self-joins.
+    """
+    first = next(mapped(), None)
+    if first is None:
+        return 0
+    columns = list(first)
+    changing = [c for c in columns if c not in spec.key]
+    meta = MetaData()
+    stage = Table(f"_merge_stage_{table.name}", meta,
+                  Column("seq", Integer, primary_key=True, autoincrement=False),
+                  *[Column(c, table.c[c].type) for c in columns], prefixes=["TEMPORARY"])
+    owned = Table(f"_merge_owned_{table.name}", meta,
+                  Column("row_id", Integer, primary_key=True, autoincrement=False), prefixes=["TEMPORARY"])
+    matched = Table(f"_merge_matched_{table.name}", meta,
+                    Column("seq", Integer, primary_key=True, autoincrement=False),
+                    Column("row_id", Integer, nullable=False, index=True), prefixes=["TEMPORARY"])
+    meta.create_all(conn)
+    try:
+        count = 0
+        for batch in batched(mapped(), batch_size):
+            conn.execute(stage.insert(), [{"seq": count + i, **row} for i, row in enumerate(batch)])
+            count += len(batch)
+
+        scopes = select(stage.c[spec.scope]).distinct()
+        conn.execute(owned.insert().from_select(["row_id"], select(table.c.id).where(table.c[spec.scope].in_(scopes))))
+
+        def ranked(source, ident):
+            rank = func.row_number().over(partition_by=[source.c[k] for k in spec.key], order_by=ident)
+            return select(ident.label("ident"), rank.label("rank"), *[source.c[k] for k in spec.key])
+
+        new = ranked(stage, stage.c.seq).subquery()
+        old = ranked(table, table.c.id).join(owned, owned.c.row_id == table.c.id).subquery()
+        pairs = select(new.c.ident, old.c.ident).join(old, and_(
+            new.c.rank == old.c.rank, *[new.c[k].is_not_distinct_from(old.c[k]) for k in spec.key]
+        ))
+        conn.execute(matched.insert().from_select(["seq", "row_id"], pairs))
+
+        insert_stmt = table.insert()
+        update_stmt = (
+            update(table)
+            .where(table.c.id == bindparam("row_id"))
+            .values({c: bindparam(f"new_{c}") for c in changing})
+        )
+        walk = (
+            select(*[stage.c[c] for c in columns], matched.c.row_id,
+                   *[table.c[c].label(f"old_{c}") for c in changing])
+            .outerjoin(matched, matched.c.seq == stage.c.seq)
+            .outerjoin(table, table.c.id == matched.c.row_id)
+        )
+        for start in range(0, count, batch_size):
+            inserts, updates = [], []
+            page = walk.where(stage.c.seq >= start, stage.c.seq < start + batch_size).order_by(stage.c.seq)
+            for row in conn.execute(page).mappings().all():
+                values = {c: row[c] for c in columns}
+                if row["row_id"] is None:
+                    inserts.append(values)
+                elif any(values[c] != row[f"old_{c}"] for c in changing):
+                    updates.append({"row_id": row["row_id"], **{f"new_{c}": values[c] for c in changing}})
+            if inserts:
+                conn.execute(insert_stmt, inserts)
+            if updates:
+                conn.execute(update_stmt, updates)
+
+        unmatched = (
+            select(owned.c.row_id)
+            .where(~exists().where(matched.c.row_id == owned.c.row_id))
+            .order_by(owned.c.row_id)
+            .limit(batch_size)
+        )
+        last = None
+        while True:
+            stmt = unmatched if last is None else unmatched.where(owned.c.row_id > last)
+            gone = conn.execute(stmt).scalars().all()
+            if not gone:
+                break
+            tombstones.record(conn, table.name, gone)
+            conn.execute(delete(table).where(table.c.id.in_(gone)))
+            last = gone[-1]
+    finally:
+        meta.drop_all(conn)
+    return count
+
+
+# ---- Spec sheets ----
+_INTEGER = re.compile(r"-?[0-9]+")  # ASCII only: str.isdigit() also accepts '²', which int() rejects
+
+
+class _ColumnStats:
+    __slots__ = ("max_len", "is_int", "seen")
+
+    def __init__(self):
+        self.max_len = 0
+        self.is_int = True
+        self.seen = False
+
+    def add(self, value: Optional[str]):
+        if value is None:
+            return
+        self.seen = True
+        self.max_len = max(self.max_len, len(value))
+        if self.is_int and not (_INTEGER.fullmatch(value) and str(int(value)) == value):
+            self.is_int = False
+
+    def column(self, name: str) -> Column:
+        if self.seen and self.is_int:
+            return Column(name, Integer)
+        if self.max_len <= 255:
+            return Column(name, String(255))
+        return Column(name, Text)
+
+
+def _spec_table(conn: Connection, path: Path) -> Table:
+    """Target table for a sheet: the ORM table if mapped, else rebuilt from the CSV."""
+    name = path.stem
+    mapped = Base.metadata.tables.get(name)
+    if mapped is not None:
+        mapped.create(conn, checkfirst=True)
+        conn.execute(delete(mapped))
+        return mapped
+
+    stats: Dict[str, _ColumnStats] = {}
+    for row in read_rows(path):
+        for key, value in row.items():
+            stats.setdefault(key, _ColumnStats()).add(value)
+    table = Table(
+        name, MetaData(),
+        Column(ROW_ID, Integer, primary_key=True, autoincrement=True),
+        *[s.column(k) for k, s in stats.items()],
+    )
+    table.drop(conn, checkfirst=True)
+    table.create(conn)
+    return table
+
+
+def index_spec_keys(conn: Connection, table: Table) -> None:
+    """Index the lookup keys (``SPEC_INDEXES``) that the sheet has."""
+    for cols in SPEC_INDEXES:
+        columns = [table.c.get(c) for c in cols]
+        if any(c is None or isinstance(c.type, Text) for c in columns):
+            continue
+        Index(f"ix_{table.name}_{'_'.join(cols)}", *columns).create(conn, checkfirst=True)
+
+
+def _conform(table: Table, rows: Iterable[dict]) -> Iterator[dict]:
+    """Drop sheet columns the table lacks; NOT NULL text columns get '' for blanks."""
+    names = [c.name for c in table.columns if c.name != ROW_ID]
+    required = {c.name for c in table.columns if not c.nullable and c.name != ROW_ID}
+    for row in rows:
+        yield {
+            n: ("" if row.get(n) is None and n in required else row.get(n))
+            for n in names
+        }
+
+
+def _dataset_label(conn: Connection, name: str) -> Optional[str]:
+    meta = Base.metadata.tables["metadata"]
+    return conn.execute(
+        select(meta.c.data_set_label).where(meta.c.dataset_name == name)
+    ).scalar()
+
+
+def load_spec_file(conn: Connection, path: Path, kind: str, data_root: Path,
+                   batch_size: int = BATCH_SIZE) -> int:
+    table = _spec_table(conn, path)
+    stmt = table.insert()  # the table was just emptied, no conflicts to resolve
+    count = 0
+    for batch in batched(_conform(table, read_rows(path)), batch_size):
+        conn.execute(stmt, batch)
+        count += len(batch)
+    index_spec_keys(conn, table)
+    index_spec_table(conn, table)
+
+    try:
+        source_path = path.resolve().relative_to(data_root.resolve().parent).as_posix()
+    except ValueError:
+        source_path = path.as_posix()
+    stamp = datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%S.%f")
+    conn.execute(upsert(SpecTable.__table__, conn.dialect.name), [{
+        "table_name": table.name,
+        "kind": kind,
+        "source_path": source_path,
+        "last_loaded_utc": stamp,
+    }])
+    if kind == "dataset":
+        label = _dataset_label(conn, table.name)
+        conn.execute(
+            upsert(SpecDataset.__table__, conn.dialect.name, ["display_label"] if label else []),
+            [{"dataset_name": table.name, "display_label": label or table.name}],
+        )
+    return count
+
+
+# ---- Driver ----
+def discover(data_dir: Path) -> List[Path]:
+    """Default load set, in dependency order (metadata before the datasets)."""
+    paths = [data_dir / name for name in DEFAULT_TRACKER_FILES if (data_dir / name).exists()]
+    specs = sorted((data_dir / SPECS_DIR).glob("*.csv"), key=lambda p: (p.stem != "metadata", p.name))
+    paths.extend(specs)
+    paths.extend(sorted((data_dir / SPECS_DIR / DATASETS_DIR).glob("*.csv")))
+    return paths
+
+
+def load_file(path: Path, data_dir: Path = DATA_DIR, replace: bool = False,
+              batch_size: int = BATCH_SIZE) -> int:
+    """Load one CSV in its own transaction and return the number of rows written."""
+    spec = TRACKER_FILES.get(path.name)
+    if spec is None or path.parent.name == DATASETS_DIR:
+        kind = "dataset" if path.parent.name == DATASETS_DIR else "cross_dataset"
+        with engine.begin() as conn:
+            return load_spec_file(conn, path, kind, data_dir, batch_size)
+    with engine.begin() as conn:
+        count = load_tracker_file(conn, path, spec, replace, batch_size)
+        if rollup.maintains(spec.model):  # bulk Core writes bypass the delta hooks
+            rollup.rebuild(conn)
+    # Core writes bypass the Session hooks. As theirs, the bump follows the
+    # commit, so the version row is not locked for the whole load.
+    with engine.begin() as conn:
+        bump_versions(conn, [spec.model.__tablename__])
+    return count
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m app.ingest", description=__doc__.splitlines()[0])
+    parser.add_argument("paths", nargs="*", type=Path, help="CSV files to load (default: everything under --data-dir)")
+    parser.add_argument("--data-dir", type=Path, default=DATA_DIR)
+    parser.add_argument("--replace", action="store_true",
+                        help="Make files without IDs (QC comments, TOC) the source of truth for the rows they own")
+    parser.add_argument("--batch-size", type=int, default=BATCH_SIZE)
+    args = parser.parse_args(argv)
+
+    create_tables()
+    ensure_indexes(engine)
+    paths = args.paths or discover(args.data_dir)
+    started = time.perf_counter()
+    total = 0
+    for path in paths:
+        t0 = time.perf_counter()
+        count = load_file(path, args.data_dir, args.replace, args.batch_size)
+        total += count
+        print(f"{path}: {count} rows in {time.perf_counter() - t0:.2f}s")
+    print(f"Loaded {total} rows from {len(paths)} files in {time.perf_counter() - started:.2f}s")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
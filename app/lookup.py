@@ -0,0 +1,109 @@
+# app/lookup.py
+"""Fetch-by-ids for the list endpoints: ``GET /v1/<entity>?ids=3,1,2`` and,
+for lists too long for a URL, ``POST /v1/<entity>:lookup`` with
+``{"ids": [...]}``.
+
+Instead of one ``GET /v1/<entity>/{id}`` (request, session, ``db.get``) per
+id, the ids are fetched with ``WHERE id IN (...)``, ``CHUNK_SIZE`` ids per
+statement to stay under the backends' bound-parameter limits. Rows come
+back in request order (duplicates dropped). Ids with no row are reported:
+in the ``X-Missing-Ids`` header for the GET form, in ``missing`` for the
+POST form. The endpoint's other filters still apply, so an id they exclude
+is reported as missing too; ``limit``/``offset``/``cursor`` do not.
+
+``LOOKUP_MAX_IDS`` bounds the ids per request: 400 beyond it for the GET
+form, 422 from ``LookupIn`` validation for the POST form.
+"""
+import os
+import re
+from typing import Iterable, Iterator, List, Optional, Tuple
+
+from fastapi import HTTPException, Response
+from sqlalchemy import Select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+from sqlalchemy.sql import ColumnElement
+
+from .responses import FastJSONResponse
+
+MAX_IDS = int(os.getenv("LOOKUP_MAX_IDS", "1000"))
+CHUNK_SIZE = 500
+MISSING_HEADER = "X-Missing-Ids"
+ID_MIN, ID_MAX = -2 ** 63, 2 ** 63 - 1  # signed 64-bit; larger values overflow the drivers
+_ID = re.compile(r"-?[0-9]+")  # ASCII only: str.isdigit() also accepts '²', which int() rejects
+IDS_DESCRIPTION = (
+    f"Comma-separated ids (at most {MAX_IDS}): returns those rows in this order, "
+    f"ids not found in {MISSING_HEADER}; paging parameters are ignored"
+)
+
+
+def check_ids(ids: Iterable[int]) -> List[int]:
+    """``ids`` without duplicates, in order; 400 when there are too many,
+    or ids no backend column can hold."""
+    ids = list(dict.fromkeys(ids))
+    if len(ids) > MAX_IDS:
+        raise HTTPException(status_code=400, detail=f"Too many ids: {len(ids)} (at most {MAX_IDS})")
+    bad = [str(i) for i in ids if not ID_MIN <= i <= ID_MAX]
+    if bad:
+        raise HTTPException(status_code=400, detail=f"Invalid id(s): {', '.join(bad[:10])}")
+    return ids
+
+
+def parse_ids(value: Optional[str]) -> Optional[List[int]]:
+    """``3,1,2`` -> ``[3, 1, 2]``; None when ``ids=`` is not given."""
+    if value is None:
+        return None
+    parts = [p.strip() for p in value.split(",") if p.strip()]
+    bad = [p for p in parts if not _ID.fullmatch(p)]
+    if bad:
+        raise HTTPException(status_code=400, detail=f"Invalid id(s): {', '.join(bad[:10])}")
+    return check_ids(int(p) for p in parts)
+
+
+def fetch(db: Session, stmt: Select, id_column: ColumnElement, ids: List[int],
+          *, mappings: bool = False) -> Tuple[list, List[int]]:
+    """Run ``stmt`` for the rows ``ids``; returns (rows in ``ids`` order, missing ids).
+
+    Rows are shaped as by ``paginate``: the first selected entity, or with
+    ``mappings=True`` a dict of every selected column.
+    """
+    found = {}
+    for chunk in _chunks(stmt, id_column, ids):
+        for row in db.execute(chunk):
+            found[row[-1]] = row
+    return _in_order(found, ids, mappings)
+
+
+async def afetch(db: AsyncSession, stmt: Select, id_column: ColumnElement, ids: List[int],
+                 *, mappings: bool = False) -> Tuple[list, List[int]]:
+    """``fetch`` on an AsyncSession (async handlers, ``DB_ASYNC=1``)."""
+    found = {}
+    for chunk in _chunks(stmt, id_column, ids):
+        for row in await db.execute(chunk):
+            found[row[-1]] = row
+    return _in_order(found, ids, mappings)
+
+
+def _chunks(stmt: Select, id_column: ColumnElement, ids: List[int]) -> Iterator[Select]:
+    stmt = stmt.add_columns(id_column.label("lookup_id"))
+    for start in range(0, len(ids), CHUNK_SIZE):
+        yield stmt.where(id_column.in_(ids[start:start + CHUNK_SIZE]))
+
+
+def _in_order(found: dict, ids: List[int], mappings: bool) -> Tuple[list, List[int]]:
+    rows = [found[i] for i in ids if i in found]
+    missing = [i for i in ids if i not in found]
+    if mappings:
+        names = list(rows[0]._fields[:-1]) if rows else []
+        return [dict(zip(names, row)) for row in rows], missing
+    return [row[0] for row in rows], missing
+
+
+def report_missing(response: Response, missing: List[int]) -> None:
+    if missing:
+        response.headers[MISSING_HEADER] = ",".join(map(str, missing))
+
+
+def lookup_response(items: list, missing: List[int]) -> FastJSONResponse:
+    """Body of the ``:lookup`` endpoints."""
+    return FastJSONResponse({"items": items, "missing": missing})
@@ -1,21 +1,59 @@
 # app/main.py
+import logging
+import os
 
+from anyio import to_thread
 from fastapi import FastAPI, Depends
+from fastapi.responses import PlainTextResponse, Response
 from fastapi.middleware.cors import CORSMiddleware
 from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
-from .db import create_tables, get_db
-from .routers import deliverables, program_qc, qc_comments, personnel, specs
-from .routers.toc import tables as toc_tables, figures as toc_figures, listings as toc_listings
+from .db import DB_ASYNC, async_engine, create_tables, engine, get_async_db, get_db
+from . import changes, engine_profile, events, metrics, profiling, replica, rollup, suggest, toc, tombstones  # noqa: F401  (changes/events/rollup/suggest/tombstones register session hooks)
+from .conditional import NotModified
+from .lookup import MISSING_HEADER
+from .pagination import NEXT_CURSOR_HEADER
+from .responses import FastJSONResponse
+from .search import ensure_indexes
+from .routers import deliverables, program_qc, qc_comments, personnel, specs, search, sync
+from .routers import events as events_router
+from .routers.toc import items as toc_items, tables as toc_tables, figures as toc_figures, listings as toc_listings
 
-app = FastAPI(title="Biometrics Tracker API", version="1.0.0")
+app = FastAPI(title="Biometrics Tracker API", version="1.0.0", default_response_class=FastJSONResponse)
+# uvicorn's default log config only gives its own loggers a handler; INFO
+# records on an app.* logger would be dropped
+startup_log = logging.getLogger("uvicorn.error")
+
+# Sync handlers run in Starlette's threadpool; with DB_ASYNC=1 the routers'
+# async handlers run on the event loop instead (see app/db.py, .env.example)
+THREADPOOL_SIZE = int(os.getenv("THREADPOOL_SIZE", "40"))
 
 
 # Run table creation on startup
 @app.on_event("startup")
 def on_startup():
+    to_thread.current_default_thread_limiter().total_tokens = THREADPOOL_SIZE
     create_tables()
+    ensure_indexes(engine)
+    rollup.ensure(engine)
+    with engine.begin() as conn:
+        tombstones.prune(conn)
+        toc.backfill(conn)
+    suggest.build(engine)
+    startup_log.info("Database engine: %s", engine_profile.describe(engine))
+    if replica.ENABLED:
+        startup_log.info("Read replica: %s (max lag %ss, pin %ss)", engine_profile.describe(replica.read_engine),
+                 replica.MAX_LAG, replica.READ_PIN_SECONDS)
+    if DB_ASYNC:
+        startup_log.info("Async handlers: %s", engine_profile.describe(async_engine))
+
+
+@app.on_event("shutdown")
+async def on_shutdown():
+    if async_engine is not None:
+        await async_engine.dispose()
 
 
 # Enable CORS (loose for dev; restrict origins for prod)
@@ -25,7 +63,21 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=[NEXT_CURSOR_HEADER, MISSING_HEADER, "ETag", "Last-Modified", "Server-Timing", "X-Query-Count"],
 )
+# Read-your-writes: pin a client to the primary for a moment after it writes
+if replica.ENABLED:
+    app.add_middleware(replica.PinMiddleware)
+# SQL count/time headers and ?_profile=1 (see app/profiling.py)
+app.add_middleware(profiling.ProfilingMiddleware)
+# Outermost, so it times the whole request including CORS handling
+app.add_middleware(metrics.MetricsMiddleware)
+
+
+# Conditional GET: the client's copy is current
+@app.exception_handler(NotModified)
+def not_modified(request, exc: NotModified):
+    return Response(status_code=304, headers=exc.headers)
 
 
 # Health check
@@ -34,19 +86,48 @@ def healthz():
     return {"ok": True}
 
 
+# Prometheus scrape endpoint
+@app.get("/v1/metrics", response_class=PlainTextResponse, include_in_schema=False)
+def prometheus_metrics():
+    return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4")
+
+
 # DB ping
-@app.get("/v1/db/ping")
-def db_ping(db: Session = Depends(get_db)):
-    db.execute(text("SELECT 1"))
-    return {"db": "ok"}
-
-
-# Routers
-app.include_router(deliverables.router, prefix="/v1", tags=["deliverables"])
-app.include_router(program_qc.router, prefix="/v1", tags=["program_qc"])
-app.include_router(qc_comments.router, prefix="/v1", tags=["qc_comments"])
-app.include_router(personnel.router, prefix="/v1", tags=["personnel"])
-app.include_router(specs.router, prefix="/v1", tags=["specs"])
-app.include_router(toc_tables.router, prefix="/v1", tags=["toc"])
-app.include_router(toc_figures.router, prefix="/v1", tags=["toc"])
-app.include_router(toc_listings.router, prefix="/v1", tags=["toc"])
+if DB_ASYNC:
+    @app.get("/v1/db/ping")
+    async def db_ping(db: AsyncSession = Depends(get_async_db)):
+        await db.execute(text("SELECT 1"))
+        return {"db": "ok"}
+else:
+    @app.get("/v1/db/ping")
+    def db_ping(db: Session = Depends(get_db)):
+        db.execute(text("SELECT 1"))
+        return {"db": "ok"}
+
+
+# Routers: each module has ``router`` (sync handlers) and ``async_router``
+# (the same routes as async handlers, served with DB_ASYNC=1)
+ROUTERS = [
+    (deliverables, "deliverables"),
+    (program_qc, "program_qc"),
+    (qc_comments, "qc_comments"),
+    (personnel, "personnel"),
+    (specs, "specs"),
+    (search, "search"),
+    (sync, "sync"),
+    (events_router, "events"),
+    (toc_items, "toc"),
+    (toc_tables, "toc"),
+    (toc_figures, "toc"),
+    (toc_listings, "toc"),
+]
+
+
+def include(module, **kwargs):
+    router = module.async_router if DB_ASYNC else module.router
+    router = profiling.profile_endpoints(router)  # sync handlers run in the threadpool
+    app.include_router(router, prefix="/v1", **kwargs)
+
+
+for module, tag in ROUTERS:
+    include(module, tags=[tag])
@@ -0,0 +1,210 @@
+# app/metrics.py
+"""In-process Prometheus metrics, exposed at ``/v1/metrics``.
+
+Everything is plain counters in preallocated lists so it is cheap enough to
+leave on in production:
+
+* ``http_request_duration_seconds``  histogram by method, route template, status
+* ``http_requests_in_flight``        gauge
+* ``db_statement_duration_seconds``  histogram of SQL statements by route
+* ``db_pool_checkout_seconds``       histogram of time spent getting a pooled connection
+* ``db_pool_checked_out`` / ``db_pool_overflow`` / ``db_pool_size``  gauges read at scrape time
+
+Request and SQL timings are joined through a context variable holding the
+current ASGI scope, which FastAPI fills with the matched route.
+"""
+import threading
+from bisect import bisect_left
+from contextvars import ContextVar
+from time import perf_counter
+from typing import Callable, Dict, List, Optional, Tuple
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
+
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+SQL_BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 1.0)
+UNMATCHED = "unmatched"
+OUTSIDE_REQUEST = "none"
+
+_scope: ContextVar[Optional[dict]] = ContextVar("metrics_scope", default=None)
+
+
+class Histogram:
+    """Cumulative-bucket histogram keyed by a tuple of label values."""
+
+    def __init__(self, name: str, help_text: str, labels: Tuple[str, ...], buckets: Tuple[float, ...]):
+        self.name = name
+        self.help = help_text
+        self.labels = labels
+        self.buckets = buckets
+        self._series: Dict[Tuple[str, ...], List[float]] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, *label_values: str) -> None:
+        bucket = bisect_left(self.buckets, value)
+        # Threadpool workers observe concurrently, and ``+=`` on a list item is
+        # not atomic: unlocked, increments are lost and sum drifts from count.
+        with self._lock:
+            series = self._series.get(label_values)
+            if series is None:
+                # [bucket counts..., +Inf count, sum]
+                series = self._series[label_values] = [0] * (len(self.buckets) + 1) + [0.0]
+            series[bucket] += 1
+            series[-1] += value
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        with self._lock:  # a consistent snapshot: buckets, sum and count from the same moment
+            snapshot = sorted((label_values, list(series)) for label_values, series in self._series.items())
+        for label_values, series in snapshot:
+            base = ",".join(f'{k}="{_escape(v)}"' for k, v in zip(self.labels, label_values))
+            sep = "," if base else ""
+            running = 0
+            for bound, count in zip(self.buckets, series):
+                running += count
+                lines.append(f'{self.name}_bucket{{{base}{sep}le="{bound}"}} {running}')
+            running += series[len(self.buckets)]
+            lines.append(f'{self.name}_bucket{{{base}{sep}le="+Inf"}} {running}')
+            lines.append(f"{self.name}_sum{{{base}}} {series[-1]}")
+            lines.append(f"{self.name}_count{{{base}}} {running}")
+        return lines
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+REQUEST_LATENCY = Histogram(
+    "http_request_duration_seconds", "HTTP request latency", ("method", "route", "status"), LATENCY_BUCKETS
+)
+SQL_LATENCY = Histogram(
+    "db_statement_duration_seconds", "SQL statement execution time", ("route",), SQL_BUCKETS
+)
+POOL_CHECKOUT = Histogram(
+    "db_pool_checkout_seconds", "Time spent waiting for a pooled connection", ("engine",), SQL_BUCKETS
+)
+_in_flight = [0]
+_engines: Dict[str, Engine] = {}
+# Extra exposition from other modules (e.g. the response cache)
+_collectors: List[Callable[[], List[str]]] = []
+
+
+def route_of(scope: Optional[dict]) -> str:
+    if scope is None:
+        return OUTSIDE_REQUEST
+    route = scope.get("route")
+    return route.path if route is not None else UNMATCHED
+
+
+# ---- HTTP ----
+class MetricsMiddleware:
+    """Pure ASGI middleware: times every HTTP request by its route template."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        status = [500]
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                status[0] = message["status"]
+            await send(message)
+
+        token = _scope.set(scope)
+        _in_flight[0] += 1
+        start = perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            _in_flight[0] -= 1
+            REQUEST_LATENCY.observe(perf_counter() - start, scope["method"], route_of(scope), str(status[0]))
+            _scope.reset(token)
+
+
+# ---- SQLAlchemy ----
+class _MeteredPool:
+    """Times ``Pool.connect()``: queueing for a free slot plus any new connect."""
+
+    metrics_name = "primary"
+
+    def connect(self):
+        start = perf_counter()
+        try:
+            return super().connect()
+        finally:
+            POOL_CHECKOUT.observe(perf_counter() - start, self.metrics_name)
+
+
+class MeteredQueuePool(_MeteredPool, QueuePool):
+    pass
+
+
+class MeteredAsyncAdaptedQueuePool(_MeteredPool, AsyncAdaptedQueuePool):
+    pass
+
+
+def metered_poolclass(engine_url, name: str = "primary"):
+    """Pool class to pass to create_engine, or None to keep the dialect default."""
+    if engine_url.get_backend_name() == "sqlite" and engine_url.database in (None, "", ":memory:"):
+        return None  # in-memory SQLite needs its single-connection pool
+    is_async = engine_url.get_dialect().is_async
+    base = MeteredAsyncAdaptedQueuePool if is_async else MeteredQueuePool
+    return type(f"{base.__name__}_{name}", (base,), {"metrics_name": name})
+
+
+def _before_execute(conn, cursor, statement, parameters, context, executemany):
+    context._metrics_start = perf_counter()
+
+
+def _after_execute(conn, cursor, statement, parameters, context, executemany):
+    SQL_LATENCY.observe(perf_counter() - context._metrics_start, route_of(_scope.get()))
+
+
+def instrument_engine(engine: Engine, name: str = "primary") -> None:
+    """Count and time every statement run on ``engine``; report its pool at scrape."""
+    sync_engine = getattr(engine, "sync_engine", engine)
+    event.listen(sync_engine, "before_cursor_execute", _before_execute)
+    event.listen(sync_engine, "after_cursor_execute", _after_execute)
+    _engines[name] = sync_engine
+
+
+# ---- exposition ----
+def register_collector(collector: Callable[[], List[str]]) -> None:
+    """Add ``collector()``'s exposition lines to every scrape."""
+    _collectors.append(collector)
+
+
+def _pool_gauges() -> List[str]:
+    lines = []
+    for metric, help_text, attr in (
+        ("db_pool_size", "Configured pool size", "size"),
+        ("db_pool_checked_out", "Connections currently checked out", "checkedout"),
+        ("db_pool_overflow", "Connections open beyond pool_size", "overflow"),
+    ):
+        lines += [f"# HELP {metric} {help_text}", f"# TYPE {metric} gauge"]
+        for name, engine in sorted(_engines.items()):
+            getter = getattr(engine.pool, attr, None)
+            if getter is not None:
+                # QueuePool.overflow() counts up from -pool_size
+                lines.append(f'{metric}{{engine="{name}"}} {max(getter(), 0)}')
+    return lines
+
+
+def render() -> str:
+    lines = [
+        "# HELP http_requests_in_flight HTTP requests currently being served",
+        "# TYPE http_requests_in_flight gauge",
+        f"http_requests_in_flight {_in_flight[0]}",
+    ]
+    for hist in (REQUEST_LATENCY, SQL_LATENCY, POOL_CHECKOUT):
+        lines += hist.render()
+    lines += _pool_gauges()
+    for collector in _collectors:
+        lines += collector()
+    return "\n".join(lines) + "\n"
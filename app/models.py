@@ -17,7 +17,7 @@ class Deliverable(Base):
 from __future__ import annotations
 
 from datetime import datetime
-from typing import Optional
+from typing import List, Optional
 
 from sqlalchemy import (
     Integer,
@@ -26,9 +26,10 @@ from sqlalchemy import (
     DateTime,
     Boolean,
     Text,
+    Index,
     func,
 )
-from sqlalchemy.orm import Mapped, mapped_column
+from sqlalchemy.orm import Mapped, mapped_column, relationship
 from sqlalchemy import Integer, String, Text, Date, ForeignKey
 from .db import Base
 
@@ -40,6 +41,11 @@ class Deliverable(Base):
     id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
     name: Mapped[str] = mapped_column(String(255), nullable=False)
     status: Mapped[Optional[str]] = mapped_column(String(50), nullable=True)
+    # default as well as server_default: create_tables() adds this column to
+    # existing tables without a DDL default
+    updated_at: Mapped[Optional[datetime]] = mapped_column(
+        DateTime(timezone=True), server_default=func.now(), default=func.now(), onupdate=func.now(), index=True
+    )
 
 
 # ---- Program QC ----
@@ -59,7 +65,13 @@ class ProgramQC(Base):
         DateTime(timezone=True), server_default=func.now(), nullable=False
     )
     updated_at: Mapped[Optional[datetime]] = mapped_column(
-        DateTime(timezone=True), server_default=func.now(), onupdate=func.now()
+        DateTime(timezone=True), server_default=func.now(), onupdate=func.now(), index=True
+    )
+
+    # Read-only, loaded on request (include=) with selectinload; never lazily.
+    deliverable: Mapped[Optional["Deliverable"]] = relationship(viewonly=True, lazy="raise")
+    comments: Mapped[List["QCComment"]] = relationship(
+        viewonly=True, lazy="raise", order_by="QCComment.created_at"
     )
 
 
@@ -69,7 +81,7 @@ class QCComment(Base):
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
     program_qc_id: Mapped[int] = mapped_column(
-        ForeignKey("program_qc.id"), nullable=False
+        ForeignKey("program_qc.id"), nullable=False, index=True
     )
     author: Mapped[str] = mapped_column(String(100), nullable=False)
     comment_text: Mapped[str] = mapped_column(Text, nullable=False)
@@ -81,7 +93,7 @@ class QCComment(Base):
         DateTime(timezone=True), server_default=func.now(), nullable=False
     )
     updated_at: Mapped[Optional[datetime]] = mapped_column(
-        DateTime(timezone=True), server_default=func.now(), onupdate=func.now()
+        DateTime(timezone=True), server_default=func.now(), onupdate=func.now(), index=True
     )
     
 # --- Personnel ---
@@ -93,6 +105,11 @@ class Personnel(Base):
     preferred_name: Mapped[Optional[str]] = mapped_column(String, index=True)
     full_name: Mapped[Optional[str]] = mapped_column(String, index=True)
     status: Mapped[Optional[str]] = mapped_column(String, index=True)
+    # default as well as server_default: create_tables() adds this column to
+    # existing tables without a DDL default
+    updated_at: Mapped[Optional[datetime]] = mapped_column(
+        DateTime(timezone=True), server_default=func.now(), default=func.now(), onupdate=func.now(), index=True
+    )
 
 # --- Specifications ---
 class SpecTable(Base):
@@ -119,8 +136,33 @@ class Metadata(Base):
     xl_comments: Mapped[str] = mapped_column(String(255))
 
 # ---- TOC Items (shared model for tables/figures/listings) ----
+TOC_TYPE_RANKS = {"table": "1", "figure": "2", "listing": "3"}
+TOC_OTHER_RANK = "9"
+# priority is a signed 32-bit INTEGER: offset into 0..2**32-1, written as 10 digits
+TOC_PRIORITY_OFFSET = 2 ** 31
+TOC_PRIORITY_MAX = 2 ** 32 - 1
+TOC_NO_PRIORITY = 9_999_999_999  # sorts after every priority
+
+
+def toc_sort_key(type_: Optional[str], priority: Optional[int], code: Optional[str]) -> str:
+    """TOC order (type, priority NULLs last, code) as one string, so that a
+    plain ascending index serves it on every backend."""
+    if priority is None:
+        rank = TOC_NO_PRIORITY
+    else:
+        rank = min(max(priority + TOC_PRIORITY_OFFSET, 0), TOC_PRIORITY_MAX)
+    return f"{TOC_TYPE_RANKS.get(type_, TOC_OTHER_RANK)}{rank:010d}{code or ''}"
+
+
+def _toc_sort_key_default(context) -> str:
+    params = context.get_current_parameters()
+    return toc_sort_key(params.get("type"), params.get("priority"), params.get("code"))
+
+
 class TOCItem(Base):
     __tablename__ = "toc_items"
+    # Browsing reads the page order and the type/status/dataset filters from this index alone
+    __table_args__ = (Index("ix_toc_items_browse", "sort_key", "id", "type", "status", "dataset"),)
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
     type: Mapped[str] = mapped_column(String(10), nullable=False)  # 'table' | 'figure' | 'listing'
@@ -129,3 +171,40 @@ class TOCItem(Base):
     status: Mapped[Optional[str]] = mapped_column(String(50), nullable=True)
     dataset: Mapped[Optional[str]] = mapped_column(String(100), nullable=True)
     priority: Mapped[Optional[int]] = mapped_column(Integer, nullable=True)
+    # Set on insert from type/priority/code, recomputed on ORM updates (toc._before_flush);
+    # toc.backfill() fixes rows written before it existed or by other means
+    sort_key: Mapped[Optional[str]] = mapped_column(String(64), nullable=True, default=_toc_sort_key_default)
+    # default as well as server_default: create_tables() adds this column to
+    # existing tables without a DDL default
+    updated_at: Mapped[Optional[datetime]] = mapped_column(
+        DateTime(timezone=True), server_default=func.now(), default=func.now(), onupdate=func.now(), index=True
+    )
+
+# ---- Change versions (per-table counters behind ETag / Last-Modified) ----
+class TableVersion(Base):
+    __tablename__ = "table_versions"
+
+    table_name: Mapped[str] = mapped_column(String(64), primary_key=True)
+    version: Mapped[int] = mapped_column(Integer, nullable=False, default=0, server_default="0")
+    updated_at: Mapped[Optional[datetime]] = mapped_column(DateTime(timezone=True), nullable=True)
+
+# ---- Deletion log for delta sync (see app/tombstones.py) ----
+class Tombstone(Base):
+    __tablename__ = "tombstones"
+    __table_args__ = (Index("ix_tombstones_table_deleted", "table_name", "deleted_at"),)
+
+    table_name: Mapped[str] = mapped_column(String(64), primary_key=True)
+    row_id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    deleted_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), server_default=func.now(), nullable=False
+    )
+
+# ---- QC rollup (per deliverable and status, maintained by deltas; see app/rollup.py) ----
+class QCRollup(Base):
+    __tablename__ = "qc_rollups"
+
+    deliverable_id: Mapped[int] = mapped_column(Integer, primary_key=True)  # 0 = no deliverable
+    status: Mapped[str] = mapped_column(String(50), primary_key=True)  # '' = no status
+    program_count: Mapped[int] = mapped_column(Integer, nullable=False, default=0, server_default="0")
+    unresolved_comments: Mapped[int] = mapped_column(Integer, nullable=False, default=0, server_default="0")
+    last_activity_at: Mapped[Optional[datetime]] = mapped_column(DateTime(timezone=True), nullable=True)
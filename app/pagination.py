@@ -0,0 +1,153 @@
+# app/pagination.py
+"""Keyset (cursor) pagination shared by the list routers.
+
+A page is ordered by a list of SortKeys ending in a unique column (``id``).
+The sort-key values of the last row are packed into an opaque token that the
+client sends back as ``?cursor=``; the next page then starts with a range
+predicate on the ordered columns instead of ``OFFSET``, so page 10,000 costs
+the same as page 1 and concurrent inserts do not shift rows between pages.
+"""
+import base64
+import json
+from typing import Any, List, Optional, Sequence
+
+from fastapi import HTTPException, Response
+from sqlalchemy import DateTime, String, and_, false, or_, type_coerce
+from sqlalchemy.sql import ColumnElement, Select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+# What encode_cursor can produce for a sort-key value (datetimes become str)
+CURSOR_SCALARS = (str, int, float, bool, type(None))
+
+
+class SortKey:
+    """One ORDER BY term that can also be compared against a cursor value.
+
+    ``nulls_last`` defaults to what SQLite and MySQL do natively (NULLs sort
+    lowest), so the generated ORDER BY only asks for NULLS FIRST/LAST when the
+    caller overrides it.
+    """
+
+    def __init__(self, expr, desc: bool = False, nulls_last: Optional[bool] = None):
+        column = getattr(expr, "expression", expr)
+        self.nullable = getattr(column, "nullable", True)
+        # DateTime values are compared as the raw stored text: SQLite keeps
+        # CURRENT_TIMESTAMP without microseconds, so a bound Python datetime
+        # would never compare equal to the row it came from.
+        if isinstance(getattr(column, "type", None), DateTime):
+            expr = type_coerce(expr, String)
+        self.expr = expr
+        self.desc = desc
+        self.native_nulls_last = desc
+        self.nulls_last = desc if nulls_last is None else nulls_last
+
+    def order_by(self):
+        clause = self.expr.desc() if self.desc else self.expr.asc()
+        if self.nulls_last != self.native_nulls_last:
+            clause = clause.nulls_last() if self.nulls_last else clause.nulls_first()
+        return clause
+
+    def equals(self, value) -> ColumnElement:
+        return self.expr.is_(None) if value is None else self.expr == value
+
+    def beyond(self, value) -> ColumnElement:
+        """Rows that sort strictly after ``value`` on this key alone."""
+        if value is None:
+            return false() if self.nulls_last else self.expr.is_not(None)
+        cmp = self.expr < value if self.desc else self.expr > value
+        if self.nullable and self.nulls_last:
+            return or_(cmp, self.expr.is_(None))
+        return cmp
+
+
+def encode_cursor(values: Sequence[Any]) -> str:
+    raw = json.dumps(list(values), default=str, separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(token: str, size: int) -> List[Any]:
+    try:
+        padded = token + "=" * (-len(token) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode()))
+    except (ValueError, TypeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    if not isinstance(values, list) or len(values) != size:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    if not all(isinstance(value, CURSOR_SCALARS) for value in values):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    return values
+
+
+def after(keys: Sequence[SortKey], values: Sequence[Any]) -> ColumnElement:
+    """Lexicographic "row comes after the cursor" predicate.
+
+    Spelled out as OR-of-ANDs rather than a row-value comparison so it works
+    on every backend and with mixed ASC/DESC keys.
+    """
+    clauses = []
+    equal = []
+    for key, value in zip(keys, values):
+        clauses.append(and_(*equal, key.beyond(value)))
+        equal.append(key.equals(value))
+    return or_(*clauses)
+
+
+def paginate(
+    db: Session,
+    stmt: Select,
+    keys: Sequence[SortKey],
+    *,
+    limit: int,
+    offset: int = 0,
+    cursor: Optional[str] = None,
+    response: Optional[Response] = None,
+    mappings: bool = False,
+) -> list:
+    """Run ``stmt`` for one page and return the first selected entity per row.
+
+    With ``mappings=True`` (column projections) each row is instead a dict of
+    every selected column. ``offset`` is only honoured when no cursor is
+    given (kept for older clients). When another page exists its token is
+    returned in the ``X-Next-Cursor`` response header.
+    """
+    rows = db.execute(_page_query(stmt, keys, limit, offset, cursor)).all()
+    return _page(rows, keys, limit, response, mappings)
+
+
+async def apaginate(
+    db: AsyncSession,
+    stmt: Select,
+    keys: Sequence[SortKey],
+    *,
+    limit: int,
+    offset: int = 0,
+    cursor: Optional[str] = None,
+    response: Optional[Response] = None,
+    mappings: bool = False,
+) -> list:
+    """``paginate`` on an AsyncSession (async handlers, ``DB_ASYNC=1``)."""
+    rows = (await db.execute(_page_query(stmt, keys, limit, offset, cursor))).all()
+    return _page(rows, keys, limit, response, mappings)
+
+
+def _page_query(stmt: Select, keys: Sequence[SortKey], limit: int, offset: int, cursor: Optional[str]) -> Select:
+    stmt = stmt.add_columns(*[k.expr.label(f"_k{i}") for i, k in enumerate(keys)])
+    stmt = stmt.order_by(*[k.order_by() for k in keys])
+    if cursor:
+        stmt = stmt.where(after(keys, decode_cursor(cursor, len(keys))))
+    elif offset:
+        stmt = stmt.offset(offset)
+    return stmt.limit(limit + 1)
+
+
+def _page(rows: list, keys: Sequence[SortKey], limit: int, response: Optional[Response], mappings: bool) -> list:
+    if len(rows) > limit:
+        rows = rows[:limit]
+        if response is not None:
+            response.headers[NEXT_CURSOR_HEADER] = encode_cursor(rows[-1][-len(keys):])
+    if mappings:
+        names = list(rows[0]._fields[:-len(keys)]) if rows else []
+        return [dict(zip(names, row)) for row in rows]
+    return [row[0] for row in rows]
@@ -0,0 +1,277 @@
+# app/profiling.py
+"""Per-request SQL accounting, the slow-query log and ``?_profile=1``.
+
+``instrument`` (called from ``app/db.py`` for every engine) counts and
+times each statement against the request it runs for, and
+``ProfilingMiddleware`` reports the totals on every response::
+
+    Server-Timing: db;dur=12.41;desc="3 queries", app;dur=18.02
+    X-Query-Count: 3
+
+Headers go out before the body, so a streamed response (a body without
+``Content-Length``: NDJSON/CSV spec sheets) gets neither header; its
+statements are still running when they would be sent.
+
+Statements slower than ``DB_SLOW_QUERY_MS`` are logged as one JSON object
+on the ``app.slow_query`` logger, with the route, the statement, its
+parameters (``DB_SLOW_QUERY_PARAMS=0`` leaves them out) and the plan
+(``EXPLAIN QUERY PLAN`` on SQLite, ``EXPLAIN`` on MySQL;
+``DB_SLOW_QUERY_EXPLAIN=0`` skips it). Streamed (``stream_results``)
+statements are logged without a plan, as their connection is still busy
+returning rows.
+
+With ``PROFILE_TOKEN`` set, a request carrying ``?_profile=1`` and a
+matching ``X-Profile-Token`` header is run under cProfile and answered with
+the profile (text, by cumulative time) instead of its normal body. Sync
+handlers run in the threadpool, so ``profile_endpoints`` wraps them to
+profile their worker thread as well. One profile runs at a time.
+"""
+import cProfile
+import functools
+import hmac
+import inspect
+import io
+import json
+import logging
+import os
+import pstats
+import threading
+from contextvars import ContextVar
+from time import perf_counter
+from typing import List, Optional
+from urllib.parse import parse_qsl
+
+from fastapi import APIRouter
+from fastapi.routing import APIRoute
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from .metrics import route_of
+
+SLOW_QUERY_MS = float(os.getenv("DB_SLOW_QUERY_MS", "500"))  # 0 disables the log
+SLOW_QUERY_EXPLAIN = os.getenv("DB_SLOW_QUERY_EXPLAIN", "1").lower() in ("1", "true", "yes")
+SLOW_QUERY_PARAMS = os.getenv("DB_SLOW_QUERY_PARAMS", "1").lower() in ("1", "true", "yes")
+SERVER_TIMING = os.getenv("DB_SERVER_TIMING", "1").lower() in ("1", "true", "yes")
+PROFILE_TOKEN = os.getenv("PROFILE_TOKEN") or None
+PROFILE_PARAM = "_profile"
+PROFILE_HEADER = "x-profile-token"
+PROFILE_LINES = 60
+MAX_PARAMS_CHARS = 2000
+
+slow_log = logging.getLogger("app.slow_query")
+
+_EXPLAIN = {"sqlite": "EXPLAIN QUERY PLAN ", "mysql": "EXPLAIN ", "mariadb": "EXPLAIN "}
+_EXPLAINABLE = ("select", "with", "update", "delete")
+_EXPLAINING = "profiling_explaining"  # Connection.info flag: don't count or explain our EXPLAIN
+
+
+class RequestStats:
+    """SQL done for one request; shared with the threads serving it."""
+
+    __slots__ = ("scope", "queries", "db_seconds", "started", "profile")
+
+    def __init__(self, scope: Optional[dict]):
+        self.scope = scope
+        self.queries = 0
+        self.db_seconds = 0.0
+        self.started = perf_counter()
+        self.profile: Optional[List[cProfile.Profile]] = None  # worker-thread profiles when profiling
+
+    def server_timing(self) -> str:
+        app_ms = (perf_counter() - self.started) * 1e3
+        noun = "query" if self.queries == 1 else "queries"
+        return (f'db;dur={self.db_seconds * 1e3:.2f};desc="{self.queries} {noun}", '
+                f"app;dur={app_ms:.2f}")
+
+
+_stats: ContextVar[Optional[RequestStats]] = ContextVar("profiling_stats", default=None)
+_profile_lock = threading.Lock()
+
+
+# ---- SQLAlchemy ----
+def _before_execute(conn, cursor, statement, parameters, context, executemany):
+    context._profiling_start = perf_counter()
+
+
+def _after_execute(conn, cursor, statement, parameters, context, executemany):
+    if conn.info.get(_EXPLAINING):
+        return
+    elapsed = perf_counter() - context._profiling_start
+    stats = _stats.get()
+    if stats is not None:
+        stats.queries += 1
+        stats.db_seconds += elapsed
+    if SLOW_QUERY_MS and elapsed * 1e3 >= SLOW_QUERY_MS:
+        streamed = bool(context.execution_options.get("stream_results"))
+        _log_slow(conn, statement, parameters, executemany, streamed, elapsed, stats)
+
+
+def _explain(conn, statement: str, parameters) -> List[str]:
+    prefix = _EXPLAIN.get(conn.dialect.name)
+    if prefix is None or not statement.lstrip().lower().startswith(_EXPLAINABLE):
+        return []
+    conn.info[_EXPLAINING] = True
+    try:
+        rows = conn.exec_driver_sql(prefix + statement, parameters).all()
+        return [" | ".join("" if v is None else str(v) for v in row) for row in rows]
+    except Exception as exc:  # the plan is a nicety; never fail the request for it
+        return [f"EXPLAIN failed: {exc}"]
+    finally:
+        conn.info.pop(_EXPLAINING, None)
+
+
+def _log_slow(conn, statement: str, parameters, executemany: bool, streamed: bool, elapsed: float,
+              stats: Optional[RequestStats]) -> None:
+    scope = stats.scope if stats is not None else None
+    record = {
+        "event": "slow_query",
+        "duration_ms": round(elapsed * 1e3, 2),
+        "route": route_of(scope),
+        "method": scope["method"] if scope else None,
+        "statement": " ".join(statement.split()),
+    }
+    if SLOW_QUERY_PARAMS:
+        record["parameters"] = repr(parameters)[:MAX_PARAMS_CHARS]
+    if executemany:
+        record["executemany"] = True
+    elif streamed:  # its cursor is still being read: an EXPLAIN on conn would clobber it
+        record["streamed"] = True
+    elif SLOW_QUERY_EXPLAIN:
+        record["explain"] = _explain(conn, statement, parameters)
+    slow_log.warning(json.dumps(record, default=str))
+
+
+def instrument(engine: Engine) -> None:
+    """Count, time and slow-log every statement run on ``engine``."""
+    sync_engine = getattr(engine, "sync_engine", engine)
+    event.listen(sync_engine, "before_cursor_execute", _before_execute)
+    event.listen(sync_engine, "after_cursor_execute", _after_execute)
+
+
+# ---- ?_profile=1 ----
+def profiled(endpoint):
+    """Sync ``endpoint`` that also profiles its worker thread when asked to."""
+    @functools.wraps(endpoint)
+    def wrapper(*args, **kwargs):
+        stats = _stats.get()
+        if stats is None or stats.profile is None:
+            return endpoint(*args, **kwargs)
+        profile = cProfile.Profile()
+        profile.enable()
+        try:
+            return endpoint(*args, **kwargs)
+        finally:
+            profile.disable()
+            stats.profile.append(profile)
+    return wrapper
+
+
+def profile_endpoints(router: APIRouter) -> APIRouter:
+    """Wrap ``router``'s sync handlers with ``profiled`` (before it is included)."""
+    if PROFILE_TOKEN is None:
+        return router
+    for route in router.routes:
+        if isinstance(route, APIRoute) and not inspect.iscoroutinefunction(route.endpoint):
+            route.endpoint = profiled(route.endpoint)
+    return router
+
+
+def _profile_requested(scope) -> bool:
+    if PROFILE_TOKEN is None or PROFILE_PARAM.encode() not in scope["query_string"]:
+        return False
+    params = dict(parse_qsl(scope["query_string"].decode("latin-1")))
+    return params.get(PROFILE_PARAM, "").lower() in ("1", "true", "yes")
+
+
+def _authorized(scope) -> bool:
+    for name, value in scope["headers"]:
+        if name == PROFILE_HEADER.encode():
+            return hmac.compare_digest(value, PROFILE_TOKEN.encode())
+    return False
+
+
+def _render_profile(scope, status: int, stats: RequestStats, profiles: List[cProfile.Profile]) -> bytes:
+    out = io.StringIO()
+    out.write(f"{scope['method']} {route_of(scope)} -> {status}\n")
+    out.write(f"Server-Timing: {stats.server_timing()}\n\n")
+    merged = pstats.Stats(profiles[0], stream=out)
+    for profile in profiles[1:]:
+        merged.add(profile)
+    merged.strip_dirs().sort_stats("cumulative").print_stats(PROFILE_LINES)
+    return out.getvalue().encode()
+
+
+async def _text(send, status: int, body: bytes, headers: list) -> None:
+    await send({"type": "http.response.start", "status": status, "headers": [
+        (b"content-type", b"text/plain; charset=utf-8"),
+        (b"content-length", str(len(body)).encode()),
+        *headers,
+    ]})
+    await send({"type": "http.response.body", "body": body})
+
+
+# ---- HTTP ----
+class ProfilingMiddleware:
+    """Pure ASGI middleware: SQL totals as response headers, and ``?_profile=1``."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+        stats = RequestStats(scope)
+        token = _stats.set(stats)
+        try:
+            if _profile_requested(scope):
+                await self._profile(scope, receive, send, stats)
+            else:
+                await self.app(scope, receive, self._with_headers(send, stats))
+        finally:
+            _stats.reset(token)
+
+    @staticmethod
+    def _with_headers(send, stats: RequestStats):
+        if not SERVER_TIMING:
+            return send
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                headers = list(message.get("headers", []))
+                if message["status"] in (204, 304) or any(name.lower() == b"content-length" for name, _ in headers):
+                    message["headers"] = headers + [
+                        (b"server-timing", stats.server_timing().encode()),
+                        (b"x-query-count", str(stats.queries).encode()),
+                    ]
+            await send(message)
+        return send_wrapper
+
+    async def _profile(self, scope, receive, send, stats: RequestStats) -> None:
+        if not _authorized(scope):
+            return await _text(send, 403, b"Profiling requires a valid X-Profile-Token header\n", [])
+        if not _profile_lock.acquire(blocking=False):
+            return await _text(send, 503, b"Another request is being profiled; retry shortly\n",
+                               [(b"retry-after", b"1")])
+        status = [500]
+
+        async def capture(message):  # the profile replaces the normal response
+            if message["type"] == "http.response.start":
+                status[0] = message["status"]
+
+        try:
+            stats.profile = []
+            profile = cProfile.Profile()
+            profile.enable()
+            try:
+                await self.app(scope, receive, capture)
+            finally:
+                profile.disable()
+            body = _render_profile(scope, status[0], stats, [profile, *stats.profile])
+        finally:
+            _profile_lock.release()
+        await _text(send, 200, body, [
+            (b"x-profiled-status", str(status[0]).encode()),
+            (b"server-timing", stats.server_timing().encode()),
+            (b"x-query-count", str(stats.queries).encode()),
+            (b"cache-control", b"no-store"),
+        ])
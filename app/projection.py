@@ -0,0 +1,48 @@
+# app/projection.py
+"""Sparse fieldsets (``fields=``) for list and spec endpoints.
+
+The requested columns go straight into the SQL ``SELECT`` and rows come back
+as Core rows, so no ORM objects are built for them. Field names are checked
+against the route's ``Out`` schema (tracker lists) or the reflected table
+(spec sheets); unknown names are a 400.
+
+List endpoints always select through this (all ``Out`` fields by default)
+and return ``responses.rows_response``.
+"""
+from typing import Dict, Iterable, List, Optional, Sequence, Type
+
+from fastapi import HTTPException
+from pydantic import BaseModel
+from sqlalchemy.schema import Table
+from sqlalchemy.sql import ColumnElement
+
+FIELDS_DESCRIPTION = "Comma-separated columns to return (default: all)"
+
+
+def parse_fields(fields: Optional[str], allowed: Iterable[str]) -> Optional[List[str]]:
+    """Requested field names in order, or None when ``fields`` is not given."""
+    if fields is None:
+        return None
+    allowed = list(allowed)
+    names = list(dict.fromkeys(f.strip() for f in fields.split(",") if f.strip()))
+    unknown = [f for f in names if f not in allowed]
+    if unknown or not names:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Unknown field(s): {', '.join(unknown) or '(none given)'}; allowed: {', '.join(allowed)}",
+        )
+    return names
+
+
+def schema_columns(model, schema: Type[BaseModel]) -> Dict[str, ColumnElement]:
+    """Out-schema fields that map to a column of ``model``, by name."""
+    columns = model.__table__.columns
+    return {name: getattr(model, name) for name in schema.model_fields if name in columns}
+
+
+def table_columns(table: Table, names: Optional[Sequence[str]]) -> List[ColumnElement]:
+    """The named columns of a reflected table (all of them when ``names`` is None)."""
+    if names is None:
+        return list(table.columns)
+    return [table.c[name] for name in names]
+
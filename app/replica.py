@@ -0,0 +1,179 @@
+# app/replica.py
+"""Read/write routing between the primary (``DB_URL``) and a read replica
+(``DB_READ_URL``).
+
+GET handlers depend on ``get_read_db`` instead of ``get_db`` (async
+handlers: ``get_async_read_db``). It hands out
+a replica session unless the request has to see the primary:
+
+* the client wrote recently: successful writes set a short-lived
+  ``db_pin`` cookie (``DB_READ_PIN_SECONDS``), so a client reads its own
+  writes; clients without cookies can send ``X-Read-Primary: 1``;
+* the replica is too far behind: ``LagMonitor`` compares ``table_versions``
+  on both sides every ``DB_READ_LAG_CHECK_INTERVAL`` seconds, and reads
+  fall back to the primary while the lag is over ``DB_READ_MAX_LAG``.
+
+Sessions from ``get_read_db`` are never committed. Without ``DB_READ_URL``
+every read goes to the primary and nothing here is active.
+
+Locally, two SQLite files can stand in for the pair::
+
+    cp app.db replica.db
+    DB_URL=sqlite:///./app.db DB_READ_URL=sqlite:///./replica.db uvicorn app.main:app
+"""
+import logging
+import math
+import os
+import threading
+import time
+from datetime import datetime, timezone
+from typing import Dict, Tuple
+
+from fastapi import Request
+from sqlalchemy import select
+from starlette.concurrency import run_in_threadpool
+
+from . import changes
+from .db import (
+    DB_READ_URL, AsyncReadSessionLocal, AsyncSessionLocal, ReadSessionLocal, SessionLocal, engine, read_engine,
+)
+from .models import TableVersion
+
+log = logging.getLogger(__name__)
+
+READ_PIN_SECONDS = float(os.getenv("DB_READ_PIN_SECONDS", "5"))
+MAX_LAG = float(os.getenv("DB_READ_MAX_LAG", "5"))
+LAG_CHECK_INTERVAL = float(os.getenv("DB_READ_LAG_CHECK_INTERVAL", "2"))
+PIN_COOKIE = "db_pin"
+PRIMARY_HEADER = "x-read-primary"
+SAFE_METHODS = frozenset({"GET", "HEAD", "OPTIONS"})
+READ_ONLY_POSTS = (":lookup",)  # POST only to carry a long id list (see app/lookup.py)
+ENABLED = DB_READ_URL is not None
+
+
+def _versions(engine) -> Dict[str, Tuple[int, datetime]]:
+    with engine.connect() as conn:
+        rows = conn.execute(select(TableVersion.table_name, TableVersion.version, TableVersion.updated_at))
+        return {name: (version, updated_at) for name, version, updated_at in rows}
+
+
+def _utc(value: datetime) -> datetime:
+    return value if value.tzinfo else value.replace(tzinfo=timezone.utc)
+
+
+class LagMonitor:
+    """Periodically estimated replica lag, in seconds (``inf`` if unknown)."""
+
+    def __init__(self, primary, replica, interval: float = LAG_CHECK_INTERVAL):
+        self.primary = primary
+        self.replica = replica
+        self.interval = interval
+        self.lag = 0.0
+        self._checked_at = -math.inf
+        self._synced_at = -math.inf  # start of the last check that found no lag
+        self._last_write = 0.0
+        self._lock = threading.Lock()
+
+    def note_write(self, tables) -> None:
+        self._last_write = time.monotonic()
+
+    def stale(self) -> bool:
+        return time.monotonic() - self._checked_at >= self.interval
+
+    def caught_up(self) -> bool:
+        """True if the replica was in sync after the last primary commit here."""
+        return self._synced_at >= self._last_write
+
+    def measure(self) -> float:
+        """Upper bound on the lag: 0 if the replica has every table version,
+        else the age of the newest write the replica has seen."""
+        primary = _versions(self.primary)
+        replica = _versions(self.replica)
+        if all(replica.get(name, (0, None))[0] >= version for name, (version, _) in primary.items()):
+            return 0.0
+        newest = max((_utc(ts) for _, ts in replica.values() if ts is not None), default=None)
+        if newest is None:
+            return math.inf
+        return max((datetime.now(timezone.utc) - newest).total_seconds(), 0.0)
+
+    def check(self) -> float:
+        with self._lock:
+            if self.stale():
+                started = time.monotonic()
+                try:
+                    self.lag = self.measure()
+                except Exception:
+                    log.warning("Replica lag check failed; reading from the primary", exc_info=True)
+                    self.lag = math.inf
+                self._checked_at = started
+                if self.lag == 0:
+                    self._synced_at = started
+        return self.lag
+
+
+monitor = LagMonitor(engine, read_engine)
+if ENABLED:
+    changes.on_commit(monitor.note_write)
+
+
+def pinned(request: Request) -> bool:
+    if request.headers.get(PRIMARY_HEADER, "").lower() in ("1", "true", "yes"):
+        return True
+    try:
+        return float(request.cookies.get(PIN_COOKIE, "0")) > time.time()
+    except ValueError:
+        return False
+
+
+def use_replica(request: Request) -> bool:
+    use = ENABLED and not pinned(request) and monitor.lag <= MAX_LAG
+    request.state.db_role = "replica" if use else "primary"
+    return use
+
+
+def cacheable(request: Request) -> bool:
+    """Whether a response built from this request's reads may be cached."""
+    return getattr(request.state, "db_role", "primary") == "primary" or monitor.caught_up()
+
+
+def get_read_db(request: Request):
+    if ENABLED:
+        monitor.check()
+    db = (ReadSessionLocal if use_replica(request) else SessionLocal)()
+    try:
+        yield db
+    finally:
+        db.close()
+
+
+async def get_async_read_db(request: Request):
+    """``get_read_db`` for async handlers (``DB_ASYNC=1``)."""
+    if ENABLED and monitor.stale():
+        await run_in_threadpool(monitor.check)  # reads both sync engines under its lock
+    db = (AsyncReadSessionLocal if use_replica(request) else AsyncSessionLocal)()
+    try:
+        yield db
+    finally:
+        await db.close()
+
+
+class PinMiddleware:
+    """Pure ASGI middleware: pins a client to the primary after a write."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if (scope["type"] != "http" or scope["method"] in SAFE_METHODS
+                or scope["path"].endswith(READ_ONLY_POSTS)):
+            return await self.app(scope, receive, send)
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start" and message["status"] < 400:
+                until = time.time() + READ_PIN_SECONDS
+                cookie = (f"{PIN_COOKIE}={until:.3f}; Max-Age={math.ceil(READ_PIN_SECONDS)}; "
+                          "Path=/; HttpOnly; SameSite=Lax")
+                message["headers"] = list(message.get("headers", [])) + [(b"set-cookie", cookie.encode())]
+            await send(message)
+
+        await self.app(scope, receive, send_wrapper)
@@ -0,0 +1,33 @@
+# app/responses.py
+"""Fast JSON responses.
+
+``FastJSONResponse`` (the app's default response class) encodes with
+``pydantic_core.to_json``: the same Rust serializer and output format
+pydantic uses, without the stdlib ``json`` pass.
+
+List endpoints go one step further. They select the ``Out`` schema's columns
+as Core rows and return ``rows_response(rows, response)``, which skips ORM
+object construction and the per-row ``from_attributes`` validation of the
+``response_model``. The ``response_model`` stays on the route for the OpenAPI
+schema. See ``benchmarks/serialization.py`` for the per-row cost.
+"""
+from typing import Any, List
+
+from fastapi import Response
+from fastapi.responses import JSONResponse
+from pydantic_core import to_json
+
+
+class FastJSONResponse(JSONResponse):
+    def render(self, content: Any) -> bytes:
+        return to_json(content)
+
+
+def rows_response(rows: List[dict], response: Response) -> FastJSONResponse:
+    """JSON body for Core row mappings, carrying headers set on ``response``.
+
+    FastAPI does not merge the injected ``response``'s headers (X-Next-Cursor,
+    ETag) into a Response the handler returns itself, so they are copied here.
+    """
+    headers = {k: v for k, v in response.headers.items() if k != "content-length"}
+    return FastJSONResponse(rows, headers=headers)
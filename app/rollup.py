@@ -0,0 +1,299 @@
+# app/rollup.py
+"""Per-deliverable QC rollup, maintained by deltas.
+
+``qc_rollups`` holds, per (deliverable, program status): the number of
+programs, the number of unresolved comments on those programs and the time
+of the last write that touched them. The portfolio view reads it with one
+primary-key range scan instead of aggregating ``program_qc`` and
+``qc_comments``.
+
+Writes keep it current inside their own transaction by applying signed
+deltas computed from before/after row images:
+
+* ORM unit-of-work writes (the single-row handlers) in a ``before_flush``
+  hook, from attribute history;
+* ``run_batch`` (``:batch`` endpoints), which captures images around its
+  bulk statements and calls ``apply``.
+
+The CSV loader rebuilds the table after loading tracker files. To check for
+and repair drift::
+
+    python -m app.rollup            # report drift (exit status 1 if any)
+    python -m app.rollup --repair   # rebuild from program_qc / qc_comments
+"""
+import argparse
+import sys
+from collections import defaultdict
+from datetime import datetime, timezone
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+from sqlalchemy import case, delete, event, func, select
+from sqlalchemy.orm import Session, attributes
+
+from .db import upsert
+from .models import ProgramQC, QCComment, QCRollup
+
+NO_DELIVERABLE = 0
+NO_STATUS = ""
+_SUSPEND_KEY = "rollup_manual"
+_NEW_PROGRAMS_KEY = "rollup_new_programs"
+
+Key = Tuple[int, str]
+
+
+def rollup_key(deliverable_id: Optional[int], status: Optional[str]) -> Key:
+    return (deliverable_id if deliverable_id is not None else NO_DELIVERABLE, status or NO_STATUS)
+
+
+def maintains(model) -> bool:
+    return model in (ProgramQC, QCComment)
+
+
+# ---- row images ----
+# ProgramQC image: (key, 1, unresolved comment count); QCComment: (key, 0, 0|1)
+Image = Tuple[Key, int, int]
+
+
+def _unresolved_counts(conn, program_ids: Iterable[int]) -> Dict[int, int]:
+    ids = [i for i in set(program_ids) if i is not None]
+    if not ids:
+        return {}
+    stmt = (
+        select(QCComment.program_qc_id, func.count())
+        .where(QCComment.program_qc_id.in_(ids), QCComment.resolved == False)  # noqa: E712
+        .group_by(QCComment.program_qc_id)
+    )
+    return dict(conn.execute(stmt).all())
+
+
+def _program_keys(session: Session, conn, program_ids: Iterable[int]) -> Dict[int, Key]:
+    """Current key of each program, preferring unflushed in-session state."""
+    keys: Dict[int, Key] = {}
+    missing = []
+    for pid in set(program_ids):
+        obj = session.identity_map.get(session.identity_key(ProgramQC, pid)) if pid is not None else None
+        if obj is not None:
+            keys[pid] = rollup_key(obj.deliverable_id, obj.status)
+        elif pid is not None:
+            missing.append(pid)
+    if missing:
+        stmt = select(ProgramQC.id, ProgramQC.deliverable_id, ProgramQC.status).where(ProgramQC.id.in_(missing))
+        for pid, deliverable_id, status in conn.execute(stmt):
+            keys[pid] = rollup_key(deliverable_id, status)
+    return keys
+
+
+def images(session: Session, model, rows: Sequence[dict]) -> List[Image]:
+    """Images of committed-or-pending rows given as column dicts."""
+    conn = session.connection()
+    if model is ProgramQC:
+        unresolved = _unresolved_counts(conn, [r["id"] for r in rows])
+        return [(rollup_key(r["deliverable_id"], r["status"]), 1, unresolved.get(r["id"], 0)) for r in rows]
+    keys = _program_keys(session, conn, [r["program_qc_id"] for r in rows])
+    return [(keys[r["program_qc_id"]], 0, 0 if r["resolved"] else 1)
+            for r in rows if r["program_qc_id"] in keys]
+
+
+def snapshot(session: Session, model, ids: Iterable[int]) -> List[Image]:
+    """Images of the rows ``ids`` as they are in the database now."""
+    ids = list(ids)
+    if not ids:
+        return []
+    cols = (
+        [ProgramQC.id, ProgramQC.deliverable_id, ProgramQC.status] if model is ProgramQC
+        else [QCComment.id, QCComment.program_qc_id, QCComment.resolved]
+    )
+    rows = session.connection().execute(select(*cols).where(model.id.in_(ids))).mappings().all()
+    return images(session, model, rows)
+
+
+def apply(session: Session, before: Iterable[Image], after: Iterable[Image]) -> None:
+    """Add ``after - before`` to the rollup, in the session's transaction."""
+    deltas: Dict[Key, List[int]] = defaultdict(lambda: [0, 0])
+    for sign, imgs in ((-1, before), (1, after)):
+        for key, programs, unresolved in imgs:
+            deltas[key][0] += sign * programs
+            deltas[key][1] += sign * unresolved
+    if not deltas:
+        return
+    now = datetime.now(timezone.utc)
+    conn = session.connection()
+    stmt = upsert(QCRollup.__table__, conn.dialect.name, ["last_activity_at"],
+                  increment_cols=("program_count", "unresolved_comments"))
+    conn.execute(stmt, [
+        {"deliverable_id": key[0], "status": key[1], "program_count": p,
+         "unresolved_comments": u, "last_activity_at": now}
+        for key, (p, u) in sorted(deltas.items())
+    ])
+
+
+class suspended:
+    """Skip the flush hook while a caller maintains the rollup itself."""
+
+    def __init__(self, session: Session):
+        self.session = session
+
+    def __enter__(self):
+        self.session.info[_SUSPEND_KEY] = True
+
+    def __exit__(self, *exc):
+        self.session.info.pop(_SUSPEND_KEY, None)
+
+
+def _committed(obj, names: Sequence[str]) -> dict:
+    """Column values as last loaded from the database (before pending changes)."""
+    out = {}
+    for name in names:
+        hist = attributes.get_history(obj, name)
+        if hist.deleted:
+            out[name] = hist.deleted[0]
+        elif hist.unchanged:
+            out[name] = hist.unchanged[0]
+        else:
+            out[name] = getattr(obj, name)
+    return out
+
+
+_COLUMNS = {
+    ProgramQC: ("id", "deliverable_id", "status"),
+    QCComment: ("id", "program_qc_id", "resolved"),
+}
+
+
+@event.listens_for(Session, "before_flush")
+def _before_flush(session, flush_context, instances):
+    session.info.pop(_NEW_PROGRAMS_KEY, None)  # left over from a failed flush
+    if session.info.get(_SUSPEND_KEY):
+        return
+    before: List[Image] = []
+    after: List[Image] = []
+    for model in (ProgramQC, QCComment):
+        names = _COLUMNS[model]
+        new = [o for o in session.new if isinstance(o, model)]
+        dirty = [o for o in session.dirty if isinstance(o, model) and session.is_modified(o)]
+        gone = [o for o in session.deleted if isinstance(o, model)]
+        if model is ProgramQC:
+            # Moving a program moves the unresolved comments already on it;
+            # a new program normally has none (see _after_flush)
+            after += [(rollup_key(o.deliverable_id, o.status), 1, 0) for o in new]
+            if new:
+                session.info.setdefault(_NEW_PROGRAMS_KEY, []).extend(new)
+        else:
+            after += images(session, model, [{n: getattr(o, n) for n in names} for o in new])
+        before += images(session, model, [_committed(o, names) for o in dirty + gone])
+        after += images(session, model, [{n: getattr(o, n) for n in names} for o in dirty])
+    apply(session, before, after)
+
+
+@event.listens_for(Session, "after_flush")
+def _after_flush(session, flush_context):
+    """Count comments already pointing at a new program's id.
+
+    Deleting a program does not delete its comments, and SQLite hands the
+    highest id out again, so a new program can inherit unresolved comments.
+    """
+    new = session.info.pop(_NEW_PROGRAMS_KEY, None)
+    if not new:
+        return
+    unresolved = _unresolved_counts(session.connection(), [o.id for o in new])
+    apply(session, [], [(rollup_key(o.deliverable_id, o.status), 0, unresolved[o.id])
+                        for o in new if unresolved.get(o.id)])
+
+
+# ---- full rebuild / drift check ----
+def computed(conn) -> Dict[Key, Tuple[int, int, Optional[datetime]]]:
+    """The rollup recomputed from the base tables."""
+    unresolved = (
+        select(
+            QCComment.program_qc_id.label("program_qc_id"),
+            func.sum(case((QCComment.resolved == False, 1), else_=0)).label("unresolved"),  # noqa: E712
+            func.max(QCComment.updated_at).label("last_comment_at"),
+        )
+        .group_by(QCComment.program_qc_id)
+        .subquery()
+    )
+    stmt = (
+        select(
+            ProgramQC.deliverable_id,
+            ProgramQC.status,
+            func.count(),
+            func.coalesce(func.sum(unresolved.c.unresolved), 0),
+            func.max(ProgramQC.updated_at),
+            func.max(unresolved.c.last_comment_at),
+        )
+        .outerjoin(unresolved, unresolved.c.program_qc_id == ProgramQC.id)
+        .group_by(ProgramQC.deliverable_id, ProgramQC.status)
+    )
+    out: Dict[Key, List] = {}
+    for deliverable_id, status, programs, comments, program_at, comment_at in conn.execute(stmt):
+        key = rollup_key(deliverable_id, status)
+        last = max((t for t in (program_at, comment_at) if t is not None), default=None)
+        if key in out:  # NULL and '' status share a key
+            prev = out[key]
+            last = max((t for t in (prev[2], last) if t is not None), default=None)
+            out[key] = (prev[0] + programs, prev[1] + comments, last)
+        else:
+            out[key] = (programs, comments, last)
+    return out
+
+
+def stored(conn) -> Dict[Key, Tuple[int, int]]:
+    stmt = select(QCRollup.deliverable_id, QCRollup.status, QCRollup.program_count, QCRollup.unresolved_comments)
+    return {(d, s): (p, u) for d, s, p, u in conn.execute(stmt) if p or u}
+
+
+def drift(conn) -> List[Tuple[Key, Optional[Tuple[int, int]], Optional[Tuple[int, int]]]]:
+    """(key, stored counts, expected counts) for every key that disagrees."""
+    expected = {k: v[:2] for k, v in computed(conn).items()}
+    actual = stored(conn)
+    return [
+        (key, actual.get(key), expected.get(key))
+        for key in sorted(set(expected) | set(actual))
+        if actual.get(key) != expected.get(key)
+    ]
+
+
+def rebuild(conn) -> int:
+    """Replace the rollup with a fresh aggregate; returns the row count."""
+    rows = [
+        {"deliverable_id": key[0], "status": key[1], "program_count": p,
+         "unresolved_comments": u, "last_activity_at": last}
+        for key, (p, u, last) in sorted(computed(conn).items())
+    ]
+    conn.execute(delete(QCRollup))
+    if rows:
+        conn.execute(QCRollup.__table__.insert(), rows)
+    return len(rows)
+
+
+def ensure(engine) -> None:
+    """Build the rollup on first start against an existing database."""
+    with engine.begin() as conn:
+        empty = conn.execute(select(QCRollup.deliverable_id).limit(1)).first() is None
+        if empty and conn.execute(select(ProgramQC.id).limit(1)).first() is not None:
+            rebuild(conn)
+
+
+def main(argv=None) -> int:
+    from .db import create_tables, engine
+
+    parser = argparse.ArgumentParser(prog="python -m app.rollup", description=__doc__.split("\n\n")[0])
+    parser.add_argument("--repair", action="store_true", help="Rebuild qc_rollups from the base tables")
+    args = parser.parse_args(argv)
+
+    create_tables()
+    with engine.begin() as conn:
+        problems = drift(conn)
+        for key, actual, expected in problems:
+            print(f"deliverable={key[0]} status={key[1]!r}: stored={actual} expected={expected}")
+        if not problems:
+            print("qc_rollups is consistent")
+            return 0
+        if args.repair:
+            print(f"Rebuilt qc_rollups: {rebuild(conn)} rows")
+            return 0
+    return 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
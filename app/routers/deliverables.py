@@ -1,31 +1,65 @@
 from typing import List, Optional
-from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 from sqlalchemy import select
-from ..db import get_db
+from ..db import get_async_db, get_db
+from ..lookup import IDS_DESCRIPTION, afetch, check_ids, fetch, lookup_response, parse_ids, report_missing
+from ..replica import get_async_read_db, get_read_db
 from ..models import Deliverable
-from ..schemas import DeliverableCreate, DeliverableOut
+from ..pagination import SortKey, apaginate, paginate
+from ..projection import FIELDS_DESCRIPTION, parse_fields, schema_columns
+from ..responses import rows_response
+from ..schemas import DeliverableCreate, DeliverableOut, LookupIn, LookupOut
 
 router = APIRouter()
 
+PROJECTABLE = schema_columns(Deliverable, DeliverableOut)
+
+def _select(fields: Optional[str], q: Optional[str]):
+    projection = parse_fields(fields, PROJECTABLE) or list(PROJECTABLE)
+    stmt = select(*[PROJECTABLE[f] for f in projection])
+    if q:
+        like = f"%{q}%"
+        stmt = stmt.where(
+            (Deliverable.name.ilike(like)) | (Deliverable.status.ilike(like))
+        )
+    return stmt
+
 @router.get("/deliverables", response_model=List[DeliverableOut])
 def list_deliverables(
+    response: Response,
     q: Optional[str] = Query(None, description="Search by name or status (case-insensitive)"),
+    fields: Optional[str] = Query(None, description=FIELDS_DESCRIPTION),
+    ids: Optional[str] = Query(None, description=IDS_DESCRIPTION),
     limit: int = Query(50, ge=1, le=500),
-    offset: int = Query(0, ge=0),
-    db: Session = Depends(get_db),
+    offset: int = Query(0, ge=0, description="Deprecated: use cursor"),
+    cursor: Optional[str] = Query(None, description="X-Next-Cursor value from the previous page"),
+    db: Session = Depends(get_read_db),
 ):
-    stmt = select(Deliverable).order_by(Deliverable.id)
-    if q:
-        like = f"%{q}%"
-        stmt = select(Deliverable).where(
-            (Deliverable.name.ilike(like)) | (Deliverable.status.ilike(like))
-        ).order_by(Deliverable.id)
-    rows = db.execute(stmt.offset(offset).limit(limit)).scalars().all()
-    return rows
+    id_list = parse_ids(ids)
+    stmt = _select(fields, q)
+    if id_list is not None:
+        rows, missing = fetch(db, stmt, Deliverable.id, id_list, mappings=True)
+        report_missing(response, missing)
+        return rows_response(rows, response)
+    rows = paginate(db, stmt, [SortKey(Deliverable.id)], limit=limit, offset=offset,
+                    cursor=cursor, response=response, mappings=True)
+    return rows_response(rows, response)
+
+# POST /v1/deliverables:lookup — ?ids= for lists too long for a URL
+@router.post("/deliverables:lookup", response_model=LookupOut)
+def lookup_deliverables(
+    payload: LookupIn,
+    q: Optional[str] = Query(None, description="Search by name or status (case-insensitive)"),
+    fields: Optional[str] = Query(None, description=FIELDS_DESCRIPTION),
+    db: Session = Depends(get_read_db),
+):
+    rows, missing = fetch(db, _select(fields, q), Deliverable.id, check_ids(payload.ids), mappings=True)
+    return lookup_response(rows, missing)
 
 @router.get("/deliverables/{deliverable_id}", response_model=DeliverableOut)
-def get_deliverable(deliverable_id: int, db: Session = Depends(get_db)):
+def get_deliverable(deliverable_id: int, db: Session = Depends(get_read_db)):
     row = db.get(Deliverable, deliverable_id)
     if not row:
         raise HTTPException(status_code=404, detail="Deliverable not found")
@@ -38,3 +72,54 @@ def create_deliverable(payload: DeliverableCreate, db: Session = Depends(get_db)
     db.commit()
     db.refresh(rec)
     return rec
+
+
+# ---- Async handlers (DB_ASYNC=1, see app/db.py) ----
+# Same routes, in the same order, on an AsyncSession.
+async_router = APIRouter()
+
+@async_router.get("/deliverables", response_model=List[DeliverableOut])
+async def alist_deliverables(
+    response: Response,
+    q: Optional[str] = Query(None, description="Search by name or status (case-insensitive)"),
+    fields: Optional[str] = Query(None, description=FIELDS_DESCRIPTION),
+    ids: Optional[str] = Query(None, description=IDS_DESCRIPTION),
+    limit: int = Query(50, ge=1, le=500),
+    offset: int = Query(0, ge=0, description="Deprecated: use cursor"),
+    cursor: Optional[str] = Query(None, description="X-Next-Cursor value from the previous page"),
+    db: AsyncSession = Depends(get_async_read_db),
+):
+    id_list = parse_ids(ids)
+    stmt = _select(fields, q)
+    if id_list is not None:
+        rows, missing = await afetch(db, stmt, Deliverable.id, id_list, mappings=True)
+        report_missing(response, missing)
+        return rows_response(rows, response)
+    rows = await apaginate(db, stmt, [SortKey(Deliverable.id)], limit=limit, offset=offset,
+                           cursor=cursor, response=response, mappings=True)
+    return rows_response(rows, response)
+
+@async_router.post("/deliverables:lookup", response_model=LookupOut)
+async def alookup_deliverables(
+    payload: LookupIn,
+    q: Optional[str] = Query(None, description="Search by name or status (case-insensitive)"),
+    fields: Optional[str] = Query(None, description=FIELDS_DESCRIPTION),
+    db: AsyncSession = Depends(get_async_read_db),
+):
+    rows, missing = await afetch(db, _select(fields, q), Deliverable.id, check_ids(payload.ids), mappings=True)
+    return lookup_response(rows, missing)
+
+@async_router.get("/deliverables/{deliverable_id}", response_model=DeliverableOut)
+async def aget_deliverable(deliverable_id: int, db: AsyncSession = Depends(get_async_read_db)):
+    row = await db.get(Deliverable, deliverable_id)
+    if not row:
+        raise HTTPException(status_code=404, detail="Deliverable not found")
+    return row
+
+@async_router.post("/deliverables", response_model=DeliverableOut, status_code=201)
+async def acreate_deliverable(payload: DeliverableCreate, db: AsyncSession = Depends(get_async_db)):
+    rec = Deliverable(name=payload.name, status=payload.status)
+    db.add(rec)
+    await db.commit()
+    await db.refresh(rec)
+    return rec
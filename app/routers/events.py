@@ -0,0 +1,84 @@
+# app/routers/events.py
+"""``GET /v1/events``: Server-Sent Events stream of QC activity.
+
+Each message is one committed create/update/delete::
+
+    id: 66f1c2a0-42
+    data: {"entity": "qc_comments", "op": "create", "id": 901, "program_qc_id": 17,
+           "deliverable_id": 3, "at": "2024-09-23T14:05:11.201+00:00"}
+
+Browsers' ``EventSource`` reconnects by itself and sends ``Last-Event-ID``;
+missed events are replayed from the broker's buffer. When they cannot be
+(server restarted, or the client was away too long) a ``reset`` event is
+sent first and the client should refetch the lists it shows. Comment lines
+are sent every ``EVENTS_HEARTBEAT`` seconds to keep proxies from closing
+idle streams.
+"""
+import asyncio
+import json
+import os
+from typing import List, Optional
+
+from fastapi import APIRouter, Header, Query
+from fastapi.responses import StreamingResponse
+
+from ..events import ENTITIES, broker
+
+router = APIRouter()
+async_router = router  # already async, and it needs no session
+
+HEARTBEAT_SECONDS = float(os.getenv("EVENTS_HEARTBEAT", "15"))
+RETRY_MS = 3000
+
+
+def _message(event_id: str, evt: dict) -> str:
+    return f"id: {event_id}\ndata: {json.dumps(evt, separators=(',', ':'))}\n\n"
+
+
+def _matcher(entities: Optional[List[str]], program_qc_id: Optional[int], deliverable_id: Optional[int]):
+    def match(evt: dict) -> bool:
+        return (
+            (entities is None or evt["entity"] in entities)
+            and (program_qc_id is None or evt["program_qc_id"] == program_qc_id)
+            and (deliverable_id is None or evt["deliverable_id"] == deliverable_id)
+        )
+    return match
+
+
+# GET /v1/events — live change stream (text/event-stream)
+@router.get("/events", response_class=StreamingResponse)
+async def stream_events(
+    entity: Optional[str] = Query(default=None, description="Comma-separated: " + ", ".join(ENTITIES.values())),
+    program_qc_id: Optional[int] = Query(default=None),
+    deliverable_id: Optional[int] = Query(default=None),
+    last_event_id: Optional[str] = Header(default=None, alias="Last-Event-ID"),
+):
+    entities = [e.strip() for e in entity.split(",") if e.strip()] if entity else None
+    match = _matcher(entities, program_qc_id, deliverable_id)
+
+    async def body():
+        # Subscribed once streaming starts, so a stream that never starts leaks nothing
+        sub, backlog = broker.subscribe(match, last_event_id)
+        try:
+            yield f"retry: {RETRY_MS}\n\n"
+            if backlog is None:
+                yield "event: reset\ndata: {}\n\n"
+            for event_id, evt in backlog or []:
+                yield _message(event_id, evt)
+            while True:
+                try:
+                    item = await asyncio.wait_for(sub.queue.get(), HEARTBEAT_SECONDS)
+                except asyncio.TimeoutError:
+                    yield ": keepalive\n\n"
+                    continue
+                if item is None:  # dropped for falling behind; the client reconnects and resumes
+                    return
+                yield _message(*item)
+        finally:
+            broker.unsubscribe(sub)
+
+    return StreamingResponse(
+        body(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
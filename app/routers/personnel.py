@@ -1,63 +1,125 @@
 # app/routers/personnel.py
 from typing import List, Optional
 
-from fastapi import APIRouter, Depends, HTTPException, Query, status
-from sqlalchemy import select, and_, or_, func
+from fastapi import APIRouter, Depends, HTTPException, Query, Response, status
+from sqlalchemy import select, and_, func
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
-from ..db import get_db
+from .. import suggest
+from ..db import get_async_db, get_db
+from ..lookup import IDS_DESCRIPTION, afetch, check_ids, fetch, lookup_response, parse_ids, report_missing
+from ..replica import get_async_read_db, get_read_db
 from ..models import Personnel
-from ..schemas import PersonnelCreate, PersonnelUpdate, PersonnelOut
+from ..pagination import SortKey, apaginate, paginate
+from ..projection import FIELDS_DESCRIPTION, parse_fields, schema_columns
+from ..responses import rows_response
+from ..search import atext_filter, text_filter
+from ..schemas import PersonnelCreate, PersonnelUpdate, PersonnelOut, PersonnelSuggestionOut, LookupIn, LookupOut
 
 router = APIRouter()
 
+PROJECTABLE = schema_columns(Personnel, PersonnelOut)
+
+# Order by name (case-insensitive). Avoid NULLS LAST for cross-DB portability.
+SORT_KEYS = [
+    SortKey(func.lower(Personnel.full_name)),
+    SortKey(func.lower(Personnel.preferred_name)),
+    SortKey(Personnel.id),
+]
+
+
+SEARCHED = [Personnel.preferred_name, Personnel.full_name]
+
+
+def _search(db: Session, q):
+    return text_filter(db, Personnel.__table__, q, SEARCHED) if q else None
+
+
+async def _asearch(db: AsyncSession, q):
+    return await atext_filter(db, Personnel.__table__, q, SEARCHED) if q else None
+
+
+def _filters(text, status_filter, member_id) -> list:
+    # text: the q= condition from _search / _asearch, or None
+    conds = []
+
+    if text is not None:
+        conds.append(text)
+
+    if status_filter:
+        conds.append(Personnel.status == status_filter)
+
+    if member_id is not None:
+        conds.append(Personnel.member_id == member_id)
+
+    return conds
+
 
 @router.get("/personnel", response_model=List[PersonnelOut])
 def list_personnel(
+    response: Response,
+    fields: Optional[str] = Query(default=None, description=FIELDS_DESCRIPTION),
     q: Optional[str] = Query(
         default=None,
         description="Case-insensitive search across preferred_name and full_name"
     ),
     status_filter: Optional[str] = Query(default=None, alias="status"),
     member_id: Optional[int] = Query(default=None),
+    ids: Optional[str] = Query(default=None, description=IDS_DESCRIPTION),
     limit: int = Query(default=50, ge=1, le=500),
-    offset: int = Query(default=0, ge=0),
-    db: Session = Depends(get_db),
+    offset: int = Query(default=0, ge=0, description="Deprecated: use cursor"),
+    cursor: Optional[str] = Query(default=None, description="X-Next-Cursor value from the previous page"),
+    db: Session = Depends(get_read_db),
 ):
 
-    stmt = select(Personnel)
-    conds = []
+    id_list = parse_ids(ids)
+    projection = parse_fields(fields, PROJECTABLE) or list(PROJECTABLE)
+    stmt = select(*[PROJECTABLE[f] for f in projection])
+    conds = _filters(_search(db, q), status_filter, member_id)
+
+    if conds:
+        stmt = stmt.where(and_(*conds))
 
-    if q:
-        like = f"%{q.lower()}%"
-        conds.append(
-            or_(
-                func.lower(Personnel.preferred_name).like(like),
-                func.lower(Personnel.full_name).like(like),
-            )
-        )
+    if id_list is not None:
+        rows, missing = fetch(db, stmt, Personnel.id, id_list, mappings=True)
+        report_missing(response, missing)
+        return rows_response(rows, response)
 
-    if status_filter:
-        conds.append(Personnel.status == status_filter)
+    rows = paginate(db, stmt, SORT_KEYS, limit=limit, offset=offset, cursor=cursor, response=response, mappings=True)
+    return rows_response(rows, response)
 
-    if member_id is not None:
-        conds.append(Personnel.member_id == member_id)
 
+# POST /v1/personnel:lookup — ?ids= for lists too long for a URL
+@router.post("/personnel:lookup", response_model=LookupOut)
+def lookup_personnel(
+    payload: LookupIn,
+    fields: Optional[str] = Query(default=None, description=FIELDS_DESCRIPTION),
+    q: Optional[str] = Query(default=None, description="Case-insensitive search across preferred_name and full_name"),
+    status_filter: Optional[str] = Query(default=None, alias="status"),
+    member_id: Optional[int] = Query(default=None),
+    db: Session = Depends(get_read_db),
+):
+    projection = parse_fields(fields, PROJECTABLE) or list(PROJECTABLE)
+    stmt = select(*[PROJECTABLE[f] for f in projection])
+    conds = _filters(_search(db, q), status_filter, member_id)
     if conds:
         stmt = stmt.where(and_(*conds))
+    rows, missing = fetch(db, stmt, Personnel.id, check_ids(payload.ids), mappings=True)
+    return lookup_response(rows, missing)
 
-    # Order by name (case-insensitive). Avoid NULLS LAST for cross-DB portability.
-    stmt = stmt.order_by(
-        func.lower(Personnel.full_name).asc(),
-        func.lower(Personnel.preferred_name).asc(),
-        Personnel.id.asc(),
-    ).limit(limit).offset(offset)
 
-    return db.execute(stmt).scalars().all()
+# GET /v1/personnel/suggest — typeahead over names, from memory (see app/suggest.py)
+@router.get("/personnel/suggest", response_model=List[PersonnelSuggestionOut])
+async def suggest_personnel(
+    q: str = Query(min_length=1, description="Start of the full or preferred name, or of any word in them"),
+    limit: int = Query(default=10, ge=1, le=50),
+):
+    return suggest.suggest(suggest.PERSONNEL, q, limit)
 
 
 @router.get("/personnel/{id}", response_model=PersonnelOut)
-def get_personnel(id: int, db: Session = Depends(get_db)):
+def get_personnel(id: int, db: Session = Depends(get_read_db)):
 
     obj = db.get(Personnel, id)
     if not obj:
@@ -100,3 +162,111 @@ def delete_personnel(id: int, db: Session = Depends(get_db)):
     db.delete(obj)
     db.commit()
     return
+
+
+# ---- Async handlers (DB_ASYNC=1, see app/db.py) ----
+# Same routes, in the same order, on an AsyncSession.
+async_router = APIRouter()
+
+
+@async_router.get("/personnel", response_model=List[PersonnelOut])
+async def alist_personnel(
+    response: Response,
+    fields: Optional[str] = Query(default=None, description=FIELDS_DESCRIPTION),
+    q: Optional[str] = Query(
+        default=None,
+        description="Case-insensitive search across preferred_name and full_name"
+    ),
+    status_filter: Optional[str] = Query(default=None, alias="status"),
+    member_id: Optional[int] = Query(default=None),
+    ids: Optional[str] = Query(default=None, description=IDS_DESCRIPTION),
+    limit: int = Query(default=50, ge=1, le=500),
+    offset: int = Query(default=0, ge=0, description="Deprecated: use cursor"),
+    cursor: Optional[str] = Query(default=None, description="X-Next-Cursor value from the previous page"),
+    db: AsyncSession = Depends(get_async_read_db),
+):
+
+    id_list = parse_ids(ids)
+    projection = parse_fields(fields, PROJECTABLE) or list(PROJECTABLE)
+    stmt = select(*[PROJECTABLE[f] for f in projection])
+    conds = _filters(await _asearch(db, q), status_filter, member_id)
+
+    if conds:
+        stmt = stmt.where(and_(*conds))
+
+    if id_list is not None:
+        rows, missing = await afetch(db, stmt, Personnel.id, id_list, mappings=True)
+        report_missing(response, missing)
+        return rows_response(rows, response)
+
+    rows = await apaginate(db, stmt, SORT_KEYS, limit=limit, offset=offset, cursor=cursor, response=response,
+                           mappings=True)
+    return rows_response(rows, response)
+
+
+@async_router.post("/personnel:lookup", response_model=LookupOut)
+async def alookup_personnel(
+    payload: LookupIn,
+    fields: Optional[str] = Query(default=None, description=FIELDS_DESCRIPTION),
+    q: Optional[str] = Query(default=None, description="Case-insensitive search across preferred_name and full_name"),
+    status_filter: Optional[str] = Query(default=None, alias="status"),
+    member_id: Optional[int] = Query(default=None),
+    db: AsyncSession = Depends(get_async_read_db),
+):
+    projection = parse_fields(fields, PROJECTABLE) or list(PROJECTABLE)
+    stmt = select(*[PROJECTABLE[f] for f in projection])
+    conds = _filters(await _asearch(db, q), status_filter, member_id)
+    if conds:
+        stmt = stmt.where(and_(*conds))
+    rows, missing = await afetch(db, stmt, Personnel.id, check_ids(payload.ids), mappings=True)
+    return lookup_response(rows, missing)
+
+
+# No database access: the sync router's handler, registered before /{id} here too
+async_router.get("/personnel/suggest", response_model=List[PersonnelSuggestionOut])(suggest_personnel)
+
+
+@async_router.get("/personnel/{id}", response_model=PersonnelOut)
+async def aget_personnel(id: int, db: AsyncSession = Depends(get_async_read_db)):
+
+    obj = await db.get(Personnel, id)
+    if not obj:
+        raise HTTPException(status_code=404, detail="Personnel record not found")
+    return obj
+
+
+@async_router.post("/personnel", response_model=PersonnelOut, status_code=status.HTTP_201_CREATED)
+async def acreate_personnel(payload: PersonnelCreate, db: AsyncSession = Depends(get_async_db)):
+    values = payload.model_dump(exclude_unset=True)
+    obj = Personnel(**values)
+    db.add(obj)
+    await db.commit()
+    await db.refresh(obj)
+    return obj
+
+
+@async_router.patch("/personnel/{id}", response_model=PersonnelOut)
+async def aupdate_personnel(id: int, payload: PersonnelUpdate, db: AsyncSession = Depends(get_async_db)):
+    obj = await db.get(Personnel, id)
+    if not obj:
+        raise HTTPException(status_code=404, detail="Personnel record not found")
+
+    updates = payload.model_dump(exclude_unset=True)
+    for field, value in updates.items():
+        setattr(obj, field, value)
+
+    db.add(obj)
+    await db.commit()
+    await db.refresh(obj)
+    return obj
+
+
+@async_router.delete("/personnel/{id}", status_code=status.HTTP_204_NO_CONTENT)
+async def adelete_personnel(id: int, db: AsyncSession = Depends(get_async_db)):
+    obj = await db.get(Personnel, id)
+    if not obj:
+        raise HTTPException(status_code=404, detail="Personnel record not found")
+
+    await db.delete(obj)
+    await db.commit()
+    return
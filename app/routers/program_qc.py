@@ -1,30 +1,112 @@
 # app/routers/program_qc.py
 from typing import List, Optional
-from fastapi import APIRouter, Depends, HTTPException, Query, status
-from sqlalchemy import select, func, and_
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response, status
+from sqlalchemy import select, and_, case, func, or_
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session, selectinload
 
-from ..db import get_db
-from ..models import ProgramQC
-from ..schemas import ProgramQCCreate, ProgramQCUpdate, ProgramQCOut
+from .. import suggest
+from ..batch import run_batch
+from ..cache import CachedRoute, cached
+from ..conditional import acheck_not_modified, check_not_modified
+from ..db import get_async_db, get_db
+from ..lookup import IDS_DESCRIPTION, afetch, check_ids, fetch, lookup_response, parse_ids, report_missing
+from ..replica import get_async_read_db, get_read_db
+from ..facets import afacet_counts, facet_counts, parse_facets
+from ..models import ProgramQC, QCComment, QCRollup
+from ..rollup import NO_DELIVERABLE
+from ..pagination import SortKey, apaginate, paginate
+from ..projection import FIELDS_DESCRIPTION, parse_fields, schema_columns
+from ..responses import rows_response
+from ..search import atext_filter, text_filter
+from ..schemas import (
+    ProgramQCCreate, ProgramQCUpdate, ProgramQCOut, ProgramQCBatch, ProgramQCBatchOut,
+    FacetsOut, ProgramQCSummaryOut, DeliverableRollupOut, ProgramQCExpandedOut, ProgramQCSuggestionOut,
+    LookupIn, LookupOut,
+)
 
-router = APIRouter()
+router = APIRouter(route_class=CachedRoute)
 
-@router.get("/program_qc", response_model=List[ProgramQCOut])
-def list_program_qc(
-    q: Optional[str] = Query(default=None, description="Filter by program_name substring"),
-    status_filter: Optional[str] = Query(default=None, alias="status"),
-    assignee: Optional[str] = None,
-    reviewer: Optional[str] = None,
-    deliverable_id: Optional[int] = None,
-    limit: int = Query(default=50, ge=1, le=500),
-    offset: int = Query(default=0, ge=0),
-    db: Session = Depends(get_db),
-):
-    stmt = select(ProgramQC)
-    conds = []
-    if q:
-        conds.append(func.lower(ProgramQC.program_name).like(f"%{q.lower()}%"))
+FACET_FIELDS = {
+    "status": ProgramQC.status,
+    "assignee": ProgramQC.assignee,
+    "reviewer": ProgramQC.reviewer,
+    "deliverable_id": ProgramQC.deliverable_id,
+}
+
+PROJECTABLE = schema_columns(ProgramQC, ProgramQCOut)
+
+INCLUDES = ("deliverable", "comments", "comment_counts")
+
+def _includes(include: Optional[str]) -> List[str]:
+    names = [n.strip() for n in (include or "").split(",") if n.strip()]
+    unknown = [n for n in names if n not in INCLUDES]
+    if unknown:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Unknown include(s): {', '.join(unknown)}; allowed: {', '.join(INCLUDES)}",
+        )
+    return names
+
+def _load_options(includes: List[str]) -> list:
+    # One batched IN query per relationship for the whole page
+    options = []
+    if "deliverable" in includes:
+        options.append(selectinload(ProgramQC.deliverable))
+    if "comments" in includes:
+        options.append(selectinload(ProgramQC.comments))
+    return options
+
+def _counts_query(objs: List[ProgramQC], includes: List[str]):
+    if "comment_counts" not in includes or "comments" in includes or not objs:
+        return None
+    return (
+        select(
+            QCComment.program_qc_id,
+            func.count(),
+            func.sum(case((QCComment.resolved == False, 1), else_=0)),  # noqa: E712
+        )
+        .where(QCComment.program_qc_id.in_([obj.id for obj in objs]))
+        .group_by(QCComment.program_qc_id)
+    )
+
+def _expand(db: Session, objs: List[ProgramQC], includes: List[str]) -> List[dict]:
+    stmt = _counts_query(objs, includes)
+    rows = db.execute(stmt) if stmt is not None else []
+    return _shape(objs, includes, {pid: (total, unresolved) for pid, total, unresolved in rows})
+
+async def _aexpand(db: AsyncSession, objs: List[ProgramQC], includes: List[str]) -> List[dict]:
+    stmt = _counts_query(objs, includes)
+    rows = await db.execute(stmt) if stmt is not None else []
+    return _shape(objs, includes, {pid: (total, unresolved) for pid, total, unresolved in rows})
+
+def _shape(objs: List[ProgramQC], includes: List[str], counts: dict) -> List[dict]:
+    out = []
+    for obj in objs:
+        # Only the requested keys are set, so response_model_exclude_unset drops the rest
+        item = ProgramQCOut.model_validate(obj).model_dump()
+        if "deliverable" in includes:
+            item["deliverable"] = obj.deliverable
+        if "comments" in includes:
+            item["comments"] = obj.comments
+        if "comment_counts" in includes:
+            if "comments" in includes:
+                total, unresolved = len(obj.comments), sum(1 for c in obj.comments if not c.resolved)
+            else:
+                total, unresolved = counts.get(obj.id, (0, 0))
+            item["comment_counts"] = {"total": total, "unresolved": unresolved}
+        out.append(item)
+    return out
+
+def _search(db: Session, q):
+    return text_filter(db, ProgramQC.__table__, q, [ProgramQC.program_name]) if q else None
+
+async def _asearch(db: AsyncSession, q):
+    return await atext_filter(db, ProgramQC.__table__, q, [ProgramQC.program_name]) if q else None
+
+def _filters(text, status_filter, assignee, reviewer, deliverable_id) -> list:
+    # text: the q= condition from _search / _asearch, or None
+    conds = [text] if text is not None else []
     if status_filter:
         conds.append(ProgramQC.status == status_filter)
     if assignee:
@@ -33,17 +115,190 @@ def list_program_qc(
         conds.append(ProgramQC.reviewer == reviewer)
     if deliverable_id is not None:
         conds.append(ProgramQC.deliverable_id == deliverable_id)
+    return conds
+
+def _select(includes: List[str], fields, conds: list):
+    projection = parse_fields(fields, PROJECTABLE)
+    if projection and includes:
+        raise HTTPException(status_code=400, detail="fields= cannot be combined with include=")
+    if includes:  # embedded resources need entities
+        stmt = select(ProgramQC).options(*_load_options(includes))
+    else:
+        stmt = select(*[PROJECTABLE[f] for f in projection or PROJECTABLE])
     if conds:
         stmt = stmt.where(and_(*conds))
-    stmt = stmt.order_by(ProgramQC.created_at.desc()).limit(limit).offset(offset)
-    return db.execute(stmt).scalars().all()
+    return stmt
 
-@router.get("/program_qc/{qc_id}", response_model=ProgramQCOut)
-def get_program_qc(qc_id: int, db: Session = Depends(get_db)):
-    obj = db.get(ProgramQC, qc_id)
+@router.get("/program_qc", response_model=List[ProgramQCExpandedOut], response_model_exclude_unset=True)
+def list_program_qc(
+    response: Response,
+    include: Optional[str] = Query(default=None, description="Comma-separated: " + ", ".join(INCLUDES)),
+    fields: Optional[str] = Query(default=None, description=FIELDS_DESCRIPTION),
+    q: Optional[str] = Query(default=None, description="Filter by program_name substring"),
+    status_filter: Optional[str] = Query(default=None, alias="status"),
+    assignee: Optional[str] = None,
+    reviewer: Optional[str] = None,
+    deliverable_id: Optional[int] = None,
+    ids: Optional[str] = Query(default=None, description=IDS_DESCRIPTION),
+    limit: int = Query(default=50, ge=1, le=500),
+    offset: int = Query(default=0, ge=0, description="Deprecated: use cursor"),
+    cursor: Optional[str] = Query(default=None, description="X-Next-Cursor value from the previous page"),
+    db: Session = Depends(get_read_db),
+):
+    includes = _includes(include)
+    id_list = parse_ids(ids)
+    stmt = _select(includes, fields, _filters(_search(db, q), status_filter, assignee, reviewer, deliverable_id))
+    if id_list is not None:
+        rows, missing = fetch(db, stmt, ProgramQC.id, id_list, mappings=not includes)
+        report_missing(response, missing)
+        return _expand(db, rows, includes) if includes else rows_response(rows, response)
+    keys = [SortKey(ProgramQC.created_at, desc=True), SortKey(ProgramQC.id, desc=True)]
+    if not includes:
+        rows = paginate(db, stmt, keys, limit=limit, offset=offset, cursor=cursor, response=response, mappings=True)
+        return rows_response(rows, response)
+    page = paginate(db, stmt, keys, limit=limit, offset=offset, cursor=cursor, response=response)
+    return _expand(db, page, includes)
+
+# POST /v1/program_qc:lookup — ?ids= for lists too long for a URL
+@router.post("/program_qc:lookup", response_model=LookupOut)
+def lookup_program_qc(
+    payload: LookupIn,
+    include: Optional[str] = Query(default=None, description="Comma-separated: " + ", ".join(INCLUDES)),
+    fields: Optional[str] = Query(default=None, description=FIELDS_DESCRIPTION),
+    q: Optional[str] = Query(default=None, description="Filter by program_name substring"),
+    status_filter: Optional[str] = Query(default=None, alias="status"),
+    assignee: Optional[str] = None,
+    reviewer: Optional[str] = None,
+    deliverable_id: Optional[int] = None,
+    db: Session = Depends(get_read_db),
+):
+    includes = _includes(include)
+    stmt = _select(includes, fields, _filters(_search(db, q), status_filter, assignee, reviewer, deliverable_id))
+    rows, missing = fetch(db, stmt, ProgramQC.id, check_ids(payload.ids), mappings=not includes)
+    if includes:
+        rows = [ProgramQCExpandedOut.model_validate(item).model_dump(exclude_unset=True)
+                for item in _expand(db, rows, includes)]
+    return lookup_response(rows, missing)
+
+# GET /v1/program_qc/facets — grouped counts for the same filters as the list
+@router.get("/program_qc/facets", response_model=FacetsOut)
+@cached("program_qc")
+def program_qc_facets(
+    request: Request,
+    response: Response,
+    facets: str = Query(default="status,assignee,reviewer", description="Comma-separated: " + ", ".join(FACET_FIELDS)),
+    q: Optional[str] = Query(default=None, description="Filter by program_name substring"),
+    status_filter: Optional[str] = Query(default=None, alias="status"),
+    assignee: Optional[str] = None,
+    reviewer: Optional[str] = None,
+    deliverable_id: Optional[int] = None,
+    db: Session = Depends(get_read_db),
+):
+    fields = parse_facets(facets, FACET_FIELDS)
+    check_not_modified(request, response, db, "program_qc")
+    conds = _filters(_search(db, q), status_filter, assignee, reviewer, deliverable_id)
+    return facet_counts(db, ProgramQC, FACET_FIELDS, fields, conds)
+
+# GET /v1/program_qc/summary — QC dashboard aggregates, one GROUP BY each
+@router.get("/program_qc/summary", response_model=ProgramQCSummaryOut)
+@cached("program_qc", "qc_comments")
+def program_qc_summary(
+    request: Request,
+    response: Response,
+    deliverable_id: Optional[int] = Query(default=None, description="Limit to one deliverable"),
+    db: Session = Depends(get_read_db),
+):
+    check_not_modified(request, response, db, "program_qc", "qc_comments")
+    return {key: [row._mapping for row in db.execute(stmt)] for key, stmt in _summary_queries(deliverable_id).items()}
+
+def _summary_queries(deliverable_id: Optional[int]) -> dict:
+    scope = [ProgramQC.deliverable_id == deliverable_id] if deliverable_id is not None else []
+
+    by_deliverable = (
+        select(ProgramQC.deliverable_id, ProgramQC.status, func.count().label("count"))
+        .where(*scope)
+        .group_by(ProgramQC.deliverable_id, ProgramQC.status)
+        .order_by(ProgramQC.deliverable_id, ProgramQC.status)
+    )
+
+    comments = (
+        select(
+            QCComment.program_qc_id,
+            func.sum(case((QCComment.resolved == False, 1), else_=0)).label("open"),  # noqa: E712
+            func.sum(case((QCComment.resolved == True, 1), else_=0)).label("resolved"),  # noqa: E712
+        )
+        .group_by(QCComment.program_qc_id)
+        .order_by(QCComment.program_qc_id)
+    )
+    if scope:
+        comments = comments.join(ProgramQC, ProgramQC.id == QCComment.program_qc_id).where(*scope)
+
+    is_open = or_(ProgramQC.status.is_(None), ProgramQC.status != "Complete")
+    workload = (
+        select(
+            ProgramQC.reviewer,
+            func.count().label("total"),
+            func.sum(case((is_open, 1), else_=0)).label("open"),
+        )
+        .where(*scope)
+        .group_by(ProgramQC.reviewer)
+        .order_by(ProgramQC.reviewer)
+    )
+
+    return {
+        "status_by_deliverable": by_deliverable,
+        "comments_by_program": comments,
+        "reviewer_workload": workload,
+    }
+
+# GET /v1/program_qc/portfolio — per-deliverable QC progress from the qc_rollups table
+@router.get("/program_qc/portfolio", response_model=List[DeliverableRollupOut])
+def program_qc_portfolio(
+    deliverable_id: Optional[int] = Query(default=None, description="Limit to one deliverable"),
+    db: Session = Depends(get_read_db),
+):
+    return _portfolio(db.execute(_portfolio_query(deliverable_id)).scalars())
+
+def _portfolio_query(deliverable_id: Optional[int]):
+    stmt = select(QCRollup).order_by(QCRollup.deliverable_id, QCRollup.status)
+    if deliverable_id is not None:
+        stmt = stmt.where(QCRollup.deliverable_id == deliverable_id)
+    return stmt
+
+def _portfolio(rollups) -> List[dict]:
+    out = {}
+    for row in rollups:
+        item = out.setdefault(row.deliverable_id, {
+            "deliverable_id": None if row.deliverable_id == NO_DELIVERABLE else row.deliverable_id,
+            "programs_by_status": {}, "program_count": 0, "unresolved_comments": 0, "last_activity_at": None,
+        })
+        if row.program_count:
+            item["programs_by_status"][row.status] = row.program_count
+        item["program_count"] += row.program_count
+        item["unresolved_comments"] += row.unresolved_comments
+        if row.last_activity_at and (item["last_activity_at"] is None or row.last_activity_at > item["last_activity_at"]):
+            item["last_activity_at"] = row.last_activity_at
+    return [item for item in out.values() if item["program_count"] or item["unresolved_comments"]]
+
+# GET /v1/program_qc/suggest — typeahead over program names, from memory (see app/suggest.py)
+@router.get("/program_qc/suggest", response_model=List[ProgramQCSuggestionOut])
+async def suggest_program_qc(
+    q: str = Query(min_length=1, description="Start of the program name or of any word in it"),
+    limit: int = Query(default=10, ge=1, le=50),
+):
+    return suggest.suggest(suggest.PROGRAMS, q, limit)
+
+@router.get("/program_qc/{qc_id}", response_model=ProgramQCExpandedOut, response_model_exclude_unset=True)
+def get_program_qc(
+    qc_id: int,
+    include: Optional[str] = Query(default=None, description="Comma-separated: " + ", ".join(INCLUDES)),
+    db: Session = Depends(get_read_db),
+):
+    includes = _includes(include)
+    obj = db.get(ProgramQC, qc_id, options=_load_options(includes))
     if not obj:
         raise HTTPException(status_code=404, detail="ProgramQC not found")
-    return obj
+    return _expand(db, [obj], includes)[0]
 
 @router.post("/program_qc", response_model=ProgramQCOut, status_code=status.HTTP_201_CREATED)
 def create_program_qc(payload: ProgramQCCreate, db: Session = Depends(get_db)):
@@ -88,4 +343,171 @@ def delete_program_qc(qc_id: int, db: Session = Depends(get_db)):
         raise HTTPException(status_code=404, detail="ProgramQC not found")
     db.delete(obj)
     db.commit()
-    return
\ No newline at end of file
+    return
+
+@router.post("/program_qc:batch", response_model=ProgramQCBatchOut)
+def batch_program_qc(payload: ProgramQCBatch, db: Session = Depends(get_db)):
+    creates = [item.model_dump() for item in payload.create]
+    # Same semantics as PATCH: fields left out or null are not changed
+    updates = [item.model_dump(exclude_none=True) for item in payload.update]
+    return {"results": run_batch(db, ProgramQC, creates, updates, payload.delete)}
+
+
+# ---- Async handlers (DB_ASYNC=1, see app/db.py) ----
+# Same routes, in the same order, on an AsyncSession.
+async_router = APIRouter(route_class=CachedRoute)
+
+@async_router.get("/program_qc", response_model=List[ProgramQCExpandedOut], response_model_exclude_unset=True)
+async def alist_program_qc(
+    response: Response,
+    include: Optional[str] = Query(default=None, description="Comma-separated: " + ", ".join(INCLUDES)),
+    fields: Optional[str] = Query(default=None, description=FIELDS_DESCRIPTION),
+    q: Optional[str] = Query(default=None, description="Filter by program_name substring"),
+    status_filter: Optional[str] = Query(default=None, alias="status"),
+    assignee: Optional[str] = None,
+    reviewer: Optional[str] = None,
+    deliverable_id: Optional[int] = None,
+    ids: Optional[str] = Query(default=None, description=IDS_DESCRIPTION),
+    limit: int = Query(default=50, ge=1, le=500),
+    offset: int = Query(default=0, ge=0, description="Deprecated: use cursor"),
+    cursor: Optional[str] = Query(default=None, description="X-Next-Cursor value from the previous page"),
+    db: AsyncSession = Depends(get_async_read_db),
+):
+    includes = _includes(include)
+    id_list = parse_ids(ids)
+    stmt = _select(includes, fields, _filters(await _asearch(db, q), status_filter, assignee, reviewer, deliverable_id))
+    if id_list is not None:
+        rows, missing = await afetch(db, stmt, ProgramQC.id, id_list, mappings=not includes)
+        report_missing(response, missing)
+        return await _aexpand(db, rows, includes) if includes else rows_response(rows, response)
+    keys = [SortKey(ProgramQC.created_at, desc=True), SortKey(ProgramQC.id, desc=True)]
+    if not includes:
+        rows = await apaginate(db, stmt, keys, limit=limit, offset=offset, cursor=cursor, response=response,
+                               mappings=True)
+        return rows_response(rows, response)
+    page = await apaginate(db, stmt, keys, limit=limit, offset=offset, cursor=cursor, response=response)
+    return await _aexpand(db, page, includes)
+
+@async_router.post("/program_qc:lookup", response_model=LookupOut)
+async def alookup_program_qc(
+    payload: LookupIn,
+    include: Optional[str] = Query(default=None, description="Comma-separated: " + ", ".join(INCLUDES)),
+    fields: Optional[str] = Query(default=None, description=FIELDS_DESCRIPTION),
+    q: Optional[str] = Query(default=None, description="Filter by program_name substring"),
+    status_filter: Optional[str] = Query(default=None, alias="status"),
+    assignee: Optional[str] = None,
+    reviewer: Optional[str] = None,
+    deliverable_id: Optional[int] = None,
+    db: AsyncSession = Depends(get_async_read_db),
+):
+    includes = _includes(include)
+    stmt = _select(includes, fields, _filters(await _asearch(db, q), status_filter, assignee, reviewer, deliverable_id))
+    rows, missing = await afetch(db, stmt, ProgramQC.id, check_ids(payload.ids), mappings=not includes)
+    if includes:
+        rows = [ProgramQCExpandedOut.model_validate(item).model_dump(exclude_unset=True)
+                for item in await _aexpand(db, rows, includes)]
+    return lookup_response(rows, missing)
+
+@async_router.get("/program_qc/facets", response_model=FacetsOut)
+@cached("program_qc")
+async def aprogram_qc_facets(
+    request: Request,
+    response: Response,
+    facets: str = Query(default="status,assignee,reviewer", description="Comma-separated: " + ", ".join(FACET_FIELDS)),
+    q: Optional[str] = Query(default=None, description="Filter by program_name substring"),
+    status_filter: Optional[str] = Query(default=None, alias="status"),
+    assignee: Optional[str] = None,
+    reviewer: Optional[str] = None,
+    deliverable_id: Optional[int] = None,
+    db: AsyncSession = Depends(get_async_read_db),
+):
+    fields = parse_facets(facets, FACET_FIELDS)
+    await acheck_not_modified(request, response, db, "program_qc")
+    conds = _filters(await _asearch(db, q), status_filter, assignee, reviewer, deliverable_id)
+    return await afacet_counts(db, ProgramQC, FACET_FIELDS, fields, conds)
+
+@async_router.get("/program_qc/summary", response_model=ProgramQCSummaryOut)
+@cached("program_qc", "qc_comments")
+async def aprogram_qc_summary(
+    request: Request,
+    response: Response,
+    deliverable_id: Optional[int] = Query(default=None, description="Limit to one deliverable"),
+    db: AsyncSession = Depends(get_async_read_db),
+):
+    await acheck_not_modified(request, response, db, "program_qc", "qc_comments")
+    return {key: [row._mapping for row in await db.execute(stmt)]
+            for key, stmt in _summary_queries(deliverable_id).items()}
+
+@async_router.get("/program_qc/portfolio", response_model=List[DeliverableRollupOut])
+async def aprogram_qc_portfolio(
+    deliverable_id: Optional[int] = Query(default=None, description="Limit to one deliverable"),
+    db: AsyncSession = Depends(get_async_read_db),
+):
+    return _portfolio((await db.execute(_portfolio_query(deliverable_id))).scalars())
+
+# No database access: the sync router's handler, registered before /{qc_id} here too
+async_router.get("/program_qc/suggest", response_model=List[ProgramQCSuggestionOut])(suggest_program_qc)
+
+@async_router.get("/program_qc/{qc_id}", response_model=ProgramQCExpandedOut, response_model_exclude_unset=True)
+async def aget_program_qc(
+    qc_id: int,
+    include: Optional[str] = Query(default=None, description="Comma-separated: " + ", ".join(INCLUDES)),
+    db: AsyncSession = Depends(get_async_read_db),
+):
+    includes = _includes(include)
+    obj = await db.get(ProgramQC, qc_id, options=_load_options(includes))
+    if not obj:
+        raise HTTPException(status_code=404, detail="ProgramQC not found")
+    return (await _aexpand(db, [obj], includes))[0]
+
+@async_router.post("/program_qc", response_model=ProgramQCOut, status_code=status.HTTP_201_CREATED)
+async def acreate_program_qc(payload: ProgramQCCreate, db: AsyncSession = Depends(get_async_db)):
+    obj = ProgramQC(
+        program_name=payload.program_name,
+        status=payload.status,
+        assignee=payload.assignee,
+        reviewer=payload.reviewer,
+        deliverable_id=payload.deliverable_id,
+    )
+    db.add(obj)
+    await db.commit()
+    await db.refresh(obj)
+    return obj
+
+@async_router.patch("/program_qc/{qc_id}", response_model=ProgramQCOut)
+async def aupdate_program_qc(qc_id: int, payload: ProgramQCUpdate, db: AsyncSession = Depends(get_async_db)):
+    obj = await db.get(ProgramQC, qc_id)
+    if not obj:
+        raise HTTPException(status_code=404, detail="ProgramQC not found")
+
+    if payload.program_name is not None:
+        obj.program_name = payload.program_name
+    if payload.status is not None:
+        obj.status = payload.status
+    if payload.assignee is not None:
+        obj.assignee = payload.assignee
+    if payload.reviewer is not None:
+        obj.reviewer = payload.reviewer
+    if payload.deliverable_id is not None:
+        obj.deliverable_id = payload.deliverable_id
+
+    db.add(obj)
+    await db.commit()
+    await db.refresh(obj)
+    return obj
+
+@async_router.delete("/program_qc/{qc_id}", status_code=status.HTTP_204_NO_CONTENT)
+async def adelete_program_qc(qc_id: int, db: AsyncSession = Depends(get_async_db)):
+    obj = await db.get(ProgramQC, qc_id)
+    if not obj:
+        raise HTTPException(status_code=404, detail="ProgramQC not found")
+    await db.delete(obj)
+    await db.commit()
+    return
+
+@async_router.post("/program_qc:batch", response_model=ProgramQCBatchOut)
+async def abatch_program_qc(payload: ProgramQCBatch, db: AsyncSession = Depends(get_async_db)):
+    creates = [item.model_dump() for item in payload.create]
+    updates = [item.model_dump(exclude_none=True) for item in payload.update]
+    # run_batch is a handful of set-based statements; it runs in the session's greenlet
+    return {"results": await db.run_sync(run_batch, ProgramQC, creates, updates, payload.delete)}
@@ -1,45 +1,119 @@
 # app/routers/qc_comments.py
 from typing import List, Optional
-from fastapi import APIRouter, Depends, HTTPException, Query, status
-from sqlalchemy import select, func, and_, or_
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response, status
+from sqlalchemy import select, and_
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
-from ..db import get_db
+from ..batch import run_batch
+from ..cache import CachedRoute, cached
+from ..conditional import acheck_not_modified, check_not_modified
+from ..db import get_async_db, get_db
+from ..lookup import IDS_DESCRIPTION, afetch, check_ids, fetch, lookup_response, parse_ids, report_missing
+from ..replica import get_async_read_db, get_read_db
+from ..facets import afacet_counts, facet_counts, parse_facets
 from ..models import QCComment
-from ..schemas import QCCommentCreate, QCCommentUpdate, QCCommentOut
+from ..pagination import SortKey, apaginate, paginate
+from ..projection import FIELDS_DESCRIPTION, parse_fields, schema_columns
+from ..responses import rows_response
+from ..search import atext_filter, text_filter
+from ..schemas import (
+    QCCommentCreate, QCCommentUpdate, QCCommentOut, QCCommentBatch, QCCommentBatchOut,
+    FacetsOut, LookupIn, LookupOut,
+)
 
-router = APIRouter()
+router = APIRouter(route_class=CachedRoute)
 
-@router.get("/qc_comments", response_model=List[QCCommentOut])
-def list_qc_comments(
-    program_qc_id: Optional[int] = Query(default=None),
-    resolved: Optional[bool] = Query(default=None),
-    q: Optional[str] = Query(default=None, description="Filter by author or comment_text"),
-    limit: int = Query(default=50, ge=1, le=500),
-    offset: int = Query(default=0, ge=0),
-    db: Session = Depends(get_db),
-):
-    stmt = select(QCComment)
+PROJECTABLE = schema_columns(QCComment, QCCommentOut)
+
+FACET_FIELDS = {
+    "resolved": QCComment.resolved,
+    "author": QCComment.author,
+    "program_qc_id": QCComment.program_qc_id,
+}
+
+SEARCHED = [QCComment.author, QCComment.comment_text]
+
+def _search(db: Session, q):
+    return text_filter(db, QCComment.__table__, q, SEARCHED) if q else None
+
+async def _asearch(db: AsyncSession, q):
+    return await atext_filter(db, QCComment.__table__, q, SEARCHED) if q else None
+
+def _filters(program_qc_id, resolved, text) -> list:
+    # text: the q= condition from _search / _asearch, or None
     conds = []
     if program_qc_id is not None:
         conds.append(QCComment.program_qc_id == program_qc_id)
     if resolved is not None:
         conds.append(QCComment.resolved == resolved)
-    if q:
-        like = f"%{q.lower()}%"
-        conds.append(
-            or_(
-                func.lower(QCComment.author).like(like),
-                func.lower(QCComment.comment_text).like(like),
-            )
-        )
+    if text is not None:
+        conds.append(text)
+    return conds
+
+def _select(fields, conds: list):
+    projection = parse_fields(fields, PROJECTABLE) or list(PROJECTABLE)
+    stmt = select(*[PROJECTABLE[f] for f in projection])
     if conds:
         stmt = stmt.where(and_(*conds))
-    stmt = stmt.order_by(QCComment.created_at.desc()).limit(limit).offset(offset)
-    return db.execute(stmt).scalars().all()
+    return stmt
+
+@router.get("/qc_comments", response_model=List[QCCommentOut])
+def list_qc_comments(
+    response: Response,
+    fields: Optional[str] = Query(default=None, description=FIELDS_DESCRIPTION),
+    program_qc_id: Optional[int] = Query(default=None),
+    resolved: Optional[bool] = Query(default=None),
+    q: Optional[str] = Query(default=None, description="Filter by author or comment_text"),
+    ids: Optional[str] = Query(default=None, description=IDS_DESCRIPTION),
+    limit: int = Query(default=50, ge=1, le=500),
+    offset: int = Query(default=0, ge=0, description="Deprecated: use cursor"),
+    cursor: Optional[str] = Query(default=None, description="X-Next-Cursor value from the previous page"),
+    db: Session = Depends(get_read_db),
+):
+    id_list = parse_ids(ids)
+    stmt = _select(fields, _filters(program_qc_id, resolved, _search(db, q)))
+    if id_list is not None:
+        rows, missing = fetch(db, stmt, QCComment.id, id_list, mappings=True)
+        report_missing(response, missing)
+        return rows_response(rows, response)
+    keys = [SortKey(QCComment.created_at, desc=True), SortKey(QCComment.id, desc=True)]
+    rows = paginate(db, stmt, keys, limit=limit, offset=offset, cursor=cursor, response=response, mappings=True)
+    return rows_response(rows, response)
+
+# POST /v1/qc_comments:lookup — ?ids= for lists too long for a URL
+@router.post("/qc_comments:lookup", response_model=LookupOut)
+def lookup_qc_comments(
+    payload: LookupIn,
+    fields: Optional[str] = Query(default=None, description=FIELDS_DESCRIPTION),
+    program_qc_id: Optional[int] = Query(default=None),
+    resolved: Optional[bool] = Query(default=None),
+    q: Optional[str] = Query(default=None, description="Filter by author or comment_text"),
+    db: Session = Depends(get_read_db),
+):
+    stmt = _select(fields, _filters(program_qc_id, resolved, _search(db, q)))
+    rows, missing = fetch(db, stmt, QCComment.id, check_ids(payload.ids), mappings=True)
+    return lookup_response(rows, missing)
+
+# GET /v1/qc_comments/facets — grouped counts for the same filters as the list
+@router.get("/qc_comments/facets", response_model=FacetsOut)
+@cached("qc_comments")
+def qc_comment_facets(
+    request: Request,
+    response: Response,
+    facets: str = Query(default="resolved,author", description="Comma-separated: " + ", ".join(FACET_FIELDS)),
+    program_qc_id: Optional[int] = Query(default=None),
+    resolved: Optional[bool] = Query(default=None),
+    q: Optional[str] = Query(default=None, description="Filter by author or comment_text"),
+    db: Session = Depends(get_read_db),
+):
+    fields = parse_facets(facets, FACET_FIELDS)
+    check_not_modified(request, response, db, "qc_comments")
+    conds = _filters(program_qc_id, resolved, _search(db, q))
+    return facet_counts(db, QCComment, FACET_FIELDS, fields, conds)
 
 @router.get("/qc_comments/{comment_id}", response_model=QCCommentOut)
-def get_qc_comment(comment_id: int, db: Session = Depends(get_db)):
+def get_qc_comment(comment_id: int, db: Session = Depends(get_read_db)):
     obj = db.get(QCComment, comment_id)
     if not obj:
         raise HTTPException(status_code=404, detail="QCComment not found")
@@ -83,4 +157,129 @@ def delete_qc_comment(comment_id: int, db: Session = Depends(get_db)):
         raise HTTPException(status_code=404, detail="QCComment not found")
     db.delete(obj)
     db.commit()
-    return
\ No newline at end of file
+    return
+
+@router.post("/qc_comments:batch", response_model=QCCommentBatchOut)
+def batch_qc_comments(payload: QCCommentBatch, db: Session = Depends(get_db)):
+    creates = [
+        {**item.model_dump(), "resolved": bool(item.resolved)}
+        for item in payload.create
+    ]
+    # Same semantics as PATCH: fields left out or null are not changed
+    updates = [item.model_dump(exclude_none=True) for item in payload.update]
+    return {"results": run_batch(db, QCComment, creates, updates, payload.delete)}
+
+
+# ---- Async handlers (DB_ASYNC=1, see app/db.py) ----
+# Same routes, in the same order, on an AsyncSession.
+async_router = APIRouter(route_class=CachedRoute)
+
+@async_router.get("/qc_comments", response_model=List[QCCommentOut])
+async def alist_qc_comments(
+    response: Response,
+    fields: Optional[str] = Query(default=None, description=FIELDS_DESCRIPTION),
+    program_qc_id: Optional[int] = Query(default=None),
+    resolved: Optional[bool] = Query(default=None),
+    q: Optional[str] = Query(default=None, description="Filter by author or comment_text"),
+    ids: Optional[str] = Query(default=None, description=IDS_DESCRIPTION),
+    limit: int = Query(default=50, ge=1, le=500),
+    offset: int = Query(default=0, ge=0, description="Deprecated: use cursor"),
+    cursor: Optional[str] = Query(default=None, description="X-Next-Cursor value from the previous page"),
+    db: AsyncSession = Depends(get_async_read_db),
+):
+    id_list = parse_ids(ids)
+    stmt = _select(fields, _filters(program_qc_id, resolved, await _asearch(db, q)))
+    if id_list is not None:
+        rows, missing = await afetch(db, stmt, QCComment.id, id_list, mappings=True)
+        report_missing(response, missing)
+        return rows_response(rows, response)
+    keys = [SortKey(QCComment.created_at, desc=True), SortKey(QCComment.id, desc=True)]
+    rows = await apaginate(db, stmt, keys, limit=limit, offset=offset, cursor=cursor, response=response,
+                           mappings=True)
+    return rows_response(rows, response)
+
+@async_router.post("/qc_comments:lookup", response_model=LookupOut)
+async def alookup_qc_comments(
+    payload: LookupIn,
+    fields: Optional[str] = Query(default=None, description=FIELDS_DESCRIPTION),
+    program_qc_id: Optional[int] = Query(default=None),
+    resolved: Optional[bool] = Query(default=None),
+    q: Optional[str] = Query(default=None, description="Filter by author or comment_text"),
+    db: AsyncSession = Depends(get_async_read_db),
+):
+    stmt = _select(fields, _filters(program_qc_id, resolved, await _asearch(db, q)))
+    rows, missing = await afetch(db, stmt, QCComment.id, check_ids(payload.ids), mappings=True)
+    return lookup_response(rows, missing)
+
+@async_router.get("/qc_comments/facets", response_model=FacetsOut)
+@cached("qc_comments")
+async def aqc_comment_facets(
+    request: Request,
+    response: Response,
+    facets: str = Query(default="resolved,author", description="Comma-separated: " + ", ".join(FACET_FIELDS)),
+    program_qc_id: Optional[int] = Query(default=None),
+    resolved: Optional[bool] = Query(default=None),
+    q: Optional[str] = Query(default=None, description="Filter by author or comment_text"),
+    db: AsyncSession = Depends(get_async_read_db),
+):
+    fields = parse_facets(facets, FACET_FIELDS)
+    await acheck_not_modified(request, response, db, "qc_comments")
+    conds = _filters(program_qc_id, resolved, await _asearch(db, q))
+    return await afacet_counts(db, QCComment, FACET_FIELDS, fields, conds)
+
+@async_router.get("/qc_comments/{comment_id}", response_model=QCCommentOut)
+async def aget_qc_comment(comment_id: int, db: AsyncSession = Depends(get_async_read_db)):
+    obj = await db.get(QCComment, comment_id)
+    if not obj:
+        raise HTTPException(status_code=404, detail="QCComment not found")
+    return obj
+
+@async_router.post("/qc_comments", response_model=QCCommentOut, status_code=status.HTTP_201_CREATED)
+async def acreate_qc_comment(payload: QCCommentCreate, db: AsyncSession = Depends(get_async_db)):
+    obj = QCComment(
+        program_qc_id=payload.program_qc_id,
+        author=payload.author,
+        comment_text=payload.comment_text,
+        resolved=bool(payload.resolved) if payload.resolved is not None else False,
+    )
+    db.add(obj)
+    await db.commit()
+    await db.refresh(obj)
+    return obj
+
+@async_router.patch("/qc_comments/{comment_id}", response_model=QCCommentOut)
+async def aupdate_qc_comment(comment_id: int, payload: QCCommentUpdate, db: AsyncSession = Depends(get_async_db)):
+    obj = await db.get(QCComment, comment_id)
+    if not obj:
+        raise HTTPException(status_code=404, detail="QCComment not found")
+
+    if payload.author is not None:
+        obj.author = payload.author
+    if payload.comment_text is not None:
+        obj.comment_text = payload.comment_text
+    if payload.resolved is not None:
+        obj.resolved = payload.resolved
+
+    db.add(obj)
+    await db.commit()
+    await db.refresh(obj)
+    return obj
+
+@async_router.delete("/qc_comments/{comment_id}", status_code=status.HTTP_204_NO_CONTENT)
+async def adelete_qc_comment(comment_id: int, db: AsyncSession = Depends(get_async_db)):
+    obj = await db.get(QCComment, comment_id)
+    if not obj:
+        raise HTTPException(status_code=404, detail="QCComment not found")
+    await db.delete(obj)
+    await db.commit()
+    return
+
+@async_router.post("/qc_comments:batch", response_model=QCCommentBatchOut)
+async def abatch_qc_comments(payload: QCCommentBatch, db: AsyncSession = Depends(get_async_db)):
+    creates = [
+        {**item.model_dump(), "resolved": bool(item.resolved)}
+        for item in payload.create
+    ]
+    updates = [item.model_dump(exclude_none=True) for item in payload.update]
+    # run_batch is a handful of set-based statements; it runs in the session's greenlet
+    return {"results": await db.run_sync(run_batch, QCComment, creates, updates, payload.delete)}
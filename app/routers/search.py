@@ -0,0 +1,67 @@
+# app/routers/search.py
+from typing import List
+
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from ..replica import get_async_read_db, get_read_db
+from ..models import Personnel, ProgramQC, QCComment, TOCItem
+from ..schemas import SearchHitOut
+from ..search import TRACKER_INDEXES, aranked, atext_filter, ranked, text_filter
+
+router = APIRouter()
+
+SEARCHABLE = {model.__tablename__: model for model in (QCComment, ProgramQC, TOCItem, Personnel)}
+
+
+# GET /v1/search — relevance-ranked ids for one entity (prefix match on every word)
+@router.get("/search", response_model=List[SearchHitOut])
+def search_entity(
+    q: str = Query(..., min_length=1),
+    entity: str = Query(..., description="One of: " + ", ".join(SEARCHABLE)),
+    limit: int = Query(default=20, ge=1, le=200),
+    db: Session = Depends(get_read_db),
+):
+    table = _table(entity)
+    hits = ranked(db, table, q, limit)
+    if hits is None:
+        # No full-text index, or one that cannot answer q: unranked LIKE scan, newest ids first
+        stmt = _scan(table, text_filter(db, table, q, _columns(table, entity)), limit)
+        hits = [(row_id, 0.0) for row_id in db.execute(stmt).scalars()]
+    return [{"entity": entity, "id": row_id, "score": score} for row_id, score in hits]
+
+
+def _table(entity: str):
+    model = SEARCHABLE.get(entity)
+    if model is None:
+        raise HTTPException(status_code=404, detail="Entity not searchable")
+    return model.__table__
+
+
+def _columns(table, entity: str) -> list:
+    return [table.c[c] for c in TRACKER_INDEXES[entity]]
+
+
+def _scan(table, condition, limit: int):
+    return select(table.c.id).where(condition).order_by(table.c.id.desc()).limit(limit)
+
+
+# ---- Async handlers (DB_ASYNC=1, see app/db.py) ----
+async_router = APIRouter()
+
+
+@async_router.get("/search", response_model=List[SearchHitOut])
+async def asearch_entity(
+    q: str = Query(..., min_length=1),
+    entity: str = Query(..., description="One of: " + ", ".join(SEARCHABLE)),
+    limit: int = Query(default=20, ge=1, le=200),
+    db: AsyncSession = Depends(get_async_read_db),
+):
+    table = _table(entity)
+    hits = await aranked(db, table, q, limit)
+    if hits is None:
+        stmt = _scan(table, await atext_filter(db, table, q, _columns(table, entity)), limit)
+        hits = [(row_id, 0.0) for row_id in (await db.execute(stmt)).scalars()]
+    return [{"entity": entity, "id": row_id, "score": score} for row_id, score in hits]
@@ -1,44 +1,106 @@
 
 from typing import List, Optional
-from fastapi import APIRouter, Depends, HTTPException, Query
-from sqlalchemy import select, or_, func
+from fastapi import APIRouter, Depends, Query, Request, Response
+from sqlalchemy import and_, select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
-from sqlalchemy import Table, MetaData
 
-from ..db import get_db
+from ..cache import CachedRoute, cached
+from ..conditional import SPECS, acheck_not_modified, check_not_modified
+from ..db import get_async_db, get_db
+from ..replica import get_async_read_db, get_read_db
 from ..models import SpecTable, SpecDataset, Metadata
+from ..spec_registry import registry
+from ..pagination import apaginate, paginate
+from ..spec_query import parse_filters, parse_sort, visible_columns
+from ..streaming import astream_rows, negotiate, page_response, stream_rows
+from ..search import atext_filter, is_text, text_filter
+from ..projection import FIELDS_DESCRIPTION, parse_fields, table_columns
+from ..responses import rows_response
 
-router = APIRouter()
+router = APIRouter(route_class=CachedRoute)
+
+SPEC_PAGE_DEFAULT = 500
+SPEC_PAGE_MAX = 5000
+SORT_DESCRIPTION = "Comma-separated columns, '-' prefix for descending (e.g. data_set,-variable)"
 
 # GET /v1/specs — returns table_name values from spec_tables
 @router.get("/specs", response_model=List[str])
-def list_spec_tables(db: Session = Depends(get_db)):
+@cached(SPECS)
+def list_spec_tables(request: Request, response: Response, db: Session = Depends(get_read_db)):
+    check_not_modified(request, response, db, SPECS)
     stmt = select(SpecTable.table_name)
     return [row[0] for row in db.execute(stmt).all()]
 
 # GET /v1/specs/datasets — returns dataset names from spec_datasets
 @router.get("/specs/datasets", response_model=List[str])
-def list_datasets(db: Session = Depends(get_db)):
+@cached(SPECS)
+def list_datasets(request: Request, response: Response, db: Session = Depends(get_read_db)):
+    check_not_modified(request, response, db, SPECS)
     stmt = select(SpecDataset.dataset_name)
     return [row[0] for row in db.execute(stmt).all()]
 
-# GET /v1/specs/datasets/{dataset} — returns rows from the dataset table
-@router.get("/specs/datasets/{dataset}")
-def get_dataset_rows(dataset: str, db: Session = Depends(get_db)):
-    # Validate dataset exists
-    allowed = db.execute(select(SpecDataset.dataset_name)).scalars().all()
-    if dataset not in allowed:
-        raise HTTPException(status_code=404, detail="Dataset not found")
+# POST /v1/specs/reload — drop cached whitelists/reflections (admin, after a manual load)
+@router.post("/specs/reload")
+def reload_specs(db: Session = Depends(get_db)):
+    registry.refresh(db, force=True)
+    return {"tables": len(registry.table_names), "datasets": len(registry.dataset_names)}
+
+def _select(request: Request, target_table, fields: Optional[str], conds: list):
+    columns = visible_columns(target_table)
+    projection = parse_fields(fields, [c.name for c in columns])
+    conds = conds + parse_filters(request.query_params, target_table)
+    stmt = select(*(table_columns(target_table, projection) if projection else columns))
+    return stmt.where(and_(*conds)) if conds else stmt
 
-    metadata_obj = MetaData()
-    target_table = Table(dataset, metadata_obj, autoload_with=db.bind)
+def _rows(db: Session, request: Request, response: Response, target_table, fields: Optional[str],
+          conds: list, sort: Optional[str], limit: Optional[int], cursor: Optional[str]):
+    """Rows of a reflected sheet with projection, filter[...], sort and paging applied."""
+    stmt = _select(request, target_table, fields, conds)
+    validators = check_not_modified(request, response, db, SPECS)
 
-    stmt = select(target_table)
-    return [dict(row._mapping) for row in db.execute(stmt).all()]
+    dialect = db.get_bind().dialect.name
+    # Accept: application/x-ndjson or text/csv streams instead of buffering
+    media_type = negotiate(request)
+
+    if limit is None and cursor is None:  # whole sheet, as before paging existed
+        if sort:
+            stmt = stmt.order_by(*[k.order_by() for k in parse_sort(sort, target_table, dialect)])
+        if media_type:
+            streamed = stream_rows(db.get_bind(), stmt, media_type)
+            streamed.headers.update(validators)
+            return streamed
+        return rows_response([dict(row._mapping) for row in db.execute(stmt).all()], response)
+
+    keys = parse_sort(sort, target_table, dialect)
+    rows = paginate(db, stmt, keys, limit=limit or SPEC_PAGE_DEFAULT, cursor=cursor,
+                    response=response, mappings=True)
+    if media_type:
+        headers = {k: v for k, v in response.headers.items() if k != "content-length"}
+        return page_response(rows, media_type, headers)
+    return rows_response(rows, response)
+
+# GET /v1/specs/datasets/{dataset} — returns rows from the dataset table
+@router.get("/specs/datasets/{dataset}")
+def get_dataset_rows(
+    dataset: str,
+    request: Request,
+    response: Response,
+    fields: Optional[str] = Query(default=None, description=FIELDS_DESCRIPTION),
+    sort: Optional[str] = Query(default=None, description=SORT_DESCRIPTION),
+    limit: Optional[int] = Query(default=None, ge=1, le=SPEC_PAGE_MAX, description="Page size (default: whole sheet)"),
+    cursor: Optional[str] = Query(default=None, description="X-Next-Cursor value from the previous page"),
+    db: Session = Depends(get_read_db),
+):
+    # Validate dataset exists and reuse the cached reflection
+    target_table = registry.dataset(db, dataset)
+    return _rows(db, request, response, target_table, fields, [], sort, limit, cursor)
 
 # GET /v1/specs/datasets/{dataset}/variables — returns rows in metadata filtered to dataset
 @router.get("/specs/datasets/{dataset}/variables")
-def get_dataset_variables(dataset: str, db: Session = Depends(get_db)):
+@cached(SPECS)
+def get_dataset_variables(dataset: str, request: Request, response: Response, db: Session = Depends(get_read_db)):
+    check_not_modified(request, response, db, SPECS)
     stmt = select(Metadata).where(Metadata.dataset_name == dataset)
     return [row._mapping for row in db.execute(stmt).all()]
 '''
@@ -61,25 +123,114 @@ def get_table_rows(
         raise HTTPException(status_code=500, detail=f"Error loading table '{table}': {str(e)}")
 '''
 # GET /v1/specs/{table} — returns rows from a whitelisted table
+# Also takes filter[col]=v, filter[col][in]=a,b and filter[col][prefix]=p (see app/spec_query.py)
 @router.get("/specs/{table}")
 def get_table_rows(
     table: str,
+    request: Request,
+    response: Response,
     q: Optional[str] = Query(default=None, description="Search across text columns"),
-    db: Session = Depends(get_db),
+    fields: Optional[str] = Query(default=None, description=FIELDS_DESCRIPTION),
+    sort: Optional[str] = Query(default=None, description=SORT_DESCRIPTION),
+    limit: Optional[int] = Query(default=None, ge=1, le=SPEC_PAGE_MAX, description="Page size (default: whole sheet)"),
+    cursor: Optional[str] = Query(default=None, description="X-Next-Cursor value from the previous page"),
+    db: Session = Depends(get_read_db),
 ):
-    # Validate table exists in spec_tables
-    allowed = db.execute(select(SpecTable.table_name)).scalars().all()
-    if table not in allowed:
-        raise HTTPException(status_code=404, detail="Table not whitelisted")
+    # Validate table exists in spec_tables and reuse the cached reflection
+    target_table = registry.table(db, table)
+    conds = []
+    if q:
+        text_cols = [c for c in target_table.columns if is_text(c)]
+        conds.append(text_filter(db, target_table, q, text_cols))
+    return _rows(db, request, response, target_table, fields, conds, sort, limit, cursor)
 
-    # Reflect table dynamically
-    metadata_obj = MetaData()
-    target_table = Table(table, metadata_obj, autoload_with=db.bind)
 
-    stmt = select(target_table)
-    if q:
-        text_cols = [c for c in target_table.columns if "CHAR" in str(c.type).upper() or "TEXT" in str(c.type).upper()]
-        like = f"%{q.lower()}%"
-        stmt = stmt.where(or_(*[func.lower(c).like(like) for c in text_cols]))
+# ---- Async handlers (DB_ASYNC=1, see app/db.py) ----
+# Same routes, in the same order, on an AsyncSession.
+async_router = APIRouter(route_class=CachedRoute)
+
+@async_router.get("/specs", response_model=List[str])
+@cached(SPECS)
+async def alist_spec_tables(request: Request, response: Response, db: AsyncSession = Depends(get_async_read_db)):
+    await acheck_not_modified(request, response, db, SPECS)
+    stmt = select(SpecTable.table_name)
+    return [row[0] for row in (await db.execute(stmt)).all()]
+
+@async_router.get("/specs/datasets", response_model=List[str])
+@cached(SPECS)
+async def alist_datasets(request: Request, response: Response, db: AsyncSession = Depends(get_async_read_db)):
+    await acheck_not_modified(request, response, db, SPECS)
+    stmt = select(SpecDataset.dataset_name)
+    return [row[0] for row in (await db.execute(stmt)).all()]
+
+@async_router.post("/specs/reload")
+async def areload_specs(db: AsyncSession = Depends(get_async_db)):
+    await registry.arefresh(db, force=True)
+    return {"tables": len(registry.table_names), "datasets": len(registry.dataset_names)}
+
+async def _arows(db: AsyncSession, request: Request, response: Response, target_table, fields: Optional[str],
+                 conds: list, sort: Optional[str], limit: Optional[int], cursor: Optional[str]):
+    """``_rows`` on an AsyncSession; a whole sheet streams through the async engine."""
+    stmt = _select(request, target_table, fields, conds)
+    validators = await acheck_not_modified(request, response, db, SPECS)
+
+    dialect = db.get_bind().dialect.name
+    media_type = negotiate(request)
+
+    if limit is None and cursor is None:
+        if sort:
+            stmt = stmt.order_by(*[k.order_by() for k in parse_sort(sort, target_table, dialect)])
+        if media_type:
+            streamed = astream_rows(db.bind, stmt, media_type)
+            streamed.headers.update(validators)
+            return streamed
+        return rows_response([dict(row._mapping) for row in (await db.execute(stmt)).all()], response)
+
+    keys = parse_sort(sort, target_table, dialect)
+    rows = await apaginate(db, stmt, keys, limit=limit or SPEC_PAGE_DEFAULT, cursor=cursor,
+                           response=response, mappings=True)
+    if media_type:
+        headers = {k: v for k, v in response.headers.items() if k != "content-length"}
+        return page_response(rows, media_type, headers)
+    return rows_response(rows, response)
 
-    return [dict(row._mapping) for row in db.execute(stmt).all()]
+@async_router.get("/specs/datasets/{dataset}")
+async def aget_dataset_rows(
+    dataset: str,
+    request: Request,
+    response: Response,
+    fields: Optional[str] = Query(default=None, description=FIELDS_DESCRIPTION),
+    sort: Optional[str] = Query(default=None, description=SORT_DESCRIPTION),
+    limit: Optional[int] = Query(default=None, ge=1, le=SPEC_PAGE_MAX, description="Page size (default: whole sheet)"),
+    cursor: Optional[str] = Query(default=None, description="X-Next-Cursor value from the previous page"),
+    db: AsyncSession = Depends(get_async_read_db),
+):
+    target_table = await registry.adataset(db, dataset)
+    return await _arows(db, request, response, target_table, fields, [], sort, limit, cursor)
+
+@async_router.get("/specs/datasets/{dataset}/variables")
+@cached(SPECS)
+async def aget_dataset_variables(dataset: str, request: Request, response: Response,
+                                 db: AsyncSession = Depends(get_async_read_db)):
+    await acheck_not_modified(request, response, db, SPECS)
+    stmt = select(Metadata).where(Metadata.dataset_name == dataset)
+    return [row._mapping for row in (await db.execute(stmt)).all()]
+
+@async_router.get("/specs/{table}")
+async def aget_table_rows(
+    table: str,
+    request: Request,
+    response: Response,
+    q: Optional[str] = Query(default=None, description="Search across text columns"),
+    fields: Optional[str] = Query(default=None, description=FIELDS_DESCRIPTION),
+    sort: Optional[str] = Query(default=None, description=SORT_DESCRIPTION),
+    limit: Optional[int] = Query(default=None, ge=1, le=SPEC_PAGE_MAX, description="Page size (default: whole sheet)"),
+    cursor: Optional[str] = Query(default=None, description="X-Next-Cursor value from the previous page"),
+    db: AsyncSession = Depends(get_async_read_db),
+):
+    target_table = await registry.atable(db, table)
+    conds = []
+    if q:
+        text_cols = [c for c in target_table.columns if is_text(c)]
+        conds.append(await atext_filter(db, target_table, q, text_cols))
+    return await _arows(db, request, response, target_table, fields, conds, sort, limit, cursor)
@@ -0,0 +1,153 @@
+# app/routers/sync.py
+"""Delta sync for offline clients: ``GET /v1/sync/{entity}?since=<token>``.
+
+Without ``since`` the whole table is returned (page by page); every response
+carries ``next_since`` to send next time, which then returns only rows whose
+``updated_at`` is at or after the token's watermark plus the ids deleted
+since (from ``tombstones``).
+
+The watermark handed out is the database clock at the start of the pass
+minus ``SYNC_SETTLE_SECONDS``, and comparisons are inclusive. Rows written
+by transactions that were still open when a pass started, or stamped in the
+same second as the last row seen, are therefore sent again on the next sync
+rather than missed; clients apply items as upserts and deletions as
+idempotent removes.
+"""
+import os
+from datetime import datetime, timedelta
+from typing import Dict, Optional, Tuple
+
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy import String, select, type_coerce
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from ..db import get_async_db, get_db
+from ..models import Deliverable, Personnel, ProgramQC, QCComment, TOCItem
+from ..pagination import SortKey, after, decode_cursor, encode_cursor
+from ..projection import schema_columns
+from ..responses import FastJSONResponse
+from ..schemas import DeliverableOut, PersonnelOut, ProgramQCOut, QCCommentOut, SyncOut, TOCItemOut
+from .. import tombstones
+
+router = APIRouter()
+
+SETTLE_SECONDS = int(os.getenv("SYNC_SETTLE_SECONDS", "5"))
+SYNC_PAGE_DEFAULT = 1000
+SYNC_PAGE_MAX = 5000
+
+
+def _columns(model, schema, *extra: str) -> Dict[str, object]:
+    columns = schema_columns(model, schema)
+    columns.update({name: getattr(model, name) for name in extra})
+    return columns
+
+
+# entity -> (model, columns returned); items match the entity's list endpoint
+SYNCED: Dict[str, Tuple[object, Dict[str, object]]] = {
+    "deliverables": (Deliverable, _columns(Deliverable, DeliverableOut)),
+    "personnel": (Personnel, _columns(Personnel, PersonnelOut)),
+    "program_qc": (ProgramQC, _columns(ProgramQC, ProgramQCOut)),
+    "qc_comments": (QCComment, _columns(QCComment, QCCommentOut)),
+    "toc_items": (TOCItem, _columns(TOCItem, TOCItemOut)),  # one feed for tables/figures/listings
+}
+
+
+def _token(since: Optional[str]):
+    """(watermark, pass cutoff, keyset position) from a ``since`` token."""
+    if since is None:
+        return None, None, None
+    invalid = HTTPException(status_code=400, detail="Invalid since token")
+    try:
+        watermark, cutoff, key_at, key_id = decode_cursor(since, 4)
+        for stamp in (watermark, cutoff):
+            if stamp is not None:
+                datetime.fromisoformat(stamp)
+    except (HTTPException, TypeError, ValueError):
+        raise invalid
+    # the keyset position is (updated_at text, id); bool passes isinstance(int)
+    if key_id is not None and (type(key_id) is not int or not isinstance(key_at, str)):
+        raise invalid
+    return watermark, cutoff, (None if key_id is None else [key_at, key_id])
+
+
+# GET /v1/sync/{entity} — rows changed and ids deleted since a token
+# Reads the primary: a lagging replica could hide rows older than the watermark.
+@router.get("/sync/{entity}", response_model=SyncOut)
+def sync_entity(
+    entity: str,
+    since: Optional[str] = Query(default=None, description="next_since from the previous response (omit for a full pull)"),
+    limit: int = Query(default=SYNC_PAGE_DEFAULT, ge=1, le=SYNC_PAGE_MAX),
+    db: Session = Depends(get_db),
+):
+    model, columns = _entity(entity)
+    watermark, cutoff, position = _token(since)
+    if position is None:  # first page of a pass
+        cutoff = _cutoff(tombstones.database_now(db), watermark)
+    rows = db.execute(_changed(model, columns, watermark, position, limit)).all()
+    deleted = (
+        tombstones.deleted_since(db, model.__table__, watermark)
+        if watermark is not None and position is None else []
+    )
+    return _response(columns, rows, deleted, watermark, cutoff, limit)
+
+
+def _entity(entity: str):
+    if entity not in SYNCED:
+        raise HTTPException(status_code=404, detail=f"Entity not synced; one of: {', '.join(SYNCED)}")
+    return SYNCED[entity]
+
+
+def _cutoff(now: datetime, watermark: Optional[str]) -> str:
+    if watermark is not None and watermark < tombstones.horizon(now):
+        raise HTTPException(status_code=410, detail="Sync token expired; omit since= for a full pull")
+    return tombstones.stamp(now - timedelta(seconds=SETTLE_SECONDS))
+
+
+def _changed(model, columns: Dict[str, object], watermark, position, limit: int):
+    keys = [SortKey(model.updated_at), SortKey(model.id)]
+    stmt = select(*columns.values(), type_coerce(model.updated_at, String).label("sync_key"))  # raw text, for the keyset
+    if watermark is not None:
+        stmt = stmt.where(type_coerce(model.updated_at, String) >= watermark)
+    if position is not None:
+        stmt = stmt.where(after(keys, position))
+    return stmt.order_by(*[k.order_by() for k in keys]).limit(limit + 1)
+
+
+def _response(columns: Dict[str, object], rows: list, deleted: list, watermark, cutoff, limit: int):
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+    if has_more:
+        next_since = encode_cursor([watermark, cutoff, rows[-1][-1], rows[-1].id])
+    else:
+        next_since = encode_cursor([cutoff, None, None, None])
+    names = list(columns)
+    return FastJSONResponse({
+        "items": [dict(zip(names, row)) for row in rows],
+        "deleted": deleted,
+        "next_since": next_since,
+        "has_more": has_more,
+    })
+
+
+# ---- Async handlers (DB_ASYNC=1, see app/db.py) ----
+async_router = APIRouter()
+
+
+@async_router.get("/sync/{entity}", response_model=SyncOut)
+async def async_entity(
+    entity: str,
+    since: Optional[str] = Query(default=None, description="next_since from the previous response (omit for a full pull)"),
+    limit: int = Query(default=SYNC_PAGE_DEFAULT, ge=1, le=SYNC_PAGE_MAX),
+    db: AsyncSession = Depends(get_async_db),
+):
+    model, columns = _entity(entity)
+    watermark, cutoff, position = _token(since)
+    if position is None:
+        cutoff = _cutoff(await tombstones.adatabase_now(db), watermark)
+    rows = (await db.execute(_changed(model, columns, watermark, position, limit))).all()
+    deleted = (
+        await tombstones.adeleted_since(db, model.__table__, watermark)
+        if watermark is not None and position is None else []
+    )
+    return _response(columns, rows, deleted, watermark, cutoff, limit)
@@ -0,0 +1,95 @@
+# app/routers/toc/items.py
+from typing import List, Optional
+from fastapi import APIRouter, Depends, Query, Request, Response
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from ... import toc
+from ...cache import CachedRoute, cached
+from ...conditional import acheck_not_modified, check_not_modified
+from ...replica import get_async_read_db, get_read_db
+from ...projection import FIELDS_DESCRIPTION
+from ...schemas import FacetsOut, TOCItemOut
+
+router = APIRouter(route_class=CachedRoute)
+
+TYPE_DESCRIPTION = "Comma-separated: " + ", ".join(toc.TYPES) + " (default: all)"
+
+# GET /v1/toc — tables, figures and listings in one ordered list
+@router.get("/toc", response_model=List[TOCItemOut])
+@cached("toc_items")
+def list_toc(
+    request: Request,
+    response: Response,
+    type_filter: Optional[str] = Query(default=None, alias="type", description=TYPE_DESCRIPTION),
+    fields: Optional[str] = Query(default=None, description=FIELDS_DESCRIPTION),
+    q: Optional[str] = Query(default=None, description="Filter by code or title substring"),
+    status_filter: Optional[str] = Query(default=None, alias="status", description="Comma-separated statuses"),
+    dataset: Optional[str] = Query(default=None, description="Comma-separated datasets"),
+    limit: int = Query(default=50, ge=1, le=500),
+    offset: int = Query(default=0, ge=0, description="Deprecated: use cursor"),
+    cursor: Optional[str] = Query(default=None, description="X-Next-Cursor value from the previous page"),
+    db: Session = Depends(get_read_db),
+):
+    types = toc.parse_types(type_filter)
+    check_not_modified(request, response, db, "toc_items")
+    return toc.list_items(db, response, types, fields=fields, q=q, statuses=toc.split(status_filter),
+                          datasets=toc.split(dataset), limit=limit, offset=offset, cursor=cursor)
+
+# GET /v1/toc/facets — grouped counts for the same filters as the list
+@router.get("/toc/facets", response_model=FacetsOut)
+@cached("toc_items")
+def toc_facets(
+    request: Request,
+    response: Response,
+    facets: str = Query(default="type", description="Comma-separated: " + ", ".join(toc.FACET_FIELDS)),
+    type_filter: Optional[str] = Query(default=None, alias="type", description=TYPE_DESCRIPTION),
+    q: Optional[str] = Query(default=None, description="Filter by code or title substring"),
+    status_filter: Optional[str] = Query(default=None, alias="status", description="Comma-separated statuses"),
+    dataset: Optional[str] = Query(default=None, description="Comma-separated datasets"),
+    db: Session = Depends(get_read_db),
+):
+    check_not_modified(request, response, db, "toc_items")
+    conds = toc.filters(db, toc.parse_types(type_filter), q, toc.split(status_filter), toc.split(dataset))
+    return toc.facets(db, facets, conds)
+
+
+# ---- Async handlers (DB_ASYNC=1, see app/db.py) ----
+# Same routes, in the same order, on an AsyncSession.
+async_router = APIRouter(route_class=CachedRoute)
+
+@async_router.get("/toc", response_model=List[TOCItemOut])
+@cached("toc_items")
+async def alist_toc(
+    request: Request,
+    response: Response,
+    type_filter: Optional[str] = Query(default=None, alias="type", description=TYPE_DESCRIPTION),
+    fields: Optional[str] = Query(default=None, description=FIELDS_DESCRIPTION),
+    q: Optional[str] = Query(default=None, description="Filter by code or title substring"),
+    status_filter: Optional[str] = Query(default=None, alias="status", description="Comma-separated statuses"),
+    dataset: Optional[str] = Query(default=None, description="Comma-separated datasets"),
+    limit: int = Query(default=50, ge=1, le=500),
+    offset: int = Query(default=0, ge=0, description="Deprecated: use cursor"),
+    cursor: Optional[str] = Query(default=None, description="X-Next-Cursor value from the previous page"),
+    db: AsyncSession = Depends(get_async_read_db),
+):
+    types = toc.parse_types(type_filter)
+    await acheck_not_modified(request, response, db, "toc_items")
+    return await toc.alist_items(db, response, types, fields=fields, q=q, statuses=toc.split(status_filter),
+                                 datasets=toc.split(dataset), limit=limit, offset=offset, cursor=cursor)
+
+@async_router.get("/toc/facets", response_model=FacetsOut)
+@cached("toc_items")
+async def atoc_facets(
+    request: Request,
+    response: Response,
+    facets: str = Query(default="type", description="Comma-separated: " + ", ".join(toc.FACET_FIELDS)),
+    type_filter: Optional[str] = Query(default=None, alias="type", description=TYPE_DESCRIPTION),
+    q: Optional[str] = Query(default=None, description="Filter by code or title substring"),
+    status_filter: Optional[str] = Query(default=None, alias="status", description="Comma-separated statuses"),
+    dataset: Optional[str] = Query(default=None, description="Comma-separated datasets"),
+    db: AsyncSession = Depends(get_async_read_db),
+):
+    await acheck_not_modified(request, response, db, "toc_items")
+    conds = await toc.afilters(db, toc.parse_types(type_filter), q, toc.split(status_filter), toc.split(dataset))
+    return await toc.afacets(db, facets, conds)
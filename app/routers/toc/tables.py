@@ -1,32 +1,55 @@
 # app/routers/toc/tables.py
 from typing import List, Optional
-from fastapi import APIRouter, Depends, Query
-from sqlalchemy import select, func, and_, or_
+from fastapi import APIRouter, Depends, Query, Request, Response
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
-from ...db import get_db
-from ...models import TOCItem
+from ... import toc
+from ...cache import CachedRoute, cached
+from ...conditional import acheck_not_modified, check_not_modified
+from ...replica import get_async_read_db, get_read_db
+from ...projection import FIELDS_DESCRIPTION
 from ...schemas import TOCItemOut
 
-router = APIRouter()
+router = APIRouter(route_class=CachedRoute)
 
+# Same as GET /v1/toc?type=table
 @router.get("/toc/tables", response_model=List[TOCItemOut])
+@cached("toc_items")
 def list_toc_tables(
+    request: Request,
+    response: Response,
+    fields: Optional[str] = Query(default=None, description=FIELDS_DESCRIPTION),
     q: Optional[str] = Query(default=None, description="Filter by code or title substring"),
     status_filter: Optional[str] = Query(default=None, alias="status"),
     limit: int = Query(default=50, ge=1, le=500),
-    offset: int = Query(default=0, ge=0),
-    db: Session = Depends(get_db),
+    offset: int = Query(default=0, ge=0, description="Deprecated: use cursor"),
+    cursor: Optional[str] = Query(default=None, description="X-Next-Cursor value from the previous page"),
+    db: Session = Depends(get_read_db),
 ):
-    stmt = select(TOCItem).where(TOCItem.type == "table")
-    conds = []
-    if q:
-        like = f"%{q.lower()}%"
-        conds.append(or_(func.lower(TOCItem.code).like(like),
-                         func.lower(TOCItem.title).like(like)))
-    if status_filter:
-        conds.append(TOCItem.status == status_filter)
-    if conds:
-        stmt = stmt.where(and_(*conds))
-    stmt = stmt.order_by(TOCItem.priority.asc().nulls_last(), TOCItem.code.asc()).limit(limit).offset(offset)
-    return db.execute(stmt).scalars().all()
\ No newline at end of file
+    check_not_modified(request, response, db, "toc_items")
+    statuses = [status_filter] if status_filter else None
+    return toc.list_items(db, response, ["table"], fields=fields, q=q, statuses=statuses,
+                          limit=limit, offset=offset, cursor=cursor)
+
+
+# ---- Async handlers (DB_ASYNC=1, see app/db.py) ----
+async_router = APIRouter(route_class=CachedRoute)
+
+@async_router.get("/toc/tables", response_model=List[TOCItemOut])
+@cached("toc_items")
+async def alist_toc_tables(
+    request: Request,
+    response: Response,
+    fields: Optional[str] = Query(default=None, description=FIELDS_DESCRIPTION),
+    q: Optional[str] = Query(default=None, description="Filter by code or title substring"),
+    status_filter: Optional[str] = Query(default=None, alias="status"),
+    limit: int = Query(default=50, ge=1, le=500),
+    offset: int = Query(default=0, ge=0, description="Deprecated: use cursor"),
+    cursor: Optional[str] = Query(default=None, description="X-Next-Cursor value from the previous page"),
+    db: AsyncSession = Depends(get_async_read_db),
+):
+    await acheck_not_modified(request, response, db, "toc_items")
+    statuses = [status_filter] if status_filter else None
+    return await toc.alist_items(db, response, ["table"], fields=fields, q=q, statuses=statuses,
+                                 limit=limit, offset=offset, cursor=cursor)
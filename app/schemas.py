@@ -1,7 +1,9 @@
 from pydantic import BaseModel, Field
-from typing import Optional
+from typing import Any, Dict, List, Optional, Union
 from datetime import datetime
 
+from .lookup import MAX_IDS
+
 class DeliverableCreate(BaseModel):
     name: str = Field(..., min_length=1, max_length=255)
     status: Optional[str] = Field(default=None, max_length=50)
@@ -10,6 +12,7 @@ class DeliverableOut(BaseModel):
     id: int
     name: str
     status: Optional[str] = None
+    updated_at: Optional[datetime] = None
     class Config:
         from_attributes = True
 
@@ -94,6 +97,7 @@ class PersonnelOut(PersonnelBase):
     preferred_name: Optional[str] = None
     full_name: Optional[str] = None
     status: Optional[str] = None
+    updated_at: Optional[datetime] = None
     
     class Config:
         from_attributes = True  
@@ -123,11 +127,137 @@ class MetadataOut(BaseModel):
 # --- TOC (read-only list output) ---
 class TOCItemOut(BaseModel):
     id: int
+    type: str
     code: str
     title: Optional[str] = None
     status: Optional[str] = None
     dataset: Optional[str] = None
     priority: Optional[int] = None
+    updated_at: Optional[datetime] = None
 
     class Config:
         from_attributes = True
+
+
+# --- Search ---
+class SearchHitOut(BaseModel):
+    entity: str
+    id: int
+    score: float
+
+
+# --- Batch writes ---
+BATCH_MAX_ITEMS = 1000
+
+class BatchItemResult(BaseModel):
+    op: str  # "create" | "update" | "delete"
+    index: int  # position in the request's list for that op
+    id: Optional[int] = None
+    status: int  # 201 created, 200 updated, 204 deleted, 404 not found
+    detail: Optional[str] = None
+
+class ProgramQCPatch(ProgramQCUpdate):
+    id: int
+
+class ProgramQCBatch(BaseModel):
+    create: List[ProgramQCCreate] = Field(default=[], max_length=BATCH_MAX_ITEMS)
+    update: List[ProgramQCPatch] = Field(default=[], max_length=BATCH_MAX_ITEMS)
+    delete: List[int] = Field(default=[], max_length=BATCH_MAX_ITEMS)
+
+class ProgramQCBatchResult(BatchItemResult):
+    item: Optional[ProgramQCOut] = None
+
+class ProgramQCBatchOut(BaseModel):
+    results: List[ProgramQCBatchResult]
+
+class QCCommentPatch(QCCommentUpdate):
+    id: int
+
+class QCCommentBatch(BaseModel):
+    create: List[QCCommentCreate] = Field(default=[], max_length=BATCH_MAX_ITEMS)
+    update: List[QCCommentPatch] = Field(default=[], max_length=BATCH_MAX_ITEMS)
+    delete: List[int] = Field(default=[], max_length=BATCH_MAX_ITEMS)
+
+class QCCommentBatchResult(BatchItemResult):
+    item: Optional[QCCommentOut] = None
+
+class QCCommentBatchOut(BaseModel):
+    results: List[QCCommentBatchResult]
+
+
+# --- Facets / dashboard aggregates ---
+class FacetValueOut(BaseModel):
+    value: Optional[Union[bool, int, str]] = None
+    count: int
+
+class FacetsOut(BaseModel):
+    total: int  # rows matching the filters
+    facets: Dict[str, List[FacetValueOut]]
+
+class DeliverableStatusCount(BaseModel):
+    deliverable_id: Optional[int] = None
+    status: Optional[str] = None
+    count: int
+
+class ProgramCommentCounts(BaseModel):
+    program_qc_id: int
+    open: int
+    resolved: int
+
+class ReviewerWorkload(BaseModel):
+    reviewer: Optional[str] = None
+    total: int
+    open: int  # not yet Complete
+
+class ProgramQCSummaryOut(BaseModel):
+    status_by_deliverable: List[DeliverableStatusCount]
+    comments_by_program: List[ProgramCommentCounts]
+    reviewer_workload: List[ReviewerWorkload]
+
+class DeliverableRollupOut(BaseModel):
+    deliverable_id: Optional[int] = None
+    programs_by_status: Dict[str, int]  # "" = no status
+    program_count: int
+    unresolved_comments: int
+    last_activity_at: Optional[datetime] = None
+
+
+# --- Embedded related resources (include=) ---
+class CommentCountsOut(BaseModel):
+    total: int
+    unresolved: int
+
+class ProgramQCExpandedOut(ProgramQCOut):
+    # Present only when named in include=
+    deliverable: Optional[DeliverableOut] = None
+    comments: Optional[List[QCCommentOut]] = None
+    comment_counts: Optional[CommentCountsOut] = None
+
+
+# --- Delta sync ---
+class SyncOut(BaseModel):
+    items: List[Dict[str, Any]]  # changed rows, shaped like the entity's list endpoint
+    deleted: List[int]  # ids deleted since the token (first page of a pass only)
+    next_since: str  # pass as ?since= next time (or to fetch the next page)
+    has_more: bool  # more pages in this pass
+
+# --- Typeahead (/suggest) ---
+class PersonnelSuggestionOut(BaseModel):
+    id: int
+    full_name: Optional[str] = None
+    preferred_name: Optional[str] = None
+    status: Optional[str] = None
+
+class ProgramQCSuggestionOut(BaseModel):
+    id: int
+    program_name: str
+    status: Optional[str] = None
+    deliverable_id: Optional[int] = None
+
+# --- Fetch by ids (:lookup) ---
+class LookupIn(BaseModel):
+    ids: List[int] = Field(..., max_length=MAX_IDS)
+
+class LookupOut(BaseModel):
+    items: List[Dict[str, Any]]  # found rows in request order, shaped like the entity's list endpoint
+    missing: List[int]  # requested ids with no row (or excluded by the filters)
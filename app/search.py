@@ -0,0 +1,331 @@
+# app/search.py
+"""Full-text search backend for the ``q=`` filters.
+
+SQLite gets an FTS5 external-content table per searchable table
+(``<table>_fts``) kept in sync by triggers; MySQL gets a FULLTEXT index
+(``ft_<table>``). ``text_filter`` uses whichever index exists and falls back
+to the old ``lower(col) LIKE '%q%'`` scan when there is none, so routers do
+not need to know which backend is active. Queries are tokenized and every
+token is prefix-matched (``sch`` finds ``Schmidt``); ``ranked`` orders hits
+by relevance (bm25 / MATCH score).
+
+The index only serves a query it can answer in full. Only the caller's
+columns are searched (an FTS5 column filter; on MySQL, MATCH() needs a
+FULLTEXT index on exactly those columns). MySQL does not index tokens
+shorter than ``innodb_ft_min_token_size`` or stopwords, and a required
+term it does not index matches nothing. Other queries use LIKE.
+
+Set ``SEARCH_BACKEND=off`` to skip index creation and always use LIKE.
+"""
+import logging
+import os
+import re
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from sqlalchemy import func, literal_column, or_, select, table as sql_table, text
+from sqlalchemy.engine import Connection, Engine
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+from sqlalchemy.sql import ColumnElement
+from sqlalchemy.schema import Table
+
+log = logging.getLogger(__name__)
+
+SEARCH_BACKEND = os.getenv("SEARCH_BACKEND", "auto").lower()
+
+# Tracker tables and the columns their q= filters search.
+TRACKER_INDEXES: Dict[str, Tuple[str, ...]] = {
+    "qc_comments": ("author", "comment_text"),
+    "program_qc": ("program_name",),
+    "toc_items": ("code", "title"),
+    "personnel": ("preferred_name", "full_name"),
+}
+MYSQL_MAX_FULLTEXT_COLUMNS = 16
+# Server's innodb_ft_min_token_size, and InnoDB's default stopword list
+# (INFORMATION_SCHEMA.INNODB_FT_DEFAULT_STOPWORD)
+MYSQL_FT_MIN_TOKEN_SIZE = int(os.getenv("MYSQL_FT_MIN_TOKEN_SIZE", "3"))
+MYSQL_FT_STOPWORDS = frozenset(
+    "a about an are as at be by com de en for from how i in is it la of on or "
+    "that the this to was what when where who will with und www".split()
+)
+
+# table name -> indexed columns (None = no index); cleared when specs reload
+_indexes: Dict[str, Optional[Tuple[str, ...]]] = {}
+
+
+def _q(name: str) -> str:
+    return '"' + name.replace('"', '""') + '"'
+
+
+def fts_name(table_name: str) -> str:
+    return f"{table_name}_fts"
+
+
+def fulltext_name(table_name: str) -> str:
+    return f"ft_{table_name}"
+
+
+def tokens(q: str) -> List[str]:
+    return re.findall(r"\w+", q.lower())
+
+
+def match_query(q: str, dialect_name: str, columns: Optional[Sequence[str]] = None) -> Optional[str]:
+    """Prefix-match every token of ``q`` (all tokens required); on SQLite
+    only in ``columns`` when given."""
+    toks = tokens(q)
+    if not toks:
+        return None
+    if dialect_name == "sqlite":
+        query = " ".join(f'"{t}"*' for t in toks)
+        return f"{{{' '.join(columns)}}} : ({query})" if columns else query
+    return " ".join(f"+{t}*" for t in toks)
+
+
+def indexable(q: str, dialect_name: str) -> bool:
+    """False when the index would drop a token of ``q`` (MySQL: too short, or a stopword)."""
+    if dialect_name not in ("mysql", "mariadb"):
+        return True
+    return all(len(t) >= MYSQL_FT_MIN_TOKEN_SIZE and t not in MYSQL_FT_STOPWORDS for t in tokens(q))
+
+
+# ---- index maintenance ----
+def _sqlite_fts_exists(conn: Connection, table_name: str) -> bool:
+    row = conn.execute(
+        text("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = :n"),
+        {"n": fts_name(table_name)},
+    ).first()
+    return row is not None
+
+
+def _sqlite_create_fts(conn: Connection, table_name: str, columns: Sequence[str],
+                       rowid: str, triggers: bool) -> None:
+    fts = fts_name(table_name)
+    cols = ", ".join(_q(c) for c in columns)
+    conn.exec_driver_sql(
+        f"CREATE VIRTUAL TABLE {_q(fts)} USING fts5({cols}, "
+        f"content={_q(table_name)}, content_rowid={_q(rowid)})"
+    )
+    if triggers:
+        new_vals = ", ".join(f"new.{_q(c)}" for c in columns)
+        old_vals = ", ".join(f"old.{_q(c)}" for c in columns)
+        delete_old = (
+            f"INSERT INTO {_q(fts)}({_q(fts)}, rowid, {cols}) "
+            f"VALUES('delete', old.{_q(rowid)}, {old_vals});"
+        )
+        insert_new = f"INSERT INTO {_q(fts)}(rowid, {cols}) VALUES (new.{_q(rowid)}, {new_vals});"
+        conn.exec_driver_sql(
+            f"CREATE TRIGGER IF NOT EXISTS {_q(fts + '_ai')} AFTER INSERT ON {_q(table_name)} "
+            f"BEGIN {insert_new} END"
+        )
+        conn.exec_driver_sql(
+            f"CREATE TRIGGER IF NOT EXISTS {_q(fts + '_ad')} AFTER DELETE ON {_q(table_name)} "
+            f"BEGIN {delete_old} END"
+        )
+        conn.exec_driver_sql(
+            f"CREATE TRIGGER IF NOT EXISTS {_q(fts + '_au')} AFTER UPDATE OF {cols} ON {_q(table_name)} "
+            f"BEGIN {delete_old} {insert_new} END"
+        )
+    conn.exec_driver_sql(f"INSERT INTO {_q(fts)}({_q(fts)}) VALUES('rebuild')")
+
+
+def _mysql_index_columns(conn: Connection, table_name: str) -> Tuple[str, ...]:
+    rows = conn.execute(
+        text(
+            "SELECT column_name FROM information_schema.statistics "
+            "WHERE table_schema = DATABASE() AND table_name = :t AND index_name = :i "
+            "ORDER BY seq_in_index"
+        ),
+        {"t": table_name, "i": fulltext_name(table_name)},
+    ).scalars().all()
+    return tuple(rows)
+
+
+def _mysql_create_fulltext(conn: Connection, table_name: str, columns: Sequence[str]) -> None:
+    cols = ", ".join(f"`{c}`" for c in columns[:MYSQL_MAX_FULLTEXT_COLUMNS])
+    conn.exec_driver_sql(f"ALTER TABLE `{table_name}` ADD FULLTEXT INDEX `{fulltext_name(table_name)}` ({cols})")
+
+
+def ensure_indexes(engine: Engine) -> None:
+    """Create missing FTS tables/triggers (SQLite) or FULLTEXT indexes (MySQL)."""
+    if SEARCH_BACKEND == "off":
+        return
+    dialect = engine.dialect.name
+    for table_name, columns in TRACKER_INDEXES.items():
+        try:
+            with engine.begin() as conn:
+                if dialect == "sqlite":
+                    if not _sqlite_fts_exists(conn, table_name):
+                        _sqlite_create_fts(conn, table_name, columns, "id", triggers=True)
+                elif dialect in ("mysql", "mariadb"):
+                    if not _mysql_index_columns(conn, table_name):
+                        _mysql_create_fulltext(conn, table_name, columns)
+        except DBAPIError as exc:  # e.g. SQLite built without FTS5
+            log.warning("Full-text index for %s unavailable, using LIKE: %s", table_name, exc)
+            return
+    _indexes.clear()
+
+
+def drop_indexes(engine: Engine) -> None:
+    """Drop the tracker tables' full-text indexes, e.g. before a bulk load.
+
+    ``ensure_indexes`` recreates and rebuilds them in one pass afterwards,
+    which is much cheaper than keeping them in sync row by row.
+    """
+    dialect = engine.dialect.name
+    with engine.begin() as conn:
+        for table_name in TRACKER_INDEXES:
+            if dialect == "sqlite":
+                fts = fts_name(table_name)
+                for suffix in ("_ai", "_ad", "_au"):
+                    conn.exec_driver_sql(f"DROP TRIGGER IF EXISTS {_q(fts + suffix)}")
+                conn.exec_driver_sql(f"DROP TABLE IF EXISTS {_q(fts)}")
+            elif dialect in ("mysql", "mariadb") and _mysql_index_columns(conn, table_name):
+                conn.exec_driver_sql(f"ALTER TABLE `{table_name}` DROP INDEX `{fulltext_name(table_name)}`")
+    _indexes.clear()
+
+
+def index_spec_table(conn: Connection, table: Table) -> None:
+    """(Re)build the full-text index of a freshly loaded spec sheet."""
+    if SEARCH_BACKEND == "off":
+        return
+    columns = [c.name for c in table.columns if is_text(c)]
+    if not columns:
+        return
+    dialect = conn.dialect.name
+    if dialect == "sqlite":
+        conn.exec_driver_sql(f"DROP TABLE IF EXISTS {_q(fts_name(table.name))}")
+        # Spec sheets are rebuilt wholesale on load, so no triggers are needed.
+        _sqlite_create_fts(conn, table.name, columns, "rowid", triggers=False)
+    elif dialect in ("mysql", "mariadb"):
+        if not _mysql_index_columns(conn, table.name):
+            _mysql_create_fulltext(conn, table.name, columns)
+
+
+def clear_cache() -> None:
+    _indexes.clear()
+
+
+def indexed_columns(db: Session, table_name: str) -> Optional[Tuple[str, ...]]:
+    """Columns covered by the table's full-text index, or None if it has none."""
+    if SEARCH_BACKEND == "off":
+        return None
+    if table_name in _indexes:
+        return _indexes[table_name]
+    conn = db.connection()
+    cols: Optional[Tuple[str, ...]] = None
+    if conn.dialect.name == "sqlite":
+        if _sqlite_fts_exists(conn, table_name):
+            info = conn.exec_driver_sql(f"PRAGMA table_info({_q(fts_name(table_name))})").all()
+            cols = tuple(r[1] for r in info)
+    elif conn.dialect.name in ("mysql", "mariadb"):
+        cols = _mysql_index_columns(conn, table_name) or None
+    _indexes[table_name] = cols
+    return cols
+
+
+async def aindexed_columns(db: AsyncSession, table_name: str) -> Optional[Tuple[str, ...]]:
+    """``indexed_columns`` on an AsyncSession; the probe runs once per table, then is cached."""
+    if SEARCH_BACKEND == "off":
+        return None
+    if table_name in _indexes:
+        return _indexes[table_name]
+    return await db.run_sync(indexed_columns, table_name)
+
+
+# ---- query side ----
+def is_text(column) -> bool:
+    type_name = str(column.type).upper()
+    return "CHAR" in type_name or "TEXT" in type_name
+
+
+def _rowid(table: Table) -> ColumnElement:
+    pk = list(table.primary_key.columns)
+    if len(pk) == 1:
+        return pk[0]
+    return literal_column(f"{_q(table.name)}.rowid")
+
+
+def _like(columns: Sequence[ColumnElement], q: str) -> ColumnElement:
+    like = f"%{q.lower()}%"
+    return or_(*[func.lower(c).like(like) for c in columns])
+
+
+def _index_query(cols: Optional[Tuple[str, ...]], dialect: str, q: str, names: Sequence[str]) -> Optional[str]:
+    """MATCH query for ``q`` over the columns ``names``, or None when the
+    table's full-text index (``cols``) cannot answer it exactly."""
+    if not cols or not set(names) <= set(cols) or not indexable(q, dialect):
+        return None
+    if dialect == "sqlite":
+        if set(names) == set(cols):
+            return match_query(q, dialect)
+        if not all(re.fullmatch(r"\w+", n) for n in names):  # FTS5 column filters take barewords
+            return None
+        return match_query(q, dialect, names)
+    if set(names) != set(cols):
+        return None
+    return match_query(q, dialect)
+
+
+def text_filter(db: Session, table: Table, q: str, columns: Sequence[ColumnElement]) -> ColumnElement:
+    """WHERE clause for ``q`` over ``columns``: full-text index if it can answer, else LIKE."""
+    return _text_filter(indexed_columns(db, table.name), db.get_bind().dialect.name, table, q, columns)
+
+
+async def atext_filter(db: AsyncSession, table: Table, q: str, columns: Sequence[ColumnElement]) -> ColumnElement:
+    """``text_filter`` on an AsyncSession (async handlers, ``DB_ASYNC=1``)."""
+    return _text_filter(await aindexed_columns(db, table.name), db.get_bind().dialect.name, table, q, columns)
+
+
+def _text_filter(cols: Optional[Tuple[str, ...]], dialect: str, table: Table, q: str,
+                 columns: Sequence[ColumnElement]) -> ColumnElement:
+    names = [getattr(c, "expression", c).name for c in columns]
+    query = _index_query(cols, dialect, q, names)
+    if not query:
+        return _like(columns, q)
+    if dialect == "sqlite":
+        fts = sql_table(fts_name(table.name))
+        hits = select(literal_column("rowid")).select_from(fts).where(
+            literal_column(_q(fts.name)).op("MATCH")(query)
+        )
+        return _rowid(table).in_(hits)
+    from sqlalchemy.dialects.mysql import match
+    return match(*[table.c[n] for n in names], against=query).in_boolean_mode()
+
+
+def ranked(db: Session, table: Table, q: str, limit: int) -> Optional[List[Tuple[int, float]]]:
+    """(id, score) pairs for ``q``, best first; None when the table's
+    full-text index cannot answer ``q``."""
+    ranking = _ranked_query(indexed_columns(db, table.name), db.get_bind().dialect.name, table, q, limit)
+    if ranking is None:
+        return None
+    return [(row[0], float(row[1])) for row in db.execute(*ranking)]
+
+
+async def aranked(db: AsyncSession, table: Table, q: str, limit: int) -> Optional[List[Tuple[int, float]]]:
+    """``ranked`` on an AsyncSession (async handlers, ``DB_ASYNC=1``)."""
+    ranking = _ranked_query(await aindexed_columns(db, table.name), db.get_bind().dialect.name, table, q, limit)
+    if ranking is None:
+        return None
+    return [(row[0], float(row[1])) for row in await db.execute(*ranking)]
+
+
+def _ranked_query(cols: Optional[Tuple[str, ...]], dialect: str, table: Table, q: str, limit: int):
+    query = _index_query(cols, dialect, q, cols) if cols else None
+    if not query:
+        return None
+    if dialect == "sqlite":
+        fts = _q(fts_name(table.name))
+        stmt = text(
+            f"SELECT rowid, -bm25({fts}) AS score FROM {fts} "
+            f"WHERE {fts} MATCH :q ORDER BY rank LIMIT :limit"
+        )
+    else:
+        col_list = ", ".join(f"`{c}`" for c in cols)
+        pk = _rowid(table).name
+        stmt = text(
+            f"SELECT `{pk}`, MATCH({col_list}) AGAINST (:q IN BOOLEAN MODE) AS score "
+            f"FROM `{table.name}` WHERE MATCH({col_list}) AGAINST (:q IN BOOLEAN MODE) "
+            f"ORDER BY score DESC LIMIT :limit"
+        )
+    return stmt, {"q": query, "limit": limit}
@@ -0,0 +1,14 @@
+# app/spec_columns.py
+"""Column naming shared by the spec sheet loader and the spec query layer."""
+import re
+
+# Surrogate key of loader-built spec tables (SQLite: an alias of rowid); hidden by the API
+ROW_ID = "_row_id"
+
+
+def normalize_column(name: str) -> str:
+    """'Derivation / Comments / Predecessor' -> 'derivation_comments_predecessor'."""
+    norm = re.sub(r"[^0-9a-z]+", "_", name.strip().lower()).strip("_")
+    if norm and norm[0].isdigit():
+        norm = f"c_{norm}"
+    return norm
@@ -0,0 +1,116 @@
+# app/spec_query.py
+"""Filtering and sorting of spec sheet rows, built on the reflected ``Table``.
+
+Query syntax (column names as returned, or as in the sheet header)::
+
+    ?filter[variable]=USUBJID             equality (typed: Integer columns take ints)
+    ?filter[variable][in]=USUBJID,SUBJID  any of a comma-separated list
+    ?filter[variable][prefix]=US          starts with (case-sensitive on SQLite)
+    ?sort=data_set,-variable              multi-column, '-' for descending
+
+Prefix filters are written as a range (``col >= 'US' AND col < 'UT'``) rather
+than ``LIKE`` so the loader's key-column indexes can serve them. A prefix
+ending in U+10FFFF has no single successor; its trailing maximal code points
+are dropped before incrementing, and an all-U+10FFFF prefix is open-ended.
+"""
+import re
+import sys
+from typing import List, Optional
+
+from fastapi import HTTPException
+from sqlalchemy import Integer, literal_column
+from sqlalchemy.schema import Table
+from sqlalchemy.sql import ColumnElement
+
+from .pagination import SortKey
+from .spec_columns import ROW_ID, normalize_column
+
+FILTER_PARAM = re.compile(r"^filter\[([^\]]+)\](?:\[(eq|in|prefix)\])?$")
+
+
+def visible_columns(table: Table) -> list:
+    """Columns returned to clients (the loader's surrogate key is hidden)."""
+    return [c for c in table.columns if c.name != ROW_ID]
+
+
+def _column(table: Table, name: str):
+    column = table.c.get(name)
+    if column is None:
+        column = table.c.get(normalize_column(name))
+    if column is None or column.name == ROW_ID:
+        raise HTTPException(status_code=400, detail=f"Unknown column '{name}'")
+    return column
+
+
+def _coerce(column, value: str):
+    if isinstance(column.type, Integer):
+        try:
+            return int(value)
+        except ValueError:
+            raise HTTPException(status_code=400, detail=f"'{column.name}' takes integers, got '{value}'")
+    return value
+
+
+def parse_filters(query_params, table: Table) -> List[ColumnElement]:
+    conds = []
+    for key, value in query_params.multi_items():
+        match = FILTER_PARAM.match(key)
+        if not match:
+            continue
+        column = _column(table, match.group(1))
+        op = match.group(2) or "eq"
+        if op == "eq":
+            conds.append(column == _coerce(column, value))
+        elif op == "in":
+            values = [_coerce(column, v.strip()) for v in value.split(",") if v.strip()]
+            conds.append(column.in_(values))
+        else:
+            if isinstance(column.type, Integer):
+                raise HTTPException(status_code=400, detail=f"prefix filter needs a text column, '{column.name}' is not")
+            if value:
+                conds.append(column >= value)
+                upper = prefix_upper_bound(value)
+                if upper is not None:
+                    conds.append(column < upper)
+    return conds
+
+
+def prefix_upper_bound(prefix: str) -> Optional[str]:
+    """The smallest string greater than every string starting with ``prefix``.
+
+    None when there is none (the prefix is all U+10FFFF). Surrogate code
+    points are skipped: they cannot be encoded for the driver.
+    """
+    stripped = prefix.rstrip(chr(sys.maxunicode))
+    if not stripped:
+        return None
+    code = ord(stripped[-1]) + 1
+    if 0xD800 <= code <= 0xDFFF:
+        code = 0xE000
+    return stripped[:-1] + chr(code)
+
+
+def row_key(table: Table, dialect_name: str) -> Optional[ColumnElement]:
+    """A unique, stable column to end every ORDER BY with, if the table has one."""
+    pk = list(table.primary_key.columns)
+    if len(pk) == 1:
+        return pk[0]
+    if dialect_name == "sqlite":
+        return literal_column(f'"{table.name}".rowid')
+    return None  # sheets loaded before the surrogate key existed (non-SQLite)
+
+
+def parse_sort(sort: Optional[str], table: Table, dialect_name: str) -> List[SortKey]:
+    keys = []
+    for term in (sort or "").split(","):
+        term = term.strip()
+        if not term:
+            continue
+        desc = term.startswith("-")
+        keys.append(SortKey(_column(table, term.lstrip("-+")), desc=desc))
+    tiebreak = row_key(table, dialect_name)
+    if tiebreak is not None:
+        keys.append(SortKey(tiebreak))
+    else:
+        keys += [SortKey(c) for c in visible_columns(table)]
+    return keys
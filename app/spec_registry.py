@@ -0,0 +1,170 @@
+# app/spec_registry.py
+"""Process-wide cache of the spec whitelists and their reflected tables.
+
+Reflecting a table costs several PRAGMA / INFORMATION_SCHEMA round trips, so
+the specs router keeps one ``Table`` per spec sheet and only throws the cache
+away when the loader stamps ``spec_tables.last_loaded_utc`` (or the set of
+sheets/datasets changes), or when an admin asks for a reload.
+"""
+import os
+import threading
+import time
+from typing import Callable, Dict, FrozenSet, List, Optional, Tuple
+
+from fastapi import HTTPException
+from sqlalchemy import MetaData, Table, func, select
+from sqlalchemy.exc import NoSuchTableError
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from .models import SpecDataset, SpecTable
+from . import search
+
+# How often (seconds) a request may re-check the load stamp; 0 checks every time.
+CHECK_INTERVAL = float(os.getenv("SPEC_REGISTRY_CHECK_SECONDS", "5"))
+
+
+class SpecRegistry:
+    def __init__(self, check_interval: float = CHECK_INTERVAL):
+        self.check_interval = check_interval
+        self._lock = threading.RLock()
+        self._metadata = MetaData()
+        self._tables: Dict[str, Table] = {}
+        self._stamp: Optional[Tuple] = None
+        self._checked_at = 0.0
+        self.table_names: FrozenSet[str] = frozenset()
+        self.dataset_names: FrozenSet[str] = frozenset()
+        self._reload_callbacks: List[Callable[[], None]] = []
+
+    def on_reload(self, callback: Callable[[], None]) -> None:
+        """Call ``callback()`` whenever the whitelists are reloaded."""
+        self._reload_callbacks.append(callback)
+
+    @property
+    def stamp(self) -> Optional[Tuple]:
+        return self._stamp
+
+    @staticmethod
+    def _stamp_query():
+        return select(
+            func.max(SpecTable.last_loaded_utc),
+            func.count(),
+            select(func.count()).select_from(SpecDataset).scalar_subquery(),
+        ).select_from(SpecTable)
+
+    def _read_stamp(self, db: Session) -> Tuple:
+        return tuple(db.execute(self._stamp_query()).one())
+
+    def _due(self, now: float, force: bool) -> bool:
+        return force or self._stamp is None or now - self._checked_at >= self.check_interval
+
+    def _install(self, stamp: Tuple, table_names: FrozenSet[str], dataset_names: FrozenSet[str]) -> None:
+        # caller holds self._lock
+        self.table_names = table_names
+        self.dataset_names = dataset_names
+        self._metadata = MetaData()
+        self._tables = {}
+        self._stamp = stamp
+        search.clear_cache()
+        for callback in self._reload_callbacks:
+            callback()
+
+    def refresh(self, db: Session, force: bool = False) -> bool:
+        """Reload the whitelists if the load stamp moved. Returns True on reload."""
+        now = time.monotonic()
+        if not self._due(now, force):
+            return False
+        stamp = self._read_stamp(db)
+        with self._lock:
+            self._checked_at = now
+            if not force and stamp == self._stamp:
+                return False
+            self._install(
+                stamp,
+                frozenset(db.execute(select(SpecTable.table_name)).scalars()),
+                frozenset(db.execute(select(SpecDataset.dataset_name)).scalars()),
+            )
+            return True
+
+    async def arefresh(self, db: AsyncSession, force: bool = False) -> bool:
+        """``refresh`` on an AsyncSession.
+
+        The whitelists are read before the lock is taken (a coroutine must not
+        hold a thread lock across an await); two concurrent reloads of the same
+        stamp are harmless.
+        """
+        now = time.monotonic()
+        if not self._due(now, force):
+            return False
+        stamp = tuple((await db.execute(self._stamp_query())).one())
+        if not force and stamp == self._stamp:
+            self._checked_at = now
+            return False
+        table_names = frozenset((await db.execute(select(SpecTable.table_name))).scalars())
+        dataset_names = frozenset((await db.execute(select(SpecDataset.dataset_name))).scalars())
+        with self._lock:
+            self._checked_at = now
+            self._install(stamp, table_names, dataset_names)
+        return True
+
+    def _reflect(self, db: Session, name: str) -> Table:
+        table = self._tables.get(name)
+        if table is not None:
+            return table
+        with self._lock:
+            table = self._tables.get(name)
+            if table is None:
+                try:
+                    table = Table(name, self._metadata, autoload_with=db.get_bind())
+                except NoSuchTableError:
+                    raise HTTPException(status_code=404, detail=f"Table '{name}' has not been loaded")
+                self._tables[name] = table
+            return table
+
+    async def _areflect(self, db: AsyncSession, name: str) -> Table:
+        table = self._tables.get(name)
+        if table is not None:
+            return table
+        # Reflected into a MetaData of its own, so no lock is held across the
+        # awaits; the first of two concurrent reflections wins. A reload in
+        # between only drops the result with the old cache.
+        tables = self._tables
+        conn = await db.connection()
+        try:
+            table = await conn.run_sync(lambda sync_conn: Table(name, MetaData(), autoload_with=sync_conn))
+        except NoSuchTableError:
+            raise HTTPException(status_code=404, detail=f"Table '{name}' has not been loaded")
+        with self._lock:
+            return tables.setdefault(name, table)
+
+    def table(self, db: Session, name: str) -> Table:
+        """Reflected table for a whitelisted spec sheet (404 if not whitelisted)."""
+        self.refresh(db)
+        if name not in self.table_names:
+            raise HTTPException(status_code=404, detail="Table not whitelisted")
+        return self._reflect(db, name)
+
+    def dataset(self, db: Session, name: str) -> Table:
+        """Reflected table for a whitelisted analysis dataset (404 if unknown)."""
+        self.refresh(db)
+        if name not in self.dataset_names:
+            raise HTTPException(status_code=404, detail="Dataset not found")
+        return self._reflect(db, name)
+
+
+    async def atable(self, db: AsyncSession, name: str) -> Table:
+        """``table`` on an AsyncSession (async handlers, ``DB_ASYNC=1``)."""
+        await self.arefresh(db)
+        if name not in self.table_names:
+            raise HTTPException(status_code=404, detail="Table not whitelisted")
+        return await self._areflect(db, name)
+
+    async def adataset(self, db: AsyncSession, name: str) -> Table:
+        """``dataset`` on an AsyncSession (async handlers, ``DB_ASYNC=1``)."""
+        await self.arefresh(db)
+        if name not in self.dataset_names:
+            raise HTTPException(status_code=404, detail="Dataset not found")
+        return await self._areflect(db, name)
+
+
+registry = SpecRegistry()
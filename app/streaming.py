@@ -0,0 +1,86 @@
+# app/streaming.py
+"""Streaming NDJSON / CSV responses for large spec sheets.
+
+Selected by the client's ``Accept`` header. Rows are pulled through a
+server-side cursor in ``STREAM_BATCH`` sized partitions and encoded chunk by
+chunk, so worker memory stays flat however large the sheet is.
+"""
+import csv
+import io
+import json
+import os
+from typing import AsyncIterator, Dict, Iterator, List, Optional
+
+from fastapi import Request, Response
+from fastapi.responses import StreamingResponse
+from sqlalchemy.engine import Engine
+from sqlalchemy.ext.asyncio import AsyncEngine
+from sqlalchemy.sql import Select
+
+NDJSON = "application/x-ndjson"
+CSV = "text/csv"
+STREAM_BATCH = int(os.getenv("STREAM_BATCH", "1000"))
+
+
+def negotiate(request: Request) -> Optional[str]:
+    """Return the streaming media type the client asked for, if any."""
+    accept = request.headers.get("accept", "")
+    for part in accept.split(","):
+        media_type = part.split(";", 1)[0].strip().lower()
+        if media_type in (NDJSON, CSV):
+            return media_type
+    return None
+
+
+def _encode(keys: list, rows, media_type: str, header: bool) -> bytes:
+    if media_type == CSV:
+        buf = io.StringIO()
+        writer = csv.writer(buf)
+        if header:
+            writer.writerow(keys)
+        writer.writerows(rows)
+        return buf.getvalue().encode()
+    return "".join(json.dumps(dict(zip(keys, row)), default=str) + "\n" for row in rows).encode()
+
+
+def _iter_rows(engine: Engine, stmt: Select, media_type: str) -> Iterator[bytes]:
+    # A dedicated connection: the request's Session is closed before the body
+    # is sent, and a server-side cursor must stay open until the last chunk.
+    with engine.connect() as conn:
+        result = conn.execution_options(stream_results=True, yield_per=STREAM_BATCH).execute(stmt)
+        keys = list(result.keys())
+        header = True
+        for rows in result.partitions():
+            yield _encode(keys, rows, media_type, header)
+            header = False
+        if header and media_type == CSV:
+            yield _encode(keys, [], media_type, header)
+
+
+async def _aiter_rows(engine: AsyncEngine, stmt: Select, media_type: str) -> AsyncIterator[bytes]:
+    # As _iter_rows; AsyncConnection.stream() always uses a server-side cursor.
+    async with engine.connect() as conn:
+        result = await conn.stream(stmt.execution_options(yield_per=STREAM_BATCH))
+        keys = list(result.keys())
+        header = True
+        async for rows in result.partitions():
+            yield _encode(keys, rows, media_type, header)
+            header = False
+        if header and media_type == CSV:
+            yield _encode(keys, [], media_type, header)
+
+
+def stream_rows(engine: Engine, stmt: Select, media_type: str) -> StreamingResponse:
+    return StreamingResponse(_iter_rows(engine, stmt, media_type), media_type=media_type)
+
+
+def astream_rows(engine: AsyncEngine, stmt: Select, media_type: str) -> StreamingResponse:
+    """``stream_rows`` for async handlers: the body is read on the event loop."""
+    return StreamingResponse(_aiter_rows(engine, stmt, media_type), media_type=media_type)
+
+
+def page_response(rows: List[dict], media_type: str, headers: Dict[str, str]) -> Response:
+    """An already-fetched (bounded) page in the negotiated streaming format."""
+    keys = list(rows[0]) if rows else []
+    body = _encode(keys, [list(r.values()) for r in rows], media_type, header=True)
+    return Response(body, media_type=media_type, headers=headers)
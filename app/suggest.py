@@ -0,0 +1,274 @@
+# app/suggest.py
+"""In-memory prefix indexes behind ``/v1/personnel/suggest`` and
+``/v1/program_qc/suggest`` (typeahead for the assignee/reviewer and program
+pickers).
+
+Each index is one sorted list of keys ``<tier><normalized text>\\0<id>``;
+a lookup is two ``bisect`` range scans, so it costs O(log n + k) and never
+touches the database. Names are normalized to lower-case words
+(``t_14-1_DM.sas`` -> ``t 14 1 dm sas``). Tier 0 keys hold a whole field,
+tier 1 keys the field from each later word on, so ``smi`` finds
+``John Smith`` and ``14 1`` finds ``t_14-1_dm.sas``. Results are ranked by
+tier (matches at the start of a name first), then alphabetically; an exact
+match sorts first within its tier. The handlers are ``async def``: a lookup
+does no I/O, so it is answered on the event loop without a threadpool hop.
+
+The indexes are built at startup. Writes made through this process (the
+single-row handlers in an ``after_commit`` hook, ``run_batch`` via
+``record``) are applied as soon as they commit. Writes made elsewhere
+(another worker, the CSV loader) are picked up in a background thread once
+the table's change version (``changes``) has moved, by re-reading the rows
+updated since the last pass and the ids tombstoned since, as ``/v1/sync``
+does. A lookup starts that check at most every ``SUGGEST_REFRESH`` seconds
+(0 disables it).
+"""
+import os
+import re
+import threading
+import time
+import unicodedata
+from bisect import bisect_left, insort
+from datetime import timedelta
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+from sqlalchemy import String, event, select, type_coerce
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session
+
+from . import metrics, tombstones
+from .models import Personnel, ProgramQC, TableVersion
+
+REFRESH_SECONDS = float(os.getenv("SUGGEST_REFRESH", "60"))
+SETTLE_SECONDS = int(os.getenv("SYNC_SETTLE_SECONDS", "5"))  # as /v1/sync: allow for open transactions
+KEY_CHARS = 48      # indexed characters per key; longer queries match on these
+MAX_WORD_KEYS = 8   # tier 1 keys per field
+_INFO_KEY = "pending_suggest"
+_SEP = "\0"         # sorts before any text, so a key's id never splits a prefix range
+
+
+def normalize(value: Optional[str]) -> str:
+    """Lower-case words of ``value`` joined by single spaces (accents dropped)."""
+    if not value:
+        return ""
+    folded = unicodedata.normalize("NFKD", value).encode("ascii", "ignore").decode().lower()
+    return " ".join(re.findall(r"[a-z0-9]+", folded))
+
+
+def keys_for(row_id: int, texts: Iterable[Optional[str]]) -> List[str]:
+    keys = set()
+    for text in texts:
+        words = normalize(text).split(" ")
+        if not words[0]:
+            continue
+        keys.add(f"0{' '.join(words)[:KEY_CHARS]}{_SEP}{row_id}")
+        starts = [i for i in range(1, len(words)) if len(words[i]) > 1][:MAX_WORD_KEYS]
+        keys.update(f"1{' '.join(words[i:])[:KEY_CHARS]}{_SEP}{row_id}" for i in starts)
+    return sorted(keys)
+
+
+class PrefixIndex:
+    """Sorted-key prefix index over ``fields`` of ``model``; rows are ``columns`` dicts."""
+
+    def __init__(self, model, fields: Sequence[str], columns: Sequence[str]):
+        self.model = model
+        self.table = model.__tablename__
+        self.fields = tuple(fields)
+        self.columns = tuple(columns)
+        self._keys: List[str] = []
+        self._rows: Dict[int, dict] = {}
+        self._row_keys: Dict[int, List[str]] = {}
+        self._lock = threading.Lock()
+        self._log: Optional[List[Tuple[int, Optional[dict]]]] = None  # writes applied while a sync reads
+        self.version: Optional[int] = None   # table version at the last sync
+        self.watermark: Optional[str] = None  # rows updated since then are re-read
+        self.checked = 0.0
+        self.rebuilds = 0
+
+    def __len__(self) -> int:
+        return len(self._rows)
+
+    # ---- queries ----
+    def search(self, q: str, limit: int) -> List[dict]:
+        prefix = normalize(q)[:KEY_CHARS]
+        if not prefix:
+            return []
+        found: Dict[int, dict] = {}
+        with self._lock:
+            keys = self._keys
+            for tier in "01":
+                start = tier + prefix
+                i = bisect_left(keys, start)
+                while i < len(keys) and keys[i].startswith(start) and len(found) < limit:
+                    row_id = int(keys[i].rpartition(_SEP)[2])
+                    if row_id not in found:
+                        found[row_id] = self._rows[row_id]
+                    i += 1
+        return list(found.values())
+
+    # ---- maintenance ----
+    def _row(self, values: dict) -> dict:
+        return {c: values[c] for c in self.columns}
+
+    def _put(self, row_id: int, row: Optional[dict]) -> None:
+        for key in self._row_keys.pop(row_id, ()):
+            i = bisect_left(self._keys, key)
+            if i < len(self._keys) and self._keys[i] == key:
+                del self._keys[i]
+        self._rows.pop(row_id, None)
+        if row is None:
+            return
+        self._rows[row_id] = row
+        self._row_keys[row_id] = keys_for(row_id, (row[f] for f in self.fields))
+        for key in self._row_keys[row_id]:
+            insort(self._keys, key)
+
+    def apply(self, changes: Iterable[Tuple[int, Optional[dict]]]) -> None:
+        """Upsert rows (``None`` removes the id)."""
+        with self._lock:
+            for row_id, row in changes:
+                self._put(row_id, row)
+                if self._log is not None:
+                    self._log.append((row_id, row))
+
+    def _keyed(self, values) -> Tuple[dict, List[str]]:
+        row = self._row(values)
+        return row, keys_for(row["id"], (row[f] for f in self.fields))
+
+    def sync(self, conn, full: bool = False) -> None:
+        """Catch up with the table as ``conn`` sees it: everything written
+        since the last sync, or all of it when ``full`` (or when the
+        tombstones needed for a delta have been pruned)."""
+        with self._lock:
+            self._log = []
+        try:
+            now = tombstones.database_now(conn)
+            version = conn.execute(
+                select(TableVersion.version).where(TableVersion.table_name == self.table)
+            ).scalar()
+            full = full or self.watermark is None or self.watermark < tombstones.horizon(now)
+            stmt = select(*[getattr(self.model, c) for c in self.columns])
+            if not full:
+                stmt = stmt.where(type_coerce(self.model.updated_at, String) >= self.watermark)
+            changed = [self._keyed(values) for values in conn.execute(stmt).mappings()]
+            deleted = [] if full else tombstones.deleted_since(conn, self.model.__table__, self.watermark)
+            keys = sorted(key for _, row_keys in changed for key in row_keys) if full else None
+        except BaseException:
+            with self._lock:
+                self._log = None
+            raise
+        with self._lock:
+            if full:
+                self._keys = keys
+                self._rows = {row["id"]: row for row, _ in changed}
+                self._row_keys = {row["id"]: row_keys for row, row_keys in changed}
+                self.rebuilds += 1
+            else:
+                for row, _ in changed:
+                    self._put(row["id"], row)
+                for row_id in deleted:
+                    self._put(row_id, None)
+            for row_id, row in self._log:  # committed while we read: newer than what we read
+                self._put(row_id, row)
+            self._log = None
+            self.version = version
+            self.watermark = tombstones.stamp(now - timedelta(seconds=SETTLE_SECONDS))
+            self.checked = time.monotonic()
+
+
+PERSONNEL = PrefixIndex(Personnel, ["full_name", "preferred_name"], ["id", "full_name", "preferred_name", "status"])
+PROGRAMS = PrefixIndex(ProgramQC, ["program_name"], ["id", "program_name", "status", "deliverable_id"])
+INDEXES = {Personnel: PERSONNEL, ProgramQC: PROGRAMS}
+
+_engine: Optional[Engine] = None
+_refreshing = threading.Lock()
+
+
+def build(engine: Engine) -> None:
+    """Build every index from ``engine`` (at startup)."""
+    global _engine
+    _engine = engine
+    with engine.connect() as conn:
+        for index in INDEXES.values():
+            index.sync(conn, full=True)
+
+
+def _refresh() -> None:
+    try:
+        with _engine.connect() as conn:
+            for index in INDEXES.values():
+                version = conn.execute(
+                    select(TableVersion.version).where(TableVersion.table_name == index.table)
+                ).scalar()
+                if version != index.version:
+                    index.sync(conn)
+                index.checked = time.monotonic()
+    finally:
+        _refreshing.release()
+
+
+def suggest(index: PrefixIndex, q: str, limit: int) -> List[dict]:
+    """Top ``limit`` rows of ``index`` for ``q``; may start a background refresh."""
+    if (REFRESH_SECONDS and _engine is not None and time.monotonic() - index.checked > REFRESH_SECONDS
+            and _refreshing.acquire(blocking=False)):
+        threading.Thread(target=_refresh, name="suggest-refresh", daemon=True).start()
+    return index.search(q, limit)
+
+
+# ---- capture ----
+def record(session: Session, model, ids: Iterable[int], deleted: bool = False) -> None:
+    """Queue rows ``ids`` of ``model`` (read as they are now) for the index."""
+    index = INDEXES.get(model)
+    ids = list(ids)
+    if index is None or not ids:
+        return
+    pending = session.info.setdefault(_INFO_KEY, {})
+    if deleted:
+        pending.update({(index.table, row_id): None for row_id in ids})
+        return
+    cols = [getattr(model, c) for c in index.columns]
+    for values in session.connection().execute(select(*cols).where(model.id.in_(ids))).mappings():
+        pending[(index.table, values["id"])] = index._row(values)
+
+
+@event.listens_for(Session, "after_flush")
+def _after_flush(session, flush_context):
+    pending = None
+    for model, index in INDEXES.items():
+        for obj in session.new | session.dirty | session.deleted:
+            if not isinstance(obj, model):
+                continue
+            if pending is None:
+                pending = session.info.setdefault(_INFO_KEY, {})
+            row = None if obj in session.deleted else index._row({c: getattr(obj, c) for c in index.columns})
+            pending[(index.table, obj.id)] = row
+
+
+@event.listens_for(Session, "after_commit")
+def _after_commit(session):
+    pending = session.info.pop(_INFO_KEY, None)
+    if pending:
+        for index in INDEXES.values():
+            index.apply((row_id, row) for (table, row_id), row in pending.items() if table == index.table)
+
+
+@event.listens_for(Session, "after_rollback")
+def _after_rollback(session):
+    session.info.pop(_INFO_KEY, None)
+
+
+# ---- /v1/metrics ----
+def _render_metrics() -> List[str]:
+    lines = [
+        "# HELP suggest_index_rows Rows held by each typeahead index",
+        "# TYPE suggest_index_rows gauge",
+    ]
+    lines += [f'suggest_index_rows{{entity="{i.table}"}} {len(i)}' for i in INDEXES.values()]
+    lines += [
+        "# HELP suggest_index_rebuilds_total Full rebuilds of each typeahead index",
+        "# TYPE suggest_index_rebuilds_total counter",
+    ]
+    lines += [f'suggest_index_rebuilds_total{{entity="{i.table}"}} {i.rebuilds}' for i in INDEXES.values()]
+    return lines
+
+
+metrics.register_collector(_render_metrics)
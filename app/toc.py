@@ -0,0 +1,162 @@
+# app/toc.py
+"""TOC browsing behind ``/v1/toc`` and its per-type aliases
+(``/v1/toc/tables``, ``/v1/toc/figures``, ``/v1/toc/listings``).
+
+Pages are ordered by ``toc_items.sort_key``, which stores type, priority
+(NULLs last) and code as one string (see ``models.toc_sort_key``), then id.
+``ix_toc_items_browse (sort_key, id, type, status, dataset)`` therefore
+returns rows already in page order; the type/status/dataset filters are
+checked inside the index, and only the rows of the page are read from the
+table. Because the sort key starts with the type's rank, a ``type=`` filter
+is also turned into a ``sort_key`` range, so one type's outputs are a
+single index range however many the study has. Per-type counts
+(``/v1/toc/facets``) are answered from the same index.
+
+The key is computed on insert (the column default) and, for ORM updates
+of type, priority or code, in a ``before_flush`` hook. Core updates that
+leave those columns alone (the CSV loader only rewrites titles) keep it
+valid; ``backfill`` runs at startup and rewrites any key that no longer
+matches its row.
+"""
+from typing import List, Optional
+
+from fastapi import HTTPException, Response
+from sqlalchemy import and_, bindparam, event, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session, attributes
+
+from .facets import afacet_counts, facet_counts, parse_facets
+from .models import TOC_TYPE_RANKS, TOCItem, toc_sort_key
+from .pagination import SortKey, apaginate, paginate
+from .projection import parse_fields, schema_columns
+from .responses import rows_response
+from .schemas import TOCItemOut
+from .search import atext_filter, text_filter
+
+TYPES = tuple(TOC_TYPE_RANKS)
+PROJECTABLE = schema_columns(TOCItem, TOCItemOut)
+FACET_FIELDS = {"type": TOCItem.type, "status": TOCItem.status, "dataset": TOCItem.dataset}
+SORT_KEYS = [SortKey(TOCItem.sort_key), SortKey(TOCItem.id)]
+SEARCHED = [TOCItem.code, TOCItem.title]
+SORT_KEY_SOURCES = ("type", "priority", "code")
+BACKFILL_BATCH = 1000
+
+
+def split(value: Optional[str]) -> Optional[List[str]]:
+    """``table,figure`` -> ``["table", "figure"]``; None when empty."""
+    values = [v.strip() for v in (value or "").split(",") if v.strip()]
+    return list(dict.fromkeys(values)) or None
+
+
+def parse_types(value: Optional[str]) -> Optional[List[str]]:
+    types = split(value)
+    unknown = [t for t in types or [] if t not in TOC_TYPE_RANKS]
+    if unknown:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Unknown TOC type(s): {', '.join(unknown)}; allowed: {', '.join(TYPES)}",
+        )
+    return types
+
+
+def _type_range(types: List[str]) -> list:
+    """sort_key bounds covering ``types`` (their rank is its first character)."""
+    ranks = sorted(int(TOC_TYPE_RANKS[t]) for t in types)
+    return [TOCItem.sort_key >= str(ranks[0]), TOCItem.sort_key < str(ranks[-1] + 1)]
+
+
+def filters(db: Session, types: Optional[List[str]], q: Optional[str],
+            statuses: Optional[List[str]], datasets: Optional[List[str]]) -> list:
+    text = text_filter(db, TOCItem.__table__, q, SEARCHED) if q else None
+    return _conds(types, text, statuses, datasets)
+
+
+async def afilters(db: AsyncSession, types: Optional[List[str]], q: Optional[str],
+                   statuses: Optional[List[str]], datasets: Optional[List[str]]) -> list:
+    text = await atext_filter(db, TOCItem.__table__, q, SEARCHED) if q else None
+    return _conds(types, text, statuses, datasets)
+
+
+def _conds(types: Optional[List[str]], text, statuses: Optional[List[str]], datasets: Optional[List[str]]) -> list:
+    conds = []
+    if types:
+        conds.append(TOCItem.type.in_(types) if len(types) > 1 else TOCItem.type == types[0])
+        conds.extend(_type_range(types))
+    if statuses:
+        conds.append(TOCItem.status.in_(statuses) if len(statuses) > 1 else TOCItem.status == statuses[0])
+    if datasets:
+        conds.append(TOCItem.dataset.in_(datasets) if len(datasets) > 1 else TOCItem.dataset == datasets[0])
+    if text is not None:
+        conds.append(text)
+    return conds
+
+
+def list_items(db: Session, response: Response, types: Optional[List[str]], *, fields: Optional[str] = None,
+               q: Optional[str] = None, statuses: Optional[List[str]] = None,
+               datasets: Optional[List[str]] = None, limit: int = 50, offset: int = 0,
+               cursor: Optional[str] = None) -> Response:
+    """One page of TOC items, in TOC order."""
+    stmt = _page_select(fields, filters(db, types, q, statuses, datasets))
+    rows = paginate(db, stmt, SORT_KEYS, limit=limit, offset=offset, cursor=cursor, response=response, mappings=True)
+    return rows_response(rows, response)
+
+
+async def alist_items(db: AsyncSession, response: Response, types: Optional[List[str]], *,
+                      fields: Optional[str] = None, q: Optional[str] = None,
+                      statuses: Optional[List[str]] = None, datasets: Optional[List[str]] = None,
+                      limit: int = 50, offset: int = 0, cursor: Optional[str] = None) -> Response:
+    """``list_items`` on an AsyncSession (async handlers, ``DB_ASYNC=1``)."""
+    stmt = _page_select(fields, await afilters(db, types, q, statuses, datasets))
+    rows = await apaginate(db, stmt, SORT_KEYS, limit=limit, offset=offset, cursor=cursor,
+                           response=response, mappings=True)
+    return rows_response(rows, response)
+
+
+def _page_select(fields: Optional[str], conds: list):
+    projection = parse_fields(fields, PROJECTABLE) or list(PROJECTABLE)
+    stmt = select(*[PROJECTABLE[f] for f in projection])
+    return stmt.where(and_(*conds)) if conds else stmt
+
+
+def facets(db: Session, names: str, conds: list) -> dict:
+    return facet_counts(db, TOCItem, FACET_FIELDS, parse_facets(names, FACET_FIELDS), conds)
+
+
+async def afacets(db: AsyncSession, names: str, conds: list) -> dict:
+    return await afacet_counts(db, TOCItem, FACET_FIELDS, parse_facets(names, FACET_FIELDS), conds)
+
+
+@event.listens_for(Session, "before_flush")
+def _before_flush(session, flush_context, instances):
+    for obj in session.dirty:
+        if isinstance(obj, TOCItem) and any(
+            attributes.get_history(obj, name).has_changes() for name in SORT_KEY_SOURCES
+        ):
+            obj.sort_key = toc_sort_key(obj.type, obj.priority, obj.code)
+
+
+def backfill(conn) -> int:
+    """Rewrite ``sort_key`` where it is missing or stale; returns the count."""
+    table = TOCItem.__table__
+    total = 0
+    last_id = 0
+    while True:
+        rows = conn.execute(
+            select(TOCItem.id, TOCItem.type, TOCItem.priority, TOCItem.code, TOCItem.sort_key)
+            .where(TOCItem.id > last_id)
+            .order_by(TOCItem.id)
+            .limit(BACKFILL_BATCH)
+        ).all()
+        if not rows:
+            return total
+        last_id = rows[-1].id
+        keys = {r.id: toc_sort_key(r.type, r.priority, r.code) for r in rows}
+        stale = [{"row_id": r.id, "sort_key": keys[r.id]} for r in rows if keys[r.id] != r.sort_key]
+        if stale:
+            conn.execute(
+                update(table)
+                .where(table.c.id == bindparam("row_id"))
+                .values(updated_at=table.c.updated_at),  # not a content change: keep delta sync quiet
+                stale,
+            )
+        total += len(stale)
@@ -0,0 +1,102 @@
+# app/tombstones.py
+"""Deletion log behind ``/v1/sync/{entity}``.
+
+Every delete of a synced row leaves ``(table_name, row_id, deleted_at)`` in
+``tombstones``, in the same transaction, so offline clients can drop rows
+they hold without re-pulling the table:
+
+* ORM deletes (the single-row handlers) in an ``after_flush`` hook;
+* ``run_batch`` and the CSV loader's ``--replace``, which call ``record``.
+
+Tombstones older than ``SYNC_TOMBSTONE_DAYS`` are pruned at startup; sync
+tokens older than that are refused so clients fall back to a full pull.
+"""
+import os
+from datetime import datetime, timedelta
+from typing import Iterable
+
+from sqlalchemy import String, delete, event, exists, func, select, type_coerce
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from .db import upsert
+from .models import Tombstone
+
+RETENTION_DAYS = int(os.getenv("SYNC_TOMBSTONE_DAYS", "30"))
+TIMESTAMP_FORMAT = "%Y-%m-%d %H:%M:%S"  # SQLite CURRENT_TIMESTAMP; MySQL parses it too
+SYNCED_TABLES = frozenset({"deliverables", "personnel", "program_qc", "qc_comments", "toc_items"})
+
+# deleted_at compared as stored text, like pagination's DateTime sort keys
+_deleted_at = type_coerce(Tombstone.deleted_at, String)
+_NOW = select(type_coerce(func.now(), String))
+
+
+def record(conn, table_name: str, ids: Iterable[int]) -> None:
+    """Log the deletion of ``ids`` from ``table_name``; ``deleted_at`` is the DB clock."""
+    ids = sorted(set(ids))
+    if table_name not in SYNCED_TABLES or not ids:
+        return
+    stmt = upsert(Tombstone.__table__, conn.dialect.name, ["deleted_at"])
+    conn.execute(stmt, [{"table_name": table_name, "row_id": row_id} for row_id in ids])
+
+
+@event.listens_for(Session, "after_flush")
+def _after_flush(session, flush_context):
+    deleted = {}
+    for obj in session.deleted:
+        table = getattr(obj, "__tablename__", None)
+        if table in SYNCED_TABLES:
+            deleted.setdefault(table, []).append(obj.id)
+    for table, ids in deleted.items():
+        record(session.connection(), table, ids)
+
+
+def deleted_since(db: Session, table, since: str) -> list:
+    """Ids deleted from ``table`` at or after ``since`` that do not exist again."""
+    return list(db.execute(_deleted_since_query(table, since)).scalars())
+
+
+async def adeleted_since(db: AsyncSession, table, since: str) -> list:
+    """``deleted_since`` on an AsyncSession (async handlers, ``DB_ASYNC=1``)."""
+    return list((await db.execute(_deleted_since_query(table, since))).scalars())
+
+
+def _deleted_since_query(table, since: str):
+    return (
+        select(Tombstone.row_id)
+        .where(
+            Tombstone.table_name == table.name,
+            _deleted_at >= since,
+            ~exists().where(table.c.id == Tombstone.row_id),
+        )
+        .order_by(Tombstone.row_id)
+    )
+
+
+def database_now(conn) -> datetime:
+    """The database clock, which stamps ``updated_at`` and ``deleted_at``."""
+    return _as_datetime(conn.execute(_NOW).scalar())
+
+
+async def adatabase_now(db: AsyncSession) -> datetime:
+    """``database_now`` on an AsyncSession (async handlers, ``DB_ASYNC=1``)."""
+    return _as_datetime((await db.execute(_NOW)).scalar())
+
+
+def _as_datetime(value) -> datetime:
+    return value if isinstance(value, datetime) else datetime.fromisoformat(str(value))
+
+
+def stamp(value: datetime) -> str:
+    """``value`` in the stored timestamp text format."""
+    return value.strftime(TIMESTAMP_FORMAT)
+
+
+def horizon(now: datetime) -> str:
+    """Oldest point tombstones are kept for."""
+    return stamp(now - timedelta(days=RETENTION_DAYS))
+
+
+def prune(conn) -> int:
+    stmt = delete(Tombstone).where(_deleted_at < horizon(database_now(conn)))
+    return conn.execute(stmt).rowcount
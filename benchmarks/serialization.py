@@ -0,0 +1,95 @@
+# benchmarks/serialization.py
+"""Per-row cost of list-response serialization, before and after the fast path.
+
+before: ORM entities -> response_model validation (from_attributes) ->
+        JSON-mode dump -> json.dumps (what FastAPI does for a returned list)
+after:  Core row mappings -> pydantic_core.to_json (``responses.rows_response``)
+
+Runs against an in-memory SQLite database, so it needs no server or data::
+
+    python -m benchmarks.serialization [--rows 5000] [--repeat 5]
+"""
+import argparse
+import json
+import time
+from datetime import datetime, timedelta
+from typing import List
+
+from pydantic import TypeAdapter
+from pydantic_core import to_json
+from sqlalchemy import create_engine, select
+from sqlalchemy.orm import Session
+
+from app.db import Base
+from app.models import ProgramQC
+from app.projection import schema_columns
+from app.schemas import ProgramQCOut
+
+STATUSES = ["Not Started", "In Progress", "Passed", "Failed"]
+
+
+def _seed(session: Session, n: int) -> None:
+    start = datetime(2024, 1, 1)
+    session.add_all(
+        ProgramQC(
+            program_name=f"t_{i:05d}.sas",
+            status=STATUSES[i % len(STATUSES)],
+            assignee=f"user{i % 17}",
+            reviewer=f"user{(i + 5) % 17}" if i % 3 else None,
+            deliverable_id=None,
+            created_at=start + timedelta(minutes=i),
+            updated_at=start + timedelta(minutes=i, seconds=30),
+        )
+        for i in range(n)
+    )
+    session.commit()
+
+
+def _before(session: Session, adapter: TypeAdapter) -> bytes:
+    objs = session.execute(select(ProgramQC).order_by(ProgramQC.id)).scalars().all()
+    content = adapter.dump_python(adapter.validate_python(objs, from_attributes=True), mode="json")
+    return json.dumps(content, ensure_ascii=False, allow_nan=False, indent=None, separators=(",", ":")).encode()
+
+
+def _after(session: Session, columns: list) -> bytes:
+    rows = session.execute(select(*columns).order_by(ProgramQC.id)).mappings().all()
+    return to_json([dict(r) for r in rows])
+
+
+def _time(fn, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - t0)
+    return best
+
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.serialization")
+    parser.add_argument("--rows", type=int, default=5000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args(argv)
+
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(engine)
+    adapter = TypeAdapter(List[ProgramQCOut])
+    columns = list(schema_columns(ProgramQC, ProgramQCOut).values())
+
+    with Session(engine) as session:
+        _seed(session, args.rows)
+        session.expunge_all()
+        # Same document either way (ISO datetimes, schema field order)
+        assert json.loads(_before(session, adapter)) == json.loads(_after(session, columns))
+        results = {}
+        for name, fn in (("before", lambda: _before(session, adapter)), ("after", lambda: _after(session, columns))):
+            session.expunge_all()  # no identity-map reuse between runs
+            results[name] = _time(lambda: (fn(), session.expunge_all()), args.repeat)
+
+    for name, seconds in results.items():
+        print(f"{name:<7} {seconds * 1e6 / args.rows:8.2f} us/row  ({seconds * 1e3:.1f} ms for {args.rows} rows)")
+    print(f"speedup {results['before'] / results['after']:.2f}x")
+
+
+if __name__ == "__main__":
+    main()
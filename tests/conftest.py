@@ -0,0 +1,74 @@
+# tests/conftest.py
+"""Shared fixtures: the app on a throwaway SQLite database loaded from ``data/``.
+
+The app reads its settings from the environment when ``app.db`` is first
+imported, so they are set here, before any test module imports ``app``.
+``DB_ASYNC`` is passed through: ``DB_ASYNC=1 pytest`` runs the suite
+against the async handlers.
+"""
+import os
+import shutil
+import tempfile
+from pathlib import Path
+
+import pytest
+
+ROOT = Path(__file__).resolve().parents[1]
+DB_DIR = Path(tempfile.mkdtemp(prefix="tracker-tests-"))
+DB_PATH = DB_DIR / "test.db"
+
+os.environ.update({
+    "DB_URL": f"sqlite:///{DB_PATH}",
+    "SUGGEST_REFRESH": "0",     # tests call suggest.build / sync themselves
+    "DB_SLOW_QUERY_MS": "0",
+})
+for name in ("DB_READ_URL", "PROFILE_TOKEN", "THREADPOOL_SIZE"):
+    os.environ.pop(name, None)
+
+
+@pytest.fixture(scope="session")
+def data_dir():
+    return ROOT / "data"
+
+
+@pytest.fixture(scope="session", autouse=True)
+def database(data_dir):
+    """Every tracker file and spec sheet under ``data/``, loaded once."""
+    from app import ingest
+
+    ingest.main(["--data-dir", str(data_dir)])
+    yield DB_PATH
+    from app.db import engine
+
+    engine.dispose()
+    shutil.rmtree(DB_DIR, ignore_errors=True)
+
+
+@pytest.fixture(scope="session")
+def client(database):
+    from fastapi.testclient import TestClient
+    from app.main import app
+
+    with TestClient(app) as c:
+        yield c
+
+
+@pytest.fixture(scope="session")
+def served_engine(client):
+    """The engine the app's handlers run their statements on (``DB_ASYNC=1``:
+    the async engine's sync facade, where its events fire)."""
+    from app.db import async_engine, engine
+
+    return engine if async_engine is None else async_engine.sync_engine
+
+
+@pytest.fixture
+def program(client):
+    """A fresh program QC row, deleted afterwards with any comments left on it."""
+    created = client.post("/v1/program_qc", json={"program_name": "t_fixture_program", "status": "Planned"})
+    assert created.status_code == 201, created.text
+    yield created.json()
+    qc_id = created.json()["id"]
+    comments = client.get("/v1/qc_comments", params={"program_qc_id": qc_id, "limit": 500}).json()
+    client.post("/v1/qc_comments:batch", json={"delete": [c["id"] for c in comments]})
+    client.delete(f"/v1/program_qc/{qc_id}")
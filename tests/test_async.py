@@ -0,0 +1,175 @@
+# tests/test_async.py
+"""The async handlers (``DB_ASYNC=1``), served next to the sync app.
+
+``aclient`` is an app with every router's ``async_router`` on its own
+aiosqlite engine over the test database, so both sets of handlers are
+checked against each other in one run.
+"""
+import asyncio
+import inspect
+import json
+import os
+
+import httpx
+import pytest
+from fastapi import FastAPI
+from fastapi.routing import APIRoute
+from fastapi.testclient import TestClient
+
+from app import db, main, profiling, replica
+from app.cache import response_cache
+from app.conditional import NotModified
+from app.responses import FastJSONResponse
+from app.spec_registry import registry
+from app.streaming import NDJSON
+
+
+@pytest.fixture(scope="module")
+def async_app(client):
+    engine = db.create_async(db.async_url(os.environ["DB_URL"]), "primary_async")
+    sessions = db.async_sessions(engine)
+    app = FastAPI(default_response_class=FastJSONResponse)
+    app.add_middleware(profiling.ProfilingMiddleware)
+    app.add_exception_handler(NotModified, main.not_modified)
+    for module, tag in main.ROUTERS:
+        app.include_router(module.async_router, prefix="/v1", tags=[tag])
+    with pytest.MonkeyPatch.context() as mp:
+        for target in (db, replica):
+            mp.setattr(target, "AsyncSessionLocal", sessions)
+        mp.setattr(replica, "AsyncReadSessionLocal", sessions)
+        yield app, engine
+
+
+@pytest.fixture(scope="module")
+def aclient(async_app):
+    app, engine = async_app
+    with TestClient(app) as c:
+        yield c
+        c.portal.call(engine.dispose)  # its connections belong to this client's event loop
+
+
+@pytest.fixture(autouse=True)
+def _fresh():
+    response_cache.clear()
+
+
+def _dependencies(dependant):
+    for dep in dependant.dependencies:
+        yield dep.call
+        yield from _dependencies(dep)
+
+
+def _routes(router):
+    return [(r.path, sorted(r.methods)) for r in router.routes if isinstance(r, APIRoute)]
+
+
+@pytest.mark.parametrize("module", [m for m, _ in main.ROUTERS], ids=[m.__name__ for m, _ in main.ROUTERS])
+def test_async_router_mirrors_the_sync_one(module):
+    assert _routes(module.async_router) == _routes(module.router)  # same order: /suggest before /{id}
+    for route in module.async_router.routes:
+        deps = set(_dependencies(route.dependant))
+        assert inspect.iscoroutinefunction(route.endpoint)
+        assert not {db.get_db, replica.get_read_db} & deps
+
+
+@pytest.mark.parametrize("path,params", [
+    ("/v1/program_qc", {"limit": 3}),
+    ("/v1/program_qc", {"limit": 3, "include": "deliverable,comment_counts"}),
+    ("/v1/qc_comments", {"limit": 4, "fields": "id,author"}),
+    ("/v1/personnel", {"limit": 5, "q": "a"}),
+    ("/v1/deliverables", {"limit": 2}),
+    ("/v1/toc", {"limit": 5, "type": "table,listing"}),
+    ("/v1/toc/figures", {"limit": 5}),
+    ("/v1/specs/ADSL", {"limit": 7, "sort": "-variable"}),
+    ("/v1/specs/datasets/ADSL", {"limit": 3}),
+])
+def test_pages_match_the_sync_handlers(client, aclient, path, params):
+    expected = client.get(path, params=params)
+    response_cache.clear()  # shared by both apps
+    got = aclient.get(path, params=params)
+    assert got.status_code == 200 and got.json() == expected.json()
+    assert int(got.headers["x-query-count"]) >= 1
+    cursor = got.headers.get("x-next-cursor")
+    assert cursor == expected.headers.get("x-next-cursor")
+    if cursor:
+        following = {**params, "cursor": cursor}
+        expected = client.get(path, params=following).json()
+        response_cache.clear()
+        assert aclient.get(path, params=following).json() == expected
+
+
+def test_lookup_and_facets(client, aclient):
+    ids = [row["id"] for row in client.get("/v1/qc_comments", params={"limit": 3}).json()]
+    body = aclient.post("/v1/qc_comments:lookup", json={"ids": [ids[2], -1, ids[0]]}).json()
+    assert [row["id"] for row in body["items"]] == [ids[2], ids[0]] and body["missing"] == [-1]
+    r = aclient.get("/v1/qc_comments", params={"ids": f"{ids[0]},999999"})
+    assert r.status_code == 200 and r.headers["x-missing-ids"] == "999999"
+
+    expected = client.get("/v1/program_qc/facets", params={"facets": "status"}).json()
+    response_cache.clear()
+    facets = aclient.get("/v1/program_qc/facets", params={"facets": "status"})
+    assert facets.json() == expected and facets.headers["x-cache"] == "MISS"
+    response_cache.clear()
+    again = aclient.get("/v1/program_qc/facets", params={"facets": "status"},
+                        headers={"If-None-Match": facets.headers["etag"]})
+    assert again.status_code == 304
+    toc = aclient.get("/v1/toc/facets", params={"facets": "type,status"})
+    response_cache.clear()
+    assert toc.json() == client.get("/v1/toc/facets", params={"facets": "type,status"}).json()
+
+
+def test_writes_run_the_session_hooks(client, aclient):
+    created = aclient.post("/v1/program_qc", json={"program_name": "t_async_program", "status": "Planned"})
+    assert created.status_code == 201
+    qc_id = created.json()["id"]
+    assert client.get(f"/v1/program_qc/{qc_id}").json() == created.json()
+
+    patched = aclient.patch(f"/v1/program_qc/{qc_id}", json={"status": "Complete"}).json()
+    assert patched["status"] == "Complete" and patched["updated_at"]
+    assert [r["id"] for r in aclient.get("/v1/program_qc/suggest", params={"q": "t async program"}).json()] == [qc_id]
+
+    batch = aclient.post("/v1/qc_comments:batch", json={"create": [
+        {"program_qc_id": qc_id, "author": "a", "comment_text": f"c{i}"} for i in range(2)
+    ]}).json()
+    comment_ids = [r["id"] for r in batch["results"]]
+    got = aclient.get(f"/v1/program_qc/{qc_id}", params={"include": "comment_counts"}).json()
+    assert got["comment_counts"] == {"total": 2, "unresolved": 2}
+
+    since = aclient.get("/v1/sync/program_qc", params={"limit": 1}).json()
+    while since["has_more"]:
+        since = aclient.get("/v1/sync/program_qc", params={"since": since["next_since"], "limit": 5000}).json()
+    aclient.post("/v1/qc_comments:batch", json={"delete": comment_ids})
+    assert aclient.delete(f"/v1/program_qc/{qc_id}").status_code == 204
+    assert aclient.get(f"/v1/program_qc/{qc_id}").status_code == 404
+    changed = aclient.get("/v1/sync/program_qc", params={"since": since["next_since"]}).json()
+    assert qc_id in changed["deleted"]  # the tombstone hook ran on the async commit
+
+
+def test_specs_stream_and_search(aclient):
+    rows = aclient.get("/v1/specs/ADSL").json()
+    r = aclient.get("/v1/specs/ADSL", headers={"Accept": NDJSON})
+    assert r.headers["content-type"].startswith(NDJSON) and r.headers["etag"]
+    assert [json.loads(line) for line in r.text.splitlines()] == rows
+    assert aclient.get("/v1/specs/spec_tables").status_code == 404
+    assert aclient.get("/v1/specs/datasets/nope").status_code == 404
+    assert aclient.post("/v1/specs/reload").json()["tables"] == len(registry.table_names)
+
+    hits = aclient.get("/v1/search", params={"entity": "program_qc", "q": "t"}).json()
+    assert all(hit["entity"] == "program_qc" for hit in hits)
+    assert aclient.get("/v1/search", params={"entity": "nope", "q": "t"}).status_code == 404
+
+
+def test_concurrent_first_reflections(async_app, aclient):
+    app, _ = async_app
+    names = sorted(registry.table_names)
+
+    async def fetch_all():
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as http:
+            return await asyncio.gather(*[http.get(f"/v1/specs/{name}", params={"limit": 2})
+                                          for name in names * 3])
+
+    aclient.post("/v1/specs/reload")  # every sheet is reflected again, concurrently
+    responses = aclient.portal.call(fetch_all)
+    assert [r.status_code for r in responses] == [200] * len(names) * 3
+    assert all(registry._tables[name] is not None for name in names)
@@ -0,0 +1,84 @@
+# tests/test_batch.py
+import pytest
+from fastapi import HTTPException
+from sqlalchemy import event, func, select
+
+from app.batch import run_batch
+from app.db import SessionLocal, engine
+from app.models import ProgramQC
+from app.schemas import BATCH_MAX_ITEMS
+
+
+def test_results_per_item_in_request_order(client, program):
+    body = client.post("/v1/program_qc:batch", json={
+        "create": [{"program_name": "t_batch_a"}, {"program_name": "t_batch_b", "status": "Planned"}],
+        "update": [{"id": program["id"], "status": "Complete"}, {"id": 999999, "status": "Complete"}],
+        "delete": [999998],
+    }).json()["results"]
+    assert [(r["op"], r["index"], r["status"]) for r in body] == [
+        ("create", 0, 201), ("create", 1, 201), ("update", 0, 200), ("update", 1, 404), ("delete", 0, 404),
+    ]
+    created = [r["item"] for r in body[:2]]
+    assert [c["program_name"] for c in created] == ["t_batch_a", "t_batch_b"]
+    assert created[0]["id"] < created[1]["id"] and created[0]["created_at"]  # server defaults read back
+    assert body[2]["item"]["status"] == "Complete" and body[3]["item"] is None
+    assert body[3]["detail"] == "Not found"
+
+    deleted = client.post("/v1/program_qc:batch", json={"delete": [c["id"] for c in created]}).json()["results"]
+    assert [r["status"] for r in deleted] == [204, 204]
+    assert all(client.get(f"/v1/program_qc/{c['id']}").status_code == 404 for c in created)
+
+
+def test_update_leaves_omitted_and_null_fields_alone(client, program):
+    client.patch(f"/v1/program_qc/{program['id']}", json={"assignee": "Ann"})
+    item = client.post("/v1/program_qc:batch", json={
+        "update": [{"id": program["id"], "status": "Complete", "assignee": None}],
+    }).json()["results"][0]["item"]
+    assert (item["status"], item["assignee"]) == ("Complete", "Ann")
+
+
+def test_comment_batch(client, program):
+    body = client.post("/v1/qc_comments:batch", json={"create": [
+        {"program_qc_id": program["id"], "author": "a", "comment_text": f"c{i}"} for i in range(3)
+    ]}).json()["results"]
+    ids = [r["id"] for r in body]
+    assert [r["item"]["comment_text"] for r in body] == ["c0", "c1", "c2"]
+    assert [r["item"]["resolved"] for r in body] == [False] * 3
+    body = client.post("/v1/qc_comments:batch", json={"update": [{"id": i, "resolved": True} for i in ids]}).json()
+    assert [r["item"]["resolved"] for r in body["results"]] == [True] * 3
+
+
+def test_statement_count_does_not_grow_with_the_batch(client):
+    def count(n):
+        seen = []
+
+        def record(conn, cursor, statement, parameters, context, executemany):
+            seen.append(statement)
+
+        event.listen(engine, "before_cursor_execute", record)
+        try:
+            body = client.post("/v1/program_qc:batch", json={
+                "create": [{"program_name": f"t_batch_n{i}"} for i in range(n)],
+            }).json()["results"]
+        finally:
+            event.remove(engine, "before_cursor_execute", record)
+        client.post("/v1/program_qc:batch", json={"delete": [r["id"] for r in body]})
+        return len(seen)
+
+    assert count(50) == count(2)
+
+
+def test_conflict_rolls_back_the_whole_batch(program):
+    with SessionLocal() as db:
+        before = db.scalar(select(func.count()).select_from(ProgramQC))
+        with pytest.raises(HTTPException) as exc:
+            run_batch(db, ProgramQC, [{"program_name": "t_batch_ok"},
+                                      {"id": program["id"], "program_name": "t_batch_dup"}], [], [])
+        db.rollback()
+        assert exc.value.status_code == 409
+        assert db.scalar(select(func.count()).select_from(ProgramQC)) == before
+
+
+def test_batch_size_limit(client):
+    too_many = [{"program_name": "x"}] * (BATCH_MAX_ITEMS + 1)
+    assert client.post("/v1/program_qc:batch", json={"create": too_many}).status_code == 422
@@ -0,0 +1,80 @@
+# tests/test_cache.py
+import pytest
+
+from app.cache import CACHE_HEADER, ResponseCache, _Entry, response_cache
+from app.db import SessionLocal
+from app.models import TOCItem
+
+
+@pytest.fixture(autouse=True)
+def empty_cache():
+    response_cache.clear()
+
+
+def test_hit_after_miss_with_normalized_key(client):
+    a = client.get("/v1/toc/tables?limit=3&q=")
+    b = client.get("/v1/toc/tables?q=&limit=3")
+    assert (a.headers[CACHE_HEADER], b.headers[CACHE_HEADER]) == ("MISS", "HIT")
+    assert a.content == b.content and a.headers["etag"] == b.headers["etag"]
+    assert b.headers["x-next-cursor"] == a.headers["x-next-cursor"]
+
+
+def test_hit_answers_conditional_requests(client):
+    first = client.get("/v1/toc/tables")
+    assert client.get("/v1/toc/tables").headers[CACHE_HEADER] == "HIT"
+    assert client.get("/v1/toc/tables", headers={"If-None-Match": first.headers["etag"]}).status_code == 304
+    assert client.get("/v1/toc/tables", headers={"If-Modified-Since": first.headers["last-modified"]}).status_code == 304
+    assert client.get("/v1/toc/tables", headers={"If-None-Match": 'W/"other"'}).status_code == 200
+    assert client.get("/v1/toc/tables", headers={"If-Modified-Since": "Thu, 01 Jan 1970 00:00:00 GMT"}).status_code == 200
+
+
+def test_commit_invalidates_tagged_entries(client):
+    client.post("/v1/specs/reload")  # picks up spec loads made by other tests first
+    client.get("/v1/toc/tables")
+    client.get("/v1/specs")
+    assert client.get("/v1/specs").headers[CACHE_HEADER] == "HIT"
+    with SessionLocal() as db:
+        item = db.query(TOCItem).filter(TOCItem.type == "table").first()
+        item.status = "Draft" if item.status != "Draft" else "Final"
+        db.commit()
+    assert client.get("/v1/toc/tables").headers[CACHE_HEADER] == "MISS"
+    assert client.get("/v1/specs").headers[CACHE_HEADER] == "HIT"  # tagged with other tables
+    client.post("/v1/specs/reload")
+    assert client.get("/v1/specs").headers[CACHE_HEADER] == "MISS"
+
+
+def test_streamed_responses_bypass_the_cache(client):
+    r = client.get("/v1/specs/datasets/ADSL/variables", headers={"Accept": "application/x-ndjson"})
+    assert CACHE_HEADER not in r.headers
+
+
+def _entry(tables=("toc_items",), ttl=60.0):
+    return _Entry(b"x", (), "application/json", frozenset(tables), ttl)
+
+
+def test_lru_eviction(monkeypatch):
+    monkeypatch.setattr("app.cache.time.monotonic", lambda: 0.0)
+    cache = ResponseCache(max_entries=2, ttl=60)
+    for key in "abc":
+        cache.put(key, _entry(), cache.generation(["toc_items"]))
+        cache.get("a", "r")  # keeps "a" recently used
+    assert cache.get("b", "r") is None and cache.get("a", "r") and cache.get("c", "r")
+    assert cache.evictions == 1
+
+
+def test_ttl_expiry(monkeypatch):
+    now = [0.0]
+    monkeypatch.setattr("app.cache.time.monotonic", lambda: now[0])
+    cache = ResponseCache(max_entries=4, ttl=60)
+    cache.put("a", _entry(ttl=10.0), cache.generation(["toc_items"]))
+    assert cache.get("a", "r") is not None
+    now[0] = 11.0
+    assert cache.get("a", "r") is None
+
+
+def test_entry_built_across_a_write_is_not_stored():
+    cache = ResponseCache(max_entries=4, ttl=60)
+    generation = cache.generation(["toc_items"])
+    cache.invalidate(["toc_items"])  # committed while the response was being built
+    cache.put("a", _entry(), generation)
+    assert len(cache) == 0
@@ -0,0 +1,110 @@
+# tests/test_conditional.py
+import threading
+
+from sqlalchemy import event
+
+from app import changes
+from app.cache import response_cache
+from app.db import SessionLocal, engine
+from app.models import ProgramQC
+from app.changes import versions
+
+
+def _version(table):
+    with SessionLocal() as db:
+        return versions(db, [table])[table][0]
+
+
+def test_etag_and_304(client):
+    r = client.get("/v1/toc/tables", params={"limit": 5})
+    etag, modified = r.headers["etag"], r.headers["last-modified"]
+    again = client.get("/v1/toc/tables", params={"limit": 5}, headers={"If-None-Match": etag})
+    assert again.status_code == 304 and again.content == b"" and again.headers["etag"] == etag
+    response_cache.clear()  # the handler's own check, not a cache hit (see test_cache)
+    assert client.get("/v1/toc/tables", params={"limit": 5}, headers={"If-Modified-Since": modified}).status_code == 304
+    # the ETag is per request: other query, other path
+    assert client.get("/v1/toc/tables", params={"limit": 6}, headers={"If-None-Match": etag}).status_code == 200
+    assert client.get("/v1/specs", headers={"If-None-Match": etag}).status_code == 200
+
+
+def test_unrelated_write_keeps_etag(client, program):
+    etag = client.get("/v1/toc/tables").headers["etag"]
+    client.patch(f"/v1/program_qc/{program['id']}", json={"status": "Complete"})
+    assert client.get("/v1/toc/tables", headers={"If-None-Match": etag}).status_code == 304
+
+
+def test_every_write_path_bumps_its_table(client):
+    before, toc = _version("program_qc"), _version("toc_items")
+    created = client.post("/v1/program_qc", json={"program_name": "t_version"}).json()
+    client.patch(f"/v1/program_qc/{created['id']}", json={"status": "Complete"})
+    client.post("/v1/program_qc:batch", json={"delete": [created["id"]]})
+    assert _version("program_qc") == before + 3
+    assert _version("toc_items") == toc  # untouched tables keep theirs
+
+
+def test_rolled_back_write_does_not_bump():
+    before = _version("program_qc")
+    with SessionLocal() as db:
+        db.add(ProgramQC(program_name="t_rolled_back"))
+        db.flush()
+        db.rollback()
+    assert _version("program_qc") == before
+
+
+def test_bump_follows_commit():
+    """The version row is written after the data commits, in its own transaction."""
+    seen = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        seen.append(statement.split()[0].upper() + (" table_versions" if "table_versions" in statement else ""))
+
+    event.listen(engine, "before_cursor_execute", record)
+    event.listen(engine, "commit", lambda conn: seen.append("COMMIT"))
+    try:
+        with SessionLocal() as db:
+            db.add(ProgramQC(program_name="t_bump_order"))
+            db.commit()
+    finally:
+        event.remove(engine, "before_cursor_execute", record)
+    assert seen.index("UPDATE table_versions") > seen.index("COMMIT") > seen.index("INSERT")
+
+
+def test_concurrent_writers_count_every_bump(client):
+    before = _version("program_qc")
+    ids = []
+
+    def write():
+        with SessionLocal() as db:
+            obj = ProgramQC(program_name="t_concurrent")
+            db.add(obj)
+            db.commit()
+            ids.append(obj.id)
+
+    threads = [threading.Thread(target=write) for _ in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert len(ids) == 8
+    assert _version("program_qc") == before + 8
+    client.post("/v1/program_qc:batch", json={"delete": ids})
+
+
+def test_on_commit_sees_the_new_version():
+    seen = []
+
+    def callback(tables):
+        seen.append((tables, _version("program_qc")))
+
+    changes.on_commit(callback)
+    try:
+        before = _version("program_qc")
+        with SessionLocal() as db:
+            obj = ProgramQC(program_name="t_callback")
+            db.add(obj)
+            db.commit()
+            db.delete(obj)
+            db.commit()
+    finally:
+        changes._callbacks.remove(callback)
+    assert seen == [({"program_qc"}, before + 1), ({"program_qc"}, before + 2)]
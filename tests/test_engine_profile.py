@@ -0,0 +1,54 @@
+# tests/test_engine_profile.py
+import logging
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine
+from sqlalchemy.engine import make_url
+
+from app import engine_profile
+from app.db import engine
+
+
+def test_sqlite_pragmas_are_applied():
+    with engine.connect() as conn:
+        assert conn.exec_driver_sql("PRAGMA journal_mode").scalar() == "wal"
+        assert conn.exec_driver_sql("PRAGMA synchronous").scalar() == 1  # NORMAL
+        assert conn.exec_driver_sql("PRAGMA busy_timeout").scalar() == 5000
+
+
+def test_startup_logs_the_profile_where_uvicorn_shows_it(caplog):
+    from app.main import app
+
+    with caplog.at_level(logging.INFO, logger="uvicorn.error"):
+        with TestClient(app):
+            pass
+    lines = [r.getMessage() for r in caplog.records if r.name == "uvicorn.error"]
+    assert any(line.startswith("Database engine: sqlite+pysqlite") and "journal_mode=wal" in line
+               for line in lines)
+
+
+def test_pool_options_from_env(monkeypatch):
+    monkeypatch.setenv("DB_POOL_SIZE", "3")
+    monkeypatch.setenv("DB_POOL_PRE_PING", "no")
+    options = engine_profile.pool_options(make_url("mysql+pymysql://u@h/db"))
+    assert options["pool_size"] == 3 and options["pool_pre_ping"] is False
+    assert options["pool_recycle"] == 1800 and options["max_overflow"] == 20
+    assert engine_profile.pool_options(make_url("sqlite:///x.db"))["pool_recycle"] == -1
+
+
+def test_bad_pragma_value_is_rejected(monkeypatch):
+    monkeypatch.setenv("SQLITE_JOURNAL_MODE", "sideways")
+    with pytest.raises(ValueError, match="SQLITE_JOURNAL_MODE"):
+        engine_profile.sqlite_pragmas()
+
+
+def test_describe_reports_the_pool(tmp_path):
+    url = make_url(f"sqlite:///{tmp_path / 'p.db'}")
+    other = create_engine(url, **engine_profile.engine_options(url, pooled=True))
+    engine_profile.install(other, url)
+    try:
+        text = engine_profile.describe(other)
+    finally:
+        other.dispose()
+    assert "QueuePool" in text and "pool_size=5" in text and "journal_mode=wal" in text
@@ -0,0 +1,108 @@
+# tests/test_events.py
+import asyncio
+import json
+
+import pytest
+
+from app import events
+from app.db import SessionLocal
+from app.events import EventBroker, broker
+from app.models import ProgramQC
+from app.routers.events import stream_events
+
+
+@pytest.fixture
+def published(monkeypatch):
+    seen = []
+    original = broker.publish
+
+    def publish(evts):
+        evts = list(evts)
+        seen.extend(evts)
+        original(evts)
+
+    monkeypatch.setattr(broker, "publish", publish)
+    return seen
+
+
+def test_writes_publish_after_commit(client, program, published):
+    client.patch(f"/v1/program_qc/{program['id']}", json={"status": "Complete"})
+    comment = client.post("/v1/qc_comments", json={"program_qc_id": program["id"], "author": "a",
+                                                   "comment_text": "c"}).json()
+    client.post("/v1/qc_comments:batch", json={"delete": [comment["id"]]})
+    assert [(e["entity"], e["op"], e["id"]) for e in published] == [
+        ("program_qc", "update", program["id"]),
+        ("qc_comments", "create", comment["id"]),
+        ("qc_comments", "delete", comment["id"]),
+    ]
+    assert published[1]["program_qc_id"] == program["id"] and "at" in published[1]
+
+
+def test_rolled_back_and_transient_rows_publish_nothing(published):
+    with SessionLocal() as db:
+        db.add(ProgramQC(program_name="t_events_rollback"))
+        db.flush()
+        db.rollback()
+        obj = ProgramQC(program_name="t_events_transient")
+        db.add(obj)
+        db.flush()
+        db.delete(obj)
+        db.commit()
+    assert published == []
+
+
+def _run(coro):
+    return asyncio.run(coro)
+
+
+async def _read(stream, count):
+    out = []
+    async for chunk in stream.body_iterator:
+        out.append(chunk)
+        if len(out) == count:
+            break
+    await stream.body_iterator.aclose()
+    return out
+
+
+def test_stream_resumes_from_last_event_id(monkeypatch):
+    monkeypatch.setattr(events, "broker", EventBroker(buffer_size=3))
+    fresh = events.broker
+    monkeypatch.setattr("app.routers.events.broker", fresh)
+    fresh.publish([{"entity": "program_qc", "op": "update", "id": i, "program_qc_id": i, "deliverable_id": None}
+                   for i in range(1, 5)])
+
+    async def scenario(last_event_id, count, **filters):
+        params = {"entity": None, "program_qc_id": None, "deliverable_id": None, **filters}
+        stream = await stream_events(last_event_id=last_event_id, **params)
+        return await _read(stream, count)
+
+    retry, first, second = _run(scenario(f"{fresh.boot}-2", 3))
+    assert retry.startswith("retry:")
+    assert first.startswith(f"id: {fresh.boot}-3\n")
+    assert json.loads(second.split("data: ")[1])["id"] == 4
+
+    _, reset = _run(scenario("old-boot-1", 2))
+    assert reset.startswith("event: reset")
+    _, reset = _run(scenario(f"{fresh.boot}-0", 2))  # older than the buffer
+    assert reset.startswith("event: reset")
+
+    _, only = _run(scenario(f"{fresh.boot}-2", 2, entity="program_qc", program_qc_id=4))
+    assert json.loads(only.split("data: ")[1])["id"] == 4
+    assert fresh.subscribers == 0
+
+
+def test_slow_subscriber_is_dropped(monkeypatch):
+    monkeypatch.setattr(events, "QUEUE_SIZE", 2)
+    fresh = EventBroker()
+
+    async def scenario():
+        sub, _ = fresh.subscribe(lambda evt: True, None)
+        fresh.publish([{"id": i} for i in range(3)])
+        await asyncio.sleep(0)
+        return sub
+
+    before = broker.dropped
+    sub = _run(scenario())
+    assert sub.dropped and broker.dropped == before + 1
+    assert sub.queue.get_nowait() is None  # wakes the consumer, which ends the stream
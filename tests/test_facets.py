@@ -0,0 +1,70 @@
+# tests/test_facets.py
+from collections import Counter
+
+import pytest
+
+from app.cache import CACHE_HEADER, response_cache
+
+
+@pytest.fixture(autouse=True)
+def empty_cache():
+    response_cache.clear()
+
+
+def _counts(body, facet):
+    return {v["value"]: v["count"] for v in body["facets"][facet]}
+
+
+def test_program_qc_facets_match_the_list(client):
+    rows = client.get("/v1/program_qc", params={"limit": 500}).json()
+    body = client.get("/v1/program_qc/facets", params={"facets": "status,deliverable_id"}).json()
+    assert body["total"] == len(rows)
+    assert _counts(body, "status") == Counter(r["status"] for r in rows)
+    assert _counts(body, "deliverable_id") == Counter(r["deliverable_id"] for r in rows)
+
+
+def test_facets_take_the_list_filters(client):
+    rows = client.get("/v1/qc_comments", params={"limit": 500, "resolved": "false"}).json()
+    body = client.get("/v1/qc_comments/facets", params={"resolved": "false"}).json()
+    assert body["total"] == len(rows)
+    assert _counts(body, "resolved") == ({False: len(rows)} if rows else {})
+
+
+def test_unknown_facet_is_400(client):
+    assert client.get("/v1/program_qc/facets", params={"facets": "bogus"}).status_code == 400
+    assert client.get("/v1/toc/facets", params={"facets": "bogus"}).status_code == 400
+
+
+def test_summary(client):
+    body = client.get("/v1/program_qc/summary").json()
+    rows = client.get("/v1/program_qc", params={"limit": 500}).json()
+    assert sum(r["count"] for r in body["status_by_deliverable"]) == len(rows)
+    assert sum(r["total"] for r in body["reviewer_workload"]) == len(rows)
+    one = next(r["deliverable_id"] for r in rows if r["deliverable_id"] is not None)
+    scoped = client.get("/v1/program_qc/summary", params={"deliverable_id": one}).json()
+    assert {r["deliverable_id"] for r in scoped["status_by_deliverable"]} == {one}
+
+
+@pytest.mark.parametrize("path,write", [
+    ("/v1/program_qc/facets", "program_qc"),
+    ("/v1/program_qc/summary", "program_qc"),
+    ("/v1/program_qc/summary", "qc_comments"),
+    ("/v1/qc_comments/facets", "qc_comments"),
+])
+def test_cached_with_etag_until_a_write(client, program, path, write):
+    first = client.get(path)
+    assert first.headers[CACHE_HEADER] == "MISS"
+    assert client.get(path).headers[CACHE_HEADER] == "HIT"
+    assert client.get(path, headers={"If-None-Match": first.headers["etag"]}).status_code == 304
+    if write == "program_qc":
+        client.patch(f"/v1/program_qc/{program['id']}", json={"status": "Complete"})
+    else:
+        client.post("/v1/qc_comments", json={"program_qc_id": program["id"], "author": "a", "comment_text": "c"})
+    after = client.get(path, headers={"If-None-Match": first.headers["etag"]})
+    assert after.status_code == 200 and after.headers[CACHE_HEADER] == "MISS"
+    assert after.json() != first.json()
+
+
+def test_toc_facets_etag(client):
+    first = client.get("/v1/toc/facets")
+    assert client.get("/v1/toc/facets", headers={"If-None-Match": first.headers["etag"]}).status_code == 304
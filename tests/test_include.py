@@ -0,0 +1,58 @@
+# tests/test_include.py
+import pytest
+from sqlalchemy import event
+
+from app.cache import response_cache
+
+
+@pytest.fixture
+def statements(served_engine):
+    seen = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith("SELECT") and "table_versions" not in statement:
+            seen.append(statement)
+
+    event.listen(served_engine, "before_cursor_execute", record)
+    yield seen
+    event.remove(served_engine, "before_cursor_execute", record)
+
+
+@pytest.fixture
+def commented(client, program):
+    for resolved in (False, False, True):
+        client.post("/v1/qc_comments", json={"program_qc_id": program["id"], "author": "a",
+                                             "comment_text": "c", "resolved": resolved})
+    return program
+
+
+def test_default_response_has_no_embedded_keys(client):
+    row = client.get("/v1/program_qc", params={"limit": 1}).json()[0]
+    assert not {"deliverable", "comments", "comment_counts"} & set(row)
+
+
+def test_includes_are_embedded(client, commented):
+    got = client.get(f"/v1/program_qc/{commented['id']}",
+                     params={"include": "comments,comment_counts,deliverable"}).json()
+    assert [c["resolved"] for c in got["comments"]] == [False, False, True]
+    assert got["comment_counts"] == {"total": 3, "unresolved": 2}
+    assert got["deliverable"] is None
+    counts_only = client.get(f"/v1/program_qc/{commented['id']}", params={"include": "comment_counts"}).json()
+    assert counts_only["comment_counts"] == {"total": 3, "unresolved": 2} and "comments" not in counts_only
+
+
+def test_page_loads_with_one_query_per_include(client, statements):
+    response_cache.clear()
+    without = client.get("/v1/program_qc", params={"limit": 50})
+    base = len(statements)
+    statements.clear()
+    rows = client.get("/v1/program_qc", params={"limit": 50, "include": "deliverable,comments"}).json()
+    assert len(rows) == len(without.json()) > 1
+    assert len(statements) == base + 2  # one IN query per relationship, not one per row
+    assert any(r["deliverable"] for r in rows)
+
+
+def test_bad_includes(client):
+    assert client.get("/v1/program_qc", params={"include": "bogus"}).status_code == 400
+    r = client.get("/v1/program_qc", params={"include": "comments", "fields": "id"})
+    assert r.status_code == 400
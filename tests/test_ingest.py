@@ -0,0 +1,113 @@
+# tests/test_ingest.py
+import csv
+import shutil
+
+import pytest
+from sqlalchemy import func, select
+
+from app import ingest
+from app.db import engine
+from app.models import QCComment, TOCItem, Tombstone
+
+
+def _count(stmt):
+    with engine.connect() as conn:
+        return conn.execute(stmt).scalar()
+
+
+def _ids(model):
+    with engine.connect() as conn:
+        return dict(conn.execute(select(model.id, model.updated_at).order_by(model.id)).all())
+
+
+def _tombstones(table):
+    return _count(select(func.count()).select_from(Tombstone).where(Tombstone.table_name == table))
+
+
+def test_replace_rerun_keeps_ids(data_dir):
+    ingest.main(["--data-dir", str(data_dir), "--replace", str(data_dir / "QCComments.csv"),
+                 str(data_dir / "TOC_Tables.csv")])
+    comments, toc = _ids(QCComment), _ids(TOCItem)
+    stones = _tombstones("qc_comments"), _tombstones("toc_items")
+    ingest.main(["--data-dir", str(data_dir), "--replace", str(data_dir / "QCComments.csv"),
+                 str(data_dir / "TOC_Tables.csv")])
+    assert _ids(QCComment) == comments  # same ids, and unchanged rows not even touched
+    assert _ids(TOCItem) == toc
+    assert (_tombstones("qc_comments"), _tombstones("toc_items")) == stones
+
+
+def test_replace_applies_changes(data_dir, tmp_path):
+    path = tmp_path / "TOC_Tables.csv"
+    shutil.copy(data_dir / "TOC_Tables.csv", path)
+    ingest.load_file(path, data_dir, replace=True)
+    encoding = ingest.detect_encoding(path)
+    with open(path, newline="", encoding=encoding) as fh:
+        rows = list(csv.reader(fh))
+    header, dropped, retitled = rows[0], rows[1], rows[2]
+    code, title = header.index("Output File Name (from programming)"), header.index("Title")
+    retitled[title] = "Retitled by the test"
+    added = list(retitled)
+    added[code] = "t_added_by_test"
+    with open(path, "w", newline="", encoding=encoding) as fh:
+        csv.writer(fh).writerows([header, *rows[2:], added])
+
+    def by_code(code_value):
+        with engine.connect() as conn:
+            return conn.execute(
+                select(TOCItem.id, TOCItem.title).where(TOCItem.type == "table", TOCItem.code == code_value)
+            ).all()
+
+    dropped_ids = [row.id for row in by_code(dropped[code])]
+    kept_id = by_code(retitled[code])[0].id
+    ingest.load_file(path, data_dir, replace=True)
+    assert by_code(dropped[code]) == []
+    assert by_code(retitled[code]) == [(kept_id, "Retitled by the test")]
+    assert len(by_code("t_added_by_test")) == 1
+    with engine.connect() as conn:
+        stoned = conn.execute(select(Tombstone.row_id).where(Tombstone.table_name == "toc_items")).scalars().all()
+    assert set(dropped_ids) <= set(stoned) and kept_id not in stoned
+    ingest.load_file(data_dir / "TOC_Tables.csv", data_dir, replace=True)
+
+
+def test_replace_pairs_duplicates_in_small_batches(data_dir, tmp_path):
+    program = 23
+    path = tmp_path / "QCComments.csv"
+    header = ["ProgID", "CommentID", "Commenter", "Comment", "Status", "Resolver"]
+
+    def write(comments):
+        with open(path, "w", newline="", encoding="utf-8") as fh:
+            csv.writer(fh).writerows([header] + [[program, "", "t_dup", text, status, ""] for text, status in comments])
+
+    def rows():
+        with engine.connect() as conn:
+            stmt = select(QCComment.id, QCComment.comment_text, QCComment.resolved).where(
+                QCComment.program_qc_id == program).order_by(QCComment.id)
+            return conn.execute(stmt).all()
+
+    write([("same", "open"), ("other", "open"), ("same", "open")])
+    ingest.load_file(path, data_dir, replace=True, batch_size=2)
+    first = rows()
+    assert [(r.comment_text, r.resolved) for r in first] == [("same", False), ("other", False), ("same", False)]
+
+    write([("same", "resolved"), ("other", "open")])  # one "same" gone, the oldest kept and updated
+    ingest.load_file(path, data_dir, replace=True, batch_size=2)
+    assert rows() == [(first[0].id, "same", True), (first[1].id, "other", False)]
+    with engine.connect() as conn:
+        assert conn.execute(select(Tombstone.row_id).where(
+            Tombstone.table_name == "qc_comments", Tombstone.row_id == first[2].id)).scalar() == first[2].id
+    ingest.load_file(data_dir / "QCComments.csv", data_dir, replace=True)
+
+
+@pytest.mark.parametrize("values,is_int", [
+    (["1", "-12", "300"], True),
+    (["007"], False),      # leading zeros are text
+    (["²"], False),        # isdigit() but not int()
+    (["--5"], False),
+    (["-"], False),
+    (["1", "x"], False),
+])
+def test_column_type_inference(values, is_int):
+    stats = ingest._ColumnStats()
+    for value in values:
+        stats.add(value)
+    assert stats.is_int is is_int
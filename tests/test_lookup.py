@@ -0,0 +1,81 @@
+# tests/test_lookup.py
+import pytest
+from fastapi import HTTPException
+from sqlalchemy import event
+
+from app import lookup
+from app.cache import response_cache
+
+
+@pytest.fixture(autouse=True)
+def _fresh():
+    response_cache.clear()
+
+
+@pytest.fixture
+def programs(client):
+    ids = [client.post("/v1/program_qc", json={"program_name": f"t_lookup_{i}", "status": "Planned"}).json()["id"]
+           for i in range(3)]
+    yield ids
+    client.post("/v1/program_qc:batch", json={"delete": ids})
+
+
+def test_get_returns_rows_in_request_order(client, programs):
+    a, b, c = programs
+    r = client.get("/v1/program_qc", params={"ids": f"{c},{a},999999,{a},{b}", "limit": 1})
+    assert [row["id"] for row in r.json()] == [c, a, b]  # duplicates dropped, limit ignored
+    assert r.headers[lookup.MISSING_HEADER] == "999999"
+    assert lookup.MISSING_HEADER not in client.get("/v1/program_qc", params={"ids": f"{a}"}).headers
+
+
+def test_post_lookup_reports_missing(client, programs):
+    a, b, _ = programs
+    body = client.post("/v1/program_qc:lookup", json={"ids": [b, -1, a]}).json()
+    assert [row["id"] for row in body["items"]] == [b, a] and body["missing"] == [-1]
+    body = client.post("/v1/program_qc:lookup", params={"status": "Complete"}, json={"ids": [a]}).json()
+    assert body == {"items": [], "missing": [a]}  # other filters still apply
+
+
+def test_ids_are_fetched_in_chunks(client, programs, monkeypatch, served_engine):
+    monkeypatch.setattr(lookup, "CHUNK_SIZE", 2)
+    seen = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        if "program_qc.id IN" in statement:
+            seen.append(statement)
+
+    event.listen(served_engine, "before_cursor_execute", record)
+    try:
+        rows = client.get("/v1/program_qc", params={"ids": ",".join(map(str, reversed(programs)))}).json()
+    finally:
+        event.remove(served_engine, "before_cursor_execute", record)
+    assert [row["id"] for row in rows] == programs[::-1]
+    assert len(seen) == 2
+
+
+@pytest.mark.parametrize("value", ["²", "--5", "1,x", "1.5", "99999999999999999999"])
+def test_invalid_ids_are_rejected(client, value):
+    r = client.get("/v1/program_qc", params={"ids": value})
+    assert r.status_code == 400 and r.json()["detail"].startswith("Invalid id(s)")
+
+
+def test_parse_ids():
+    assert lookup.parse_ids(None) is None
+    assert lookup.parse_ids(" 3, 1 ,,-2,3 ") == [3, 1, -2]
+    assert lookup.parse_ids("") == []
+
+
+def test_too_many_ids(monkeypatch, client):
+    monkeypatch.setattr(lookup, "MAX_IDS", 2)
+    with pytest.raises(HTTPException) as exc:
+        lookup.check_ids([1, 2, 3])
+    assert exc.value.status_code == 400
+    assert client.post("/v1/program_qc:lookup", json={"ids": [1, 2, 3]}).status_code == 400
+    assert client.post("/v1/program_qc:lookup", json={"ids": [2 ** 63]}).status_code == 400
+
+
+def test_lookup_body_is_bounded_by_the_schema(client):
+    schema = client.get("/openapi.json").json()["components"]["schemas"]["LookupIn"]
+    assert schema["properties"]["ids"]["maxItems"] == lookup.MAX_IDS
+    r = client.post("/v1/personnel:lookup", json={"ids": list(range(lookup.MAX_IDS + 1))})
+    assert r.status_code == 422
@@ -0,0 +1,55 @@
+# tests/test_metrics.py
+import re
+import threading
+
+from app.metrics import Histogram
+
+
+def _sample(text, name, **labels):
+    wanted = ",".join(f'{k}="{v}"' for k, v in labels.items())
+    match = re.search(rf"^{re.escape(name)}\{{{re.escape(wanted)}\}} (\S+)$", text, re.M)
+    return float(match.group(1)) if match else None
+
+
+def test_route_templates_and_status(client):
+    client.get("/v1/program_qc/999999")
+    client.get("/v1/no/such/route")
+    text = client.get("/v1/metrics").text
+    assert _sample(text, "http_request_duration_seconds_count",
+                   method="GET", route="/v1/program_qc/{qc_id}", status="404") >= 1
+    assert _sample(text, "http_request_duration_seconds_count", method="GET", route="unmatched", status="404") >= 1
+    assert _sample(text, "db_statement_duration_seconds_count", route="/v1/program_qc/{qc_id}") >= 1
+    assert _sample(text, 'db_pool_size', engine="primary") is not None
+
+
+def test_histogram_buckets():
+    hist = Histogram("t_seconds", "test", ("k",), (0.1, 1.0))
+    for value in (0.05, 0.1, 0.5, 2.0):
+        hist.observe(value, "a")
+    lines = hist.render()
+    assert 't_seconds_bucket{k="a",le="0.1"} 2' in lines
+    assert 't_seconds_bucket{k="a",le="1.0"} 3' in lines
+    assert 't_seconds_bucket{k="a",le="+Inf"} 4' in lines
+    assert 't_seconds_count{k="a"} 4' in lines
+
+
+def test_histogram_concurrent_observe():
+    hist = Histogram("t_seconds", "test", ("k",), (0.1, 1.0))
+    threads, per_thread = 8, 20000
+    start = threading.Barrier(threads)
+
+    def work(i):
+        start.wait()
+        for _ in range(per_thread):
+            hist.observe(0.5, str(i % 2))
+
+    workers = [threading.Thread(target=work, args=(i,)) for i in range(threads)]
+    for w in workers:
+        w.start()
+    for w in workers:
+        w.join()
+    lines = hist.render()
+    total = threads * per_thread // 2
+    for label in "01":
+        assert f't_seconds_count{{k="{label}"}} {total}' in lines
+        assert f't_seconds_sum{{k="{label}"}} {total * 0.5}' in lines
@@ -0,0 +1,85 @@
+# tests/test_pagination.py
+import base64
+import json
+
+import pytest
+
+from app.pagination import NEXT_CURSOR_HEADER, encode_cursor
+
+LIST_ROUTES = ["/v1/program_qc", "/v1/qc_comments", "/v1/personnel", "/v1/deliverables", "/v1/toc/tables"]
+
+
+def walk(client, path, limit=2, **params):
+    """Ids of every page of ``path`` following X-Next-Cursor."""
+    seen, cursor = [], None
+    while True:
+        query = {"limit": limit, **params, **({"cursor": cursor} if cursor else {})}
+        r = client.get(path, params=query)
+        assert r.status_code == 200, r.text
+        seen += [row["id"] for row in r.json()]
+        cursor = r.headers.get(NEXT_CURSOR_HEADER)
+        if not cursor:
+            return seen
+
+
+@pytest.fixture(scope="module", autouse=True)
+def ties(client):
+    """Rows sharing sort values (created in the same second, NULL names)."""
+    created = []
+    for i in range(5):
+        created.append(("program_qc", client.post("/v1/program_qc", json={"program_name": f"t_page_{i}"}).json()["id"]))
+        created.append(("personnel", client.post(
+            "/v1/personnel", json={"full_name": None if i % 2 else "Page Tie", "preferred_name": f"p{i}"}
+        ).json()["id"]))
+    yield
+    for table, row_id in created:
+        client.delete(f"/v1/{table}/{row_id}")
+
+
+@pytest.mark.parametrize("path", LIST_ROUTES)
+def test_cursor_walk_matches_single_page(client, path):
+    full = [row["id"] for row in client.get(path, params={"limit": 500}).json()]
+    assert walk(client, path) == full
+    assert len(set(full)) == len(full)
+
+
+def test_last_page_has_no_cursor(client):
+    r = client.get("/v1/deliverables", params={"limit": 500})
+    assert NEXT_CURSOR_HEADER not in r.headers
+
+
+def test_cursor_keeps_filters(client):
+    full = [row["id"] for row in client.get("/v1/program_qc", params={"limit": 500, "status": "Planned"}).json()]
+    assert walk(client, "/v1/program_qc", status="Planned") == full
+
+
+def test_insert_does_not_shift_pages(client):
+    first = client.get("/v1/program_qc", params={"limit": 3})
+    cursor = first.headers[NEXT_CURSOR_HEADER]
+    before = [row["id"] for row in client.get("/v1/program_qc", params={"limit": 3, "cursor": cursor}).json()]
+    new_id = client.post("/v1/program_qc", json={"program_name": "t_page_new"}).json()["id"]
+    try:
+        after = [row["id"] for row in client.get("/v1/program_qc", params={"limit": 3, "cursor": cursor}).json()]
+    finally:
+        client.delete(f"/v1/program_qc/{new_id}")
+    assert after == before
+
+
+def test_offset_still_supported(client):
+    full = [row["id"] for row in client.get("/v1/deliverables", params={"limit": 500}).json()]
+    page = [row["id"] for row in client.get("/v1/deliverables", params={"limit": 2, "offset": 1}).json()]
+    assert page == full[1:3]
+
+
+@pytest.mark.parametrize("cursor", ["garbage", "bm90IGpzb24", "WzFd"])
+def test_bad_cursor_is_400(client, cursor):
+    assert client.get("/v1/program_qc", params={"cursor": cursor}).status_code == 400
+
+
+@pytest.mark.parametrize("path", LIST_ROUTES)
+@pytest.mark.parametrize("value", [{"a": 1}, [1, 2]])
+def test_non_scalar_cursor_value_is_400(client, path, value):
+    first = client.get(path, params={"limit": 1})
+    size = len(json.loads(base64.urlsafe_b64decode(first.headers[NEXT_CURSOR_HEADER] + "==")))
+    r = client.get(path, params={"cursor": encode_cursor([value] * size)})
+    assert r.status_code == 400 and r.json()["detail"] == "Invalid cursor"
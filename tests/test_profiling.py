@@ -0,0 +1,71 @@
+# tests/test_profiling.py
+import csv
+import io
+import json
+import logging
+
+import pytest
+
+from app import profiling, streaming
+from app.cache import response_cache
+from app.streaming import CSV, NDJSON
+
+
+@pytest.fixture(autouse=True)
+def _fresh():
+    response_cache.clear()
+
+
+@pytest.fixture
+def slow_log(monkeypatch, caplog):
+    """Every statement counts as slow; returns the records logged so far."""
+    monkeypatch.setattr(profiling, "SLOW_QUERY_MS", 1e-6)
+    caplog.set_level(logging.WARNING, logger="app.slow_query")
+    return lambda: [json.loads(r.getMessage()) for r in caplog.records if r.name == "app.slow_query"]
+
+
+def test_headers_count_the_request_statements(client, program):
+    r = client.get(f"/v1/program_qc/{program['id']}")
+    count = int(r.headers["x-query-count"])
+    assert count >= 1
+    assert f'desc="{count} quer' in r.headers["server-timing"] and "app;dur=" in r.headers["server-timing"]
+
+
+@pytest.mark.parametrize("media_type", [NDJSON, CSV])
+def test_streamed_response_has_no_totals(client, media_type):
+    r = client.get("/v1/specs/ADSL", headers={"Accept": media_type})
+    assert r.status_code == 200 and r.headers["content-type"].startswith(media_type)
+    assert "x-query-count" not in r.headers and "server-timing" not in r.headers
+    etag = client.get("/v1/specs/ADSL").headers["etag"]
+    response_cache.clear()
+    not_modified = client.get("/v1/specs/ADSL", headers={"If-None-Match": etag})
+    assert not_modified.status_code == 304 and "x-query-count" in not_modified.headers  # no body, not streamed
+
+
+def test_slow_query_is_logged_with_its_plan(client, program, slow_log):
+    client.get(f"/v1/program_qc/{program['id']}")
+    record = next(r for r in slow_log() if r["statement"].startswith("SELECT"))
+    assert record["route"] == "/v1/program_qc/{qc_id}" and record["method"] == "GET"
+    assert record["explain"] and not any(line.startswith("EXPLAIN failed") for line in record["explain"])
+
+
+@pytest.mark.parametrize("media_type", [NDJSON, CSV])
+def test_streamed_statement_is_not_explained(client, monkeypatch, media_type, slow_log):
+    monkeypatch.setattr(streaming, "STREAM_BATCH", 7)  # several partitions
+    rows = client.get("/v1/specs/ADSL").json()
+    r = client.get("/v1/specs/ADSL", headers={"Accept": media_type})
+    if media_type == NDJSON:
+        assert [json.loads(line) for line in r.text.splitlines()] == rows
+    else:
+        assert len(list(csv.reader(io.StringIO(r.text)))) == len(rows) + 1
+    streamed = [rec for rec in slow_log() if rec.get("streamed")]
+    assert streamed and all("explain" not in rec for rec in streamed)
+
+
+def test_profile_needs_the_token(client, program, monkeypatch):
+    monkeypatch.setattr(profiling, "PROFILE_TOKEN", "secret")
+    url = f"/v1/program_qc/{program['id']}?_profile=1"
+    assert client.get(url).status_code == 403
+    r = client.get(url, headers={"X-Profile-Token": "secret"})
+    assert r.status_code == 200 and r.headers["x-profiled-status"] == "200"
+    assert r.text.startswith("GET /v1/program_qc/{qc_id} -> 200") and "cumulative" in r.text
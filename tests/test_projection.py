@@ -0,0 +1,46 @@
+# tests/test_projection.py
+import pytest
+from sqlalchemy import event
+
+from app.cache import response_cache
+
+
+@pytest.fixture
+def selects(served_engine):
+    seen = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith("SELECT") and "table_versions" not in statement:
+            seen.append(statement)
+
+    response_cache.clear()
+    event.listen(served_engine, "before_cursor_execute", record)
+    yield seen
+    event.remove(served_engine, "before_cursor_execute", record)
+
+
+@pytest.mark.parametrize("path,fields", [
+    ("/v1/program_qc", ["id", "status"]),
+    ("/v1/qc_comments", ["resolved", "id"]),
+    ("/v1/deliverables", ["name"]),
+    ("/v1/personnel", ["id"]),
+    ("/v1/toc/tables", ["code", "title"]),
+    ("/v1/specs/ADSL", ["variable", "label"]),
+])
+def test_only_requested_fields_are_returned(client, path, fields):
+    full = client.get(path, params={"limit": 5}).json()
+    rows = client.get(path, params={"limit": 5, "fields": ",".join(fields)}).json()
+    assert rows and all(list(row) == fields for row in rows)
+    assert rows == [{f: row[f] for f in fields} for row in full]
+
+
+def test_projection_reaches_the_sql(client, selects):
+    client.get("/v1/qc_comments", params={"limit": 5, "fields": "id,author"})
+    select_list = selects[-1].split(" FROM ")[0]
+    assert "author" in select_list and "comment_text" not in select_list
+
+
+@pytest.mark.parametrize("path", ["/v1/program_qc", "/v1/toc/tables", "/v1/specs/ADSL"])
+@pytest.mark.parametrize("fields", ["id,bogus", ",", ""])
+def test_unknown_or_empty_fields_are_400(client, path, fields):
+    assert client.get(path, params={"fields": fields}).status_code == 400
@@ -0,0 +1,96 @@
+# tests/test_replica.py
+import math
+import time
+
+import pytest
+from fastapi import FastAPI, Request
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine
+
+from app import replica
+from app.changes import bump_versions, seed_versions
+from app.models import TableVersion
+
+
+@pytest.fixture
+def pair(tmp_path):
+    """A primary and a replica with the same table versions."""
+    engines = []
+    for name in ("primary", "replica"):
+        e = create_engine(f"sqlite:///{tmp_path / name}.db")
+        TableVersion.__table__.create(e)
+        with e.begin() as conn:
+            seed_versions(conn)
+        engines.append(e)
+    primary, secondary = engines
+    yield primary, secondary
+    primary.dispose()
+    secondary.dispose()
+
+
+def test_lag_monitor(pair):
+    primary, secondary = pair
+    monitor = replica.LagMonitor(primary, secondary, interval=0)
+    assert monitor.check() == 0 and monitor.caught_up()
+
+    monitor.note_write({"program_qc"})
+    with primary.begin() as conn:
+        bump_versions(conn, ["program_qc"])
+    assert not monitor.caught_up()
+    assert 0 < monitor.check() < math.inf  # behind: the age of the replica's newest write
+    assert not monitor.caught_up()
+
+    with secondary.begin() as conn:
+        bump_versions(conn, ["program_qc"])
+    assert monitor.check() == 0 and monitor.caught_up()
+
+
+def test_failed_check_reads_from_the_primary(pair, tmp_path):
+    primary, _ = pair
+    broken = create_engine(f"sqlite:///{tmp_path / 'missing' / 'x.db'}")
+    assert replica.LagMonitor(primary, broken, interval=0).check() == math.inf
+
+
+@pytest.fixture
+def routed(monkeypatch):
+    """A tiny app reporting where get_read_db would route, with routing enabled."""
+    monkeypatch.setattr(replica, "ENABLED", True)
+    monkeypatch.setattr(replica.monitor, "lag", 0.0)
+    monkeypatch.setattr(replica.monitor, "check", lambda: replica.monitor.lag)
+    app = FastAPI()
+    app.add_middleware(replica.PinMiddleware)
+
+    @app.get("/role")
+    def role(request: Request):
+        replica.use_replica(request)
+        return request.state.db_role
+
+    @app.post("/write")
+    def write():
+        return {}
+
+    @app.post("/things:lookup")
+    def lookup():
+        return {}
+
+    with TestClient(app) as c:
+        yield c
+
+
+def test_reads_go_to_the_replica(routed):
+    assert routed.get("/role").json() == "replica"
+    assert routed.get("/role", headers={"X-Read-Primary": "1"}).json() == "primary"
+
+
+def test_write_pins_the_client_to_the_primary(routed, monkeypatch):
+    assert "db_pin" not in routed.post("/things:lookup").cookies  # reads sent as POST do not pin
+    assert routed.post("/write").cookies.get("db_pin")
+    assert routed.get("/role").json() == "primary"
+    later = time.time() + replica.READ_PIN_SECONDS + 1
+    monkeypatch.setattr(replica.time, "time", lambda: later)
+    assert routed.get("/role").json() == "replica"
+
+
+def test_lagging_replica_is_skipped(routed, monkeypatch):
+    monkeypatch.setattr(replica.monitor, "lag", replica.MAX_LAG + 1)
+    assert routed.get("/role").json() == "primary"
@@ -0,0 +1,94 @@
+# tests/test_rollup.py
+import pytest
+
+from app import rollup
+from app.db import engine
+
+
+def _portfolio(client, deliverable_id):
+    rows = client.get("/v1/program_qc/portfolio", params={"deliverable_id": deliverable_id}).json()
+    return rows[0] if rows else {"programs_by_status": {}, "program_count": 0, "unresolved_comments": 0}
+
+
+def _no_drift():
+    with engine.connect() as conn:
+        return rollup.drift(conn) == []
+
+
+@pytest.fixture
+def deliverable(client):
+    """An unused deliverable id, so counts start at zero."""
+    used = {r["deliverable_id"] for r in client.get("/v1/program_qc/portfolio").json()}
+    return max(d for d in used if d is not None) + 1000
+
+
+def test_single_row_writes_apply_deltas(client, deliverable):
+    assert _no_drift()
+    qc = client.post("/v1/program_qc", json={"program_name": "t_rollup", "status": "Planned",
+                                             "deliverable_id": deliverable}).json()
+    comment = client.post("/v1/qc_comments", json={"program_qc_id": qc["id"], "author": "a",
+                                                   "comment_text": "open"}).json()
+    assert _portfolio(client, deliverable)["programs_by_status"] == {"Planned": 1}
+    assert _portfolio(client, deliverable)["unresolved_comments"] == 1
+
+    # moving the program moves its unresolved comments with it
+    client.patch(f"/v1/program_qc/{qc['id']}", json={"status": "Complete"})
+    item = _portfolio(client, deliverable)
+    assert (item["programs_by_status"], item["unresolved_comments"]) == ({"Complete": 1}, 1)
+
+    client.patch(f"/v1/qc_comments/{comment['id']}", json={"resolved": True})
+    assert _portfolio(client, deliverable)["unresolved_comments"] == 0
+    assert _no_drift()
+
+    client.delete(f"/v1/qc_comments/{comment['id']}")
+    client.delete(f"/v1/program_qc/{qc['id']}")
+    assert _portfolio(client, deliverable)["program_count"] == 0
+    assert _no_drift()
+
+
+def test_batch_writes_apply_deltas(client, deliverable):
+    created = client.post("/v1/program_qc:batch", json={"create": [
+        {"program_name": f"t_rollup_batch_{i}", "status": "Planned", "deliverable_id": deliverable}
+        for i in range(3)
+    ]}).json()["results"]
+    ids = [r["id"] for r in created]
+    comments = client.post("/v1/qc_comments:batch", json={"create": [
+        {"program_qc_id": i, "author": "a", "comment_text": "c"} for i in ids
+    ]}).json()["results"]
+    client.post("/v1/program_qc:batch", json={"update": [{"id": ids[0], "status": "In Progress"}],
+                                              "delete": [ids[2]]})
+    item = _portfolio(client, deliverable)
+    assert item["programs_by_status"] == {"Planned": 1, "In Progress": 1}
+    assert item["unresolved_comments"] == 2
+    assert _no_drift()
+    client.post("/v1/qc_comments:batch", json={"delete": [r["id"] for r in comments]})
+    client.post("/v1/program_qc:batch", json={"delete": ids[:2]})
+    assert _portfolio(client, deliverable)["program_count"] == 0
+    assert _no_drift()
+
+
+def test_reused_program_id_inherits_orphaned_comments(client, deliverable):
+    qc = client.post("/v1/program_qc", json={"program_name": "t_rollup_orphan"}).json()
+    comment = client.post("/v1/qc_comments", json={"program_qc_id": qc["id"], "author": "a",
+                                                   "comment_text": "c"}).json()
+    client.delete(f"/v1/program_qc/{qc['id']}")  # the comment stays behind
+    again = client.post("/v1/program_qc", json={"program_name": "t_rollup_orphan",
+                                                "deliverable_id": deliverable}).json()
+    if again["id"] == qc["id"]:  # SQLite reuses the highest id
+        assert _portfolio(client, deliverable)["unresolved_comments"] == 1
+    assert _no_drift()
+    client.post("/v1/qc_comments:batch", json={"delete": [comment["id"]]})
+    client.delete(f"/v1/program_qc/{again['id']}")
+    assert _no_drift()
+
+
+def test_rebuild_repairs_drift(client, deliverable):
+    qc = client.post("/v1/program_qc", json={"program_name": "t_rollup_drift",
+                                             "deliverable_id": deliverable}).json()
+    with engine.begin() as conn:
+        conn.execute(rollup.QCRollup.__table__.update().values(program_count=rollup.QCRollup.program_count + 5))
+        assert rollup.drift(conn)
+    assert rollup.main([]) == 1
+    assert rollup.main(["--repair"]) == 0
+    assert _no_drift()
+    client.delete(f"/v1/program_qc/{qc['id']}")
@@ -0,0 +1,75 @@
+# tests/test_search.py
+import pytest
+from sqlalchemy import create_mock_engine
+from sqlalchemy.dialects import mysql
+from sqlalchemy.orm import Session
+
+from app import search
+from app.db import SessionLocal
+from app.models import QCComment
+
+
+@pytest.fixture
+def comment(client, program):
+    created = client.post("/v1/qc_comments", json={
+        "program_qc_id": program["id"], "author": "zedsearch", "comment_text": "Quuxify the widget",
+    }).json()
+    yield created
+    client.delete(f"/v1/qc_comments/{created['id']}")
+
+
+def _ids(client, path, **params):
+    return [row["id"] for row in client.get(path, params=params).json()]
+
+
+def test_fts_index_is_used_and_maintained(client, comment):
+    with SessionLocal() as db:
+        assert search.indexed_columns(db, "qc_comments") == ("author", "comment_text")
+    assert comment["id"] in _ids(client, "/v1/qc_comments", q="quux")        # prefix match
+    assert comment["id"] in _ids(client, "/v1/qc_comments", q="WIDGET quux")  # every token, any order
+    client.patch(f"/v1/qc_comments/{comment['id']}", json={"comment_text": "Frobnicate"})
+    assert comment["id"] not in _ids(client, "/v1/qc_comments", q="quux")
+    assert comment["id"] in _ids(client, "/v1/qc_comments", q="frob")
+
+
+def test_ranked_search(client, comment):
+    hits = client.get("/v1/search", params={"q": "quuxify", "entity": "qc_comments"}).json()
+    assert [h["id"] for h in hits] == [comment["id"]] and hits[0]["score"] > 0
+    assert client.get("/v1/search", params={"q": "x", "entity": "nope"}).status_code == 404
+
+
+def test_only_callers_columns_are_searched(client, comment):
+    with SessionLocal() as db:
+        stmt = QCComment.__table__.select().with_only_columns(QCComment.id)
+        by_author = db.execute(stmt.where(search.text_filter(db, QCComment.__table__, "quux", [QCComment.author])))
+        by_text = db.execute(stmt.where(search.text_filter(db, QCComment.__table__, "quux", [QCComment.comment_text])))
+        assert comment["id"] not in by_author.scalars().all()
+        assert comment["id"] in by_text.scalars().all()
+
+
+@pytest.fixture
+def mysql_session(monkeypatch):
+    """A Session that compiles for MySQL (never connects) with a FULLTEXT index on qc_comments."""
+    monkeypatch.setattr(search, "_indexes", {"qc_comments": ("author", "comment_text")})
+    return Session(bind=create_mock_engine("mysql://", lambda *a, **kw: None))
+
+
+def _mysql_sql(db, q, columns):
+    clause = search.text_filter(db, QCComment.__table__, q, columns)
+    return str(clause.compile(dialect=mysql.dialect(), compile_kwargs={"literal_binds": True}))
+
+
+def test_mysql_match_uses_index(mysql_session):
+    sql = _mysql_sql(mysql_session, "screen fail", [QCComment.author, QCComment.comment_text])
+    assert "MATCH (qc_comments.author, qc_comments.comment_text) AGAINST ('+screen* +fail*' IN BOOLEAN MODE)" in sql
+
+
+@pytest.mark.parametrize("q", ["to do", "ab screen", "the screen", "screen of"])
+def test_mysql_unindexed_tokens_use_like(mysql_session, q):
+    sql = _mysql_sql(mysql_session, q, [QCComment.author, QCComment.comment_text])
+    assert "MATCH" not in sql and "LIKE" in sql
+
+
+def test_mysql_other_columns_use_like(mysql_session):
+    sql = _mysql_sql(mysql_session, "screen", [QCComment.comment_text])
+    assert "MATCH" not in sql and "lower(qc_comments.comment_text) LIKE" in sql
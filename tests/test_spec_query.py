@@ -0,0 +1,59 @@
+# tests/test_spec_query.py
+import sys
+
+import pytest
+
+from app.spec_query import prefix_upper_bound
+
+
+def _variables(client, path="/v1/specs/ADSL", **params):
+    return [row["variable"] for row in client.get(path, params={"fields": "variable", **params}).json()]
+
+
+def test_filters(client):
+    assert _variables(client, **{"filter[variable]": "USUBJID"}) == ["USUBJID"]
+    assert _variables(client, **{"filter[Variable]": "USUBJID"}) == ["USUBJID"]  # sheet header name
+    assert sorted(_variables(client, **{"filter[variable][in]": "USUBJID, SUBJID"})) == ["SUBJID", "USUBJID"]
+    every = _variables(client)
+    assert _variables(client, **{"filter[variable][prefix]": "TRT"}) == [v for v in every if v.startswith("TRT")]
+
+
+@pytest.mark.parametrize("prefix", [chr(sys.maxunicode), "TRT" + chr(sys.maxunicode), chr(0xD7FF)])
+def test_prefix_without_a_simple_successor(client, prefix):
+    r = client.get("/v1/specs/ADSL", params={"filter[variable][prefix]": prefix})
+    assert r.status_code == 200 and r.json() == []
+
+
+def test_prefix_upper_bound():
+    top = chr(sys.maxunicode)
+    assert prefix_upper_bound("US") == "UT"
+    assert prefix_upper_bound("U" + top + top) == "V"
+    assert prefix_upper_bound(top) is None
+    assert prefix_upper_bound(chr(0xD7FF)) == chr(0xE000)
+
+
+def test_sort_and_cursor_paging(client):
+    whole = client.get("/v1/specs/ADSL", params={"sort": "-variable", "fields": "variable"}).json()
+    assert [r["variable"] for r in whole] == sorted((r["variable"] for r in whole), reverse=True)
+    pages, cursor = [], None
+    while True:
+        params = {"sort": "-variable", "fields": "variable", "limit": 7}
+        if cursor:
+            params["cursor"] = cursor
+        r = client.get("/v1/specs/ADSL", params=params)
+        pages += r.json()
+        cursor = r.headers.get("x-next-cursor")
+        if not cursor:
+            break
+    assert pages == whole
+    assert "_row_id" not in client.get("/v1/specs/ADSL", params={"limit": 1}).json()[0]
+
+
+@pytest.mark.parametrize("params", [
+    {"filter[nope]": "x"},
+    {"filter[_row_id]": "1"},
+    {"sort": "nope"},
+    {"fields": "_row_id"},
+])
+def test_bad_columns_are_400(client, params):
+    assert client.get("/v1/specs/ADSL", params=params).status_code == 400
@@ -0,0 +1,51 @@
+# tests/test_spec_registry.py
+from contextlib import contextmanager
+
+from sqlalchemy import event
+
+from app import ingest
+from app.db import SessionLocal, engine
+from app.spec_registry import registry
+
+
+@contextmanager
+def statements(bind=engine):
+    seen = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        seen.append(statement)
+
+    event.listen(bind, "before_cursor_execute", record)
+    try:
+        yield seen
+    finally:
+        event.remove(bind, "before_cursor_execute", record)
+
+
+def test_reflection_is_cached(client, served_engine):
+    assert client.get("/v1/specs/ADSL").status_code == 200
+    with statements(served_engine) as seen:
+        r = client.get("/v1/specs/ADSL")
+    assert r.status_code == 200 and r.json()
+    assert not [s for s in seen if s.upper().startswith("PRAGMA")]
+
+
+def test_whitelist(client):
+    assert client.get("/v1/specs/spec_tables").status_code == 404
+    assert client.get("/v1/specs/datasets/spec_tables").status_code == 404
+    assert client.get("/v1/specs/datasets/ADSL").status_code == 200
+
+
+def test_reload_after_load(client, data_dir, monkeypatch):
+    with SessionLocal() as db:
+        before = registry.table(db, "codelist")
+        assert registry.table(db, "codelist") is before
+        ingest.load_file(data_dir / "specs" / "codelist.csv", data_dir)
+        monkeypatch.setattr(registry, "check_interval", 0)
+        assert registry.table(db, "codelist") is not before
+
+
+def test_reload_endpoint(client):
+    body = client.post("/v1/specs/reload").json()
+    assert body["tables"] == len(registry.table_names) > 0
+    assert body["datasets"] == len(registry.dataset_names) > 0
@@ -0,0 +1,36 @@
+# tests/test_streaming.py
+import csv
+import io
+import json
+
+from app import streaming
+from app.streaming import CSV, NDJSON
+
+
+def test_ndjson_matches_json(client, monkeypatch):
+    monkeypatch.setattr(streaming, "STREAM_BATCH", 7)  # several partitions
+    rows = client.get("/v1/specs/ADSL").json()
+    r = client.get("/v1/specs/ADSL", headers={"Accept": NDJSON})
+    assert r.headers["content-type"].startswith(NDJSON)
+    assert [json.loads(line) for line in r.text.splitlines()] == rows
+
+
+def test_csv_has_one_header(client, monkeypatch):
+    monkeypatch.setattr(streaming, "STREAM_BATCH", 7)
+    rows = client.get("/v1/specs/datasets/ADSL").json()
+    r = client.get("/v1/specs/datasets/ADSL", headers={"Accept": f"{CSV}; charset=utf-8"})
+    assert r.headers["content-type"].startswith(CSV)
+    table = list(csv.reader(io.StringIO(r.text)))
+    assert table[0] == list(rows[0])
+    assert len(table) == len(rows) + 1
+
+
+def test_empty_csv_is_header_only(client):
+    r = client.get("/v1/specs/ADSL", params={"q": "zzzz-no-such-text"}, headers={"Accept": CSV})
+    assert r.status_code == 200
+    assert len(r.text.splitlines()) == 1
+
+
+def test_json_is_default(client):
+    r = client.get("/v1/specs/ADSL", headers={"Accept": "text/html, */*"})
+    assert r.headers["content-type"].startswith("application/json")
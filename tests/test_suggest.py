@@ -0,0 +1,71 @@
+# tests/test_suggest.py
+from sqlalchemy import delete, insert, update
+
+from app import suggest, tombstones
+from app.db import engine
+from app.models import ProgramQC
+
+
+def _names(client, q, limit=10):
+    return [r["program_name"] for r in client.get("/v1/program_qc/suggest", params={"q": q, "limit": limit}).json()]
+
+
+def test_normalize_and_keys():
+    assert suggest.normalize("t_14-1_DM.sas") == "t 14 1 dm sas"
+    assert suggest.normalize("Zoë  Ångström") == "zoe angstrom"
+    keys = suggest.keys_for(7, ["John A Smith", None])
+    assert keys == ["0john a smith\x007", "1smith\x007"]  # one-letter words start no key
+
+
+def test_single_row_writes_are_indexed_on_commit(client):
+    created = client.post("/v1/program_qc", json={"program_name": "t_suggest_Alpha-Beta.sas"}).json()
+    assert _names(client, "t suggest alpha") == ["t_suggest_Alpha-Beta.sas"]
+    assert _names(client, "beta sas") == ["t_suggest_Alpha-Beta.sas"]  # from a later word
+
+    client.patch(f"/v1/program_qc/{created['id']}", json={"program_name": "t_suggest_Gamma.sas"})
+    assert _names(client, "t suggest alpha") == []
+    assert _names(client, "t_suggest_gam") == ["t_suggest_Gamma.sas"]
+
+    client.delete(f"/v1/program_qc/{created['id']}")
+    assert _names(client, "t suggest gamma") == []
+
+
+def test_batch_writes_are_indexed(client):
+    body = client.post("/v1/program_qc:batch", json={"create": [
+        {"program_name": f"t_suggest_batch_{i}.sas"} for i in range(3)
+    ]}).json()
+    ids = [r["id"] for r in body["results"]]
+    assert sorted(_names(client, "t suggest batch")) == [f"t_suggest_batch_{i}.sas" for i in range(3)]
+    client.post("/v1/program_qc:batch", json={"update": [{"id": ids[0], "program_name": "t_suggest_moved.sas"}],
+                                               "delete": ids[1:]})
+    assert _names(client, "t suggest batch") == []
+    assert _names(client, "t suggest moved") == ["t_suggest_moved.sas"]
+    client.post("/v1/program_qc:batch", json={"delete": ids[:1]})
+
+
+def test_start_of_name_ranks_first_and_limit(client):
+    ids = [client.post("/v1/program_qc", json={"program_name": name}).json()["id"]
+           for name in ("zz_suggest_rank", "t_zz_suggest_rank_b", "zz_suggest_rank_a")]
+    assert _names(client, "zz suggest rank") == ["zz_suggest_rank", "zz_suggest_rank_a", "t_zz_suggest_rank_b"]
+    assert _names(client, "zz suggest rank", limit=2) == ["zz_suggest_rank", "zz_suggest_rank_a"]
+    assert client.get("/v1/program_qc/suggest", params={"q": "---"}).json() == []
+    client.post("/v1/program_qc:batch", json={"delete": ids})
+
+
+def test_sync_picks_up_writes_made_elsewhere():
+    with engine.begin() as conn:
+        row_id = conn.execute(insert(ProgramQC).values(program_name="t_suggest_outside")).inserted_primary_key[0]
+        gone = conn.execute(insert(ProgramQC).values(program_name="t_suggest_gone")).inserted_primary_key[0]
+    with engine.connect() as conn:
+        suggest.PROGRAMS.sync(conn)
+    assert [r["id"] for r in suggest.PROGRAMS.search("t suggest outside", 5)] == [row_id]
+
+    with engine.begin() as conn:
+        conn.execute(update(ProgramQC).where(ProgramQC.id == row_id).values(program_name="t_suggest_renamed"))
+        tombstones.record(conn, "program_qc", [row_id, gone])
+        conn.execute(delete(ProgramQC).where(ProgramQC.id.in_([row_id, gone])))
+    rebuilds = suggest.PROGRAMS.rebuilds
+    with engine.connect() as conn:
+        suggest.PROGRAMS.sync(conn)
+    assert suggest.PROGRAMS.rebuilds == rebuilds  # a delta, not a rebuild
+    assert suggest.PROGRAMS.search("t suggest", 5) == []
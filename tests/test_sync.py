@@ -0,0 +1,73 @@
+# tests/test_sync.py
+import pytest
+
+from app.pagination import encode_cursor
+
+
+def _pull(client, entity, since=None, limit=1000):
+    """Every page of one pass: (items, deleted ids, next token)."""
+    items, deleted = [], []
+    while True:
+        params = {"limit": limit, **({"since": since} if since else {})}
+        body = client.get(f"/v1/sync/{entity}", params=params).json()
+        items += body["items"]
+        deleted += body["deleted"]
+        since = body["next_since"]
+        if not body["has_more"]:
+            return items, deleted, since
+
+
+def test_full_pull_pages_through_every_row(client):
+    whole = client.get("/v1/toc", params={"limit": 500}).json()
+    items, deleted, token = _pull(client, "toc_items", limit=7)
+    assert sorted(i["id"] for i in items) == sorted(r["id"] for r in whole)
+    assert deleted == [] and token
+    assert set(items[0]) == set(whole[0])  # shaped like the list endpoint
+
+
+def test_delta_has_changes_and_tombstones(client):
+    _, _, token = _pull(client, "program_qc")
+    kept = client.post("/v1/program_qc", json={"program_name": "t_sync_kept"}).json()
+    gone = client.post("/v1/program_qc", json={"program_name": "t_sync_gone"}).json()
+    batch = client.post("/v1/program_qc:batch", json={"create": [{"program_name": "t_sync_batch"}]}).json()
+    batch_id = batch["results"][0]["id"]
+    client.patch(f"/v1/program_qc/{kept['id']}", json={"status": "Complete"})
+    client.delete(f"/v1/program_qc/{gone['id']}")
+    client.post("/v1/program_qc:batch", json={"delete": [batch_id]})
+
+    items, deleted, token = _pull(client, "program_qc", token)
+    assert {i["id"]: i["status"] for i in items}[kept["id"]] == "Complete"
+    assert {gone["id"], batch_id} <= set(deleted)
+    assert not {gone["id"], batch_id} & {i["id"] for i in items}
+    client.delete(f"/v1/program_qc/{kept['id']}")
+
+
+def test_recreated_id_is_not_reported_deleted(client):
+    _, _, token = _pull(client, "program_qc")
+    first = client.post("/v1/program_qc", json={"program_name": "t_sync_reuse"}).json()
+    client.delete(f"/v1/program_qc/{first['id']}")
+    again = client.post("/v1/program_qc", json={"program_name": "t_sync_reuse"}).json()
+    items, deleted, _ = _pull(client, "program_qc", token)
+    if again["id"] == first["id"]:
+        assert first["id"] not in deleted and first["id"] in {i["id"] for i in items}
+    client.delete(f"/v1/program_qc/{again['id']}")
+
+
+@pytest.mark.parametrize("since,status", [
+    (encode_cursor(["2000-01-01 00:00:00", None, None, None]), 410),
+    (encode_cursor(["yesterday", None, None, None]), 400),
+    ("garbage", 400),
+    (encode_cursor(["2020-01-01", None, {"a": 1}, [1]]), 400),
+    (encode_cursor(["2020-01-01", None, "2020-01-01 00:00:00", True]), 400),
+    (encode_cursor(["2020-01-01", None, 5, 7]), 400),
+    (encode_cursor([3, None, None, None]), 400),
+])
+def test_bad_tokens(client, since, status):
+    r = client.get("/v1/sync/program_qc", params={"since": since})
+    assert r.status_code == status
+    if status == 400:
+        assert r.json()["detail"] == "Invalid since token"
+
+
+def test_unknown_entity(client):
+    assert client.get("/v1/sync/table_versions").status_code == 404
@@ -0,0 +1,39 @@
+# tests/test_threadpool.py
+import inspect
+
+import pytest
+from anyio import to_thread
+from fastapi.routing import APIRoute
+from fastapi.testclient import TestClient
+
+from app.db import DB_ASYNC, get_db
+from app.replica import get_read_db
+
+
+def _dependencies(dependant):
+    for dep in dependant.dependencies:
+        yield dep.call
+        yield from _dependencies(dep)
+
+
+@pytest.mark.skipif(DB_ASYNC, reason="DB_ASYNC=1 serves the async handlers (see test_async.py)")
+def test_database_handlers_run_in_the_threadpool(client):
+    from app.main import app
+
+    routes = [r for r in app.routes if isinstance(r, APIRoute)
+              and {get_db, get_read_db} & set(_dependencies(r.dependant))]
+    assert len(routes) > 30
+    # A coroutine handler would run its blocking SQL on the event loop
+    assert [r.path for r in routes if inspect.iscoroutinefunction(r.endpoint)] == []
+
+
+def test_threadpool_size_is_applied_at_startup(client, monkeypatch):
+    from app import main
+
+    async def tokens():
+        return to_thread.current_default_thread_limiter().total_tokens
+
+    monkeypatch.setattr(main, "THREADPOOL_SIZE", 7)
+    with TestClient(main.app) as other:
+        assert other.portal.call(tokens) == 7
+    assert client.portal.call(tokens) == 40  # per event loop: the session client's is untouched
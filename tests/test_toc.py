@@ -0,0 +1,98 @@
+# tests/test_toc.py
+import csv
+import shutil
+
+import pytest
+from sqlalchemy import select, update
+
+from app import ingest, toc
+from app.db import SessionLocal, engine
+from app.models import TOCItem, toc_sort_key
+
+
+def test_sort_key_orders_signed_priorities():
+    priorities = [-2 ** 40, -2 ** 31, -5, -1, 0, 1, 7, 99999, 2 ** 31 - 1, None]
+    keys = [toc_sort_key("table", p, "t_x") for p in priorities]
+    assert keys == sorted(keys) and len(set(keys[1:])) == len(keys) - 1  # only beyond INTEGER range collapses
+    assert toc_sort_key("table", None, "t_a") < toc_sort_key("figure", -10, "f_a")
+    assert toc_sort_key("table", 3, "t_a") < toc_sort_key("table", 3, "t_b")
+
+
+@pytest.fixture
+def items():
+    """TOC rows with mixed priorities, deleted afterwards."""
+    with SessionLocal() as db:
+        rows = [TOCItem(type="table", code=f"t_sortkey_{i}", priority=p) for i, p in enumerate([3, None, -4, 0])]
+        db.add_all(rows)
+        db.commit()
+        ids = [r.id for r in rows]
+    yield ids
+    with SessionLocal() as db:
+        for obj in db.scalars(select(TOCItem).where(TOCItem.id.in_(ids))):
+            db.delete(obj)
+        db.commit()
+
+
+def _order(ids):
+    with engine.connect() as conn:
+        return conn.scalars(select(TOCItem.id).where(TOCItem.id.in_(ids)).order_by(TOCItem.sort_key)).all()
+
+
+def _key_is_current(row_id):
+    with engine.connect() as conn:
+        row = conn.execute(select(TOCItem).where(TOCItem.id == row_id)).one()
+    return row.sort_key == toc_sort_key(row.type, row.priority, row.code)
+
+
+def test_insert_orders_by_priority_with_nulls_last(items):
+    assert _order(items) == [items[2], items[3], items[0], items[1]]
+
+
+def test_orm_update_recomputes_the_key(items):
+    with SessionLocal() as db:
+        db.get(TOCItem, items[1]).priority = -10
+        db.get(TOCItem, items[2]).code = "t_sortkey_renamed"
+        db.get(TOCItem, items[0]).title = "Only the title"
+        db.commit()
+    assert _order(items) == [items[1], items[2], items[3], items[0]]
+    assert all(_key_is_current(i) for i in items)
+
+
+def test_backfill_rewrites_missing_and_stale_keys(items):
+    with engine.begin() as conn:
+        conn.execute(update(TOCItem).where(TOCItem.id == items[0]).values(sort_key=None))
+        conn.execute(update(TOCItem).where(TOCItem.id == items[1]).values(priority=-9))  # key now stale
+        conn.execute(update(TOCItem).where(TOCItem.id == items[2]).values(sort_key="100003t_sortkey_2"))
+    with engine.begin() as conn:
+        assert toc.backfill(conn) == 3
+        assert toc.backfill(conn) == 0
+    assert all(_key_is_current(i) for i in items)
+    assert _order(items) == [items[1], items[2], items[3], items[0]]
+
+
+def test_csv_retitle_keeps_the_key(data_dir, tmp_path):
+    path = tmp_path / "TOC_Tables.csv"
+    shutil.copy(data_dir / "TOC_Tables.csv", path)
+    ingest.load_file(path, data_dir, replace=True)
+    encoding = ingest.detect_encoding(path)
+    with open(path, newline="", encoding=encoding) as fh:
+        rows = list(csv.reader(fh))
+    code, title = rows[0].index("Output File Name (from programming)"), rows[0].index("Title")
+    with engine.begin() as conn:
+        row_id = conn.scalar(select(TOCItem.id).where(TOCItem.type == "table", TOCItem.code == rows[1][code]))
+    with SessionLocal() as db:
+        db.get(TOCItem, row_id).priority = -7
+        db.commit()
+
+    rows[1][title] = "Retitled for the sort key test"
+    with open(path, "w", newline="", encoding=encoding) as fh:
+        csv.writer(fh).writerows(rows)
+    ingest.load_file(path, data_dir, replace=True)  # a Core UPDATE of the title alone
+    with engine.connect() as conn:
+        assert conn.scalar(select(TOCItem.title).where(TOCItem.id == row_id)) == "Retitled for the sort key test"
+    assert _key_is_current(row_id)
+
+    with SessionLocal() as db:
+        db.get(TOCItem, row_id).priority = None
+        db.commit()
+    ingest.load_file(data_dir / "TOC_Tables.csv", data_dir, replace=True)
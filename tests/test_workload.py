@@ -0,0 +1,64 @@
+# tests/test_workload.py
+import copy
+import json
+
+import pytest
+
+from benchmarks import workload
+
+
+def _row(count=200, p95=10.0, sql=2.0):
+    return {"count": count, "errors": 0, "p50_ms": 1.0, "p95_ms": p95, "p99_ms": p95, "sql_per_request": sql}
+
+
+@pytest.fixture
+def baseline():
+    return {"dialect": "sqlite", "threadpool": 40, "concurrency": 4, "requests": 5000, "warmup": 500,
+            "rows": {"program_qc": 10}, "throughput_rps": 100.0,
+            "scenarios": {"list": _row(), "rare": _row(count=5)}}
+
+
+def test_same_run_has_no_regressions(baseline):
+    assert workload.compare(copy.deepcopy(baseline), baseline, 0.25) == ([], [])
+
+
+def test_throughput_drop(baseline):
+    result = {**copy.deepcopy(baseline), "throughput_rps": 70.0}
+    regressions, _ = workload.compare(result, baseline, 0.25)
+    assert regressions == ["throughput 100.0 -> 70.0 req/s"]
+    result["throughput_rps"] = 80.0
+    assert workload.compare(result, baseline, 0.25)[0] == []
+
+
+def test_p95_growth_needs_ratio_and_absolute_delta(baseline):
+    result = copy.deepcopy(baseline)
+    result["scenarios"]["list"]["p95_ms"] = 20.0
+    assert workload.compare(result, baseline, 0.25)[0] == ["list: p95 10.0 -> 20.0 ms"]
+    result["scenarios"]["list"]["p95_ms"] = 11.9  # +19%, and under MIN_P95_DELTA_MS
+    assert workload.compare(result, baseline, 0.1)[0] == []
+
+
+def test_sql_per_request_growth_is_compared_even_for_rare_scenarios(baseline):
+    result = copy.deepcopy(baseline)
+    result["scenarios"]["rare"].update(p95_ms=500.0, sql_per_request=4.0)
+    assert workload.compare(result, baseline, 0.25)[0] == ["rare: sql/req 2.0 -> 4.0"]
+
+
+def test_setup_differences_warn(baseline):
+    result = {**copy.deepcopy(baseline), "concurrency": 8, "threadpool": 10}
+    regressions, warnings = workload.compare(result, baseline, 0.25)
+    assert regressions == []
+    assert warnings == ["threadpool differs from the baseline: 40 -> 10",
+                        "concurrency differs from the baseline: 4 -> 8"]
+
+
+def test_every_api_route_is_exercised_or_excluded():
+    assert workload.uncovered_routes() == []
+
+
+@pytest.mark.parametrize("path", sorted(workload.BASELINE_DIR.glob("*.json")))
+def test_committed_baselines_are_comparable(path):
+    stored = json.loads(path.read_text())
+    assert stored["dialect"] == path.stem
+    assert workload.compare(stored, stored, 0.25) == ([], [])
+    assert stored["overall"]["errors"] == 0